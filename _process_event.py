@@ -30,240 +30,263 @@ from message import TextMessage, YoutubeMessage
 log = logging.getLogger(__name__)
 
 
-class ProcessEvent:
+class ProcessEvent(object):
     """
-    Process an event before it's method gets called.
+    Process an event before it's handler gets called.
+
+    Every processor takes the same arguments; the client, the
+    bound handler method of the client, the event and the event data.
+    The processors are looked up once per client class and stored in
+    the client's event registry, see `tinychat.Client.dispatch`
     """
 
-    def __init__(self, client, event, method, event_data):
+    @classmethod
+    def processor(cls, event):
         """
-        Initialize the event processing.
+        Get the processor for an event.
 
-        :param client: An instance of TinychatClient.
-        :type client: client.TinychatClient
-        :param event: The event to process.
+        :param event: The event to get the processor for.
         :type event: str
-        :param method: The method name to call once the processing is done.
-        :type method: str
-        :param event_data: The event data
-        :type event_data: dict
-        """
-        self._client = client
-        self._event = event
-        self._method = method
-        self._event_data = event_data
-
-    def process(self):
-        """
-        Process an event.
-        """
-        log.info('processing: `%s`' % self._event)
-
-        # strict user events
-        if self._event == 'join':
-            self._process_join()
-        elif self._event == 'nick':
-            self._process_nick()
-        elif self._event == 'quit':
-            self._process_quit()
-
-        # general user events
-        elif self._event in ['msg', 'pvtmsg']:
-            self._process_msg()
-        elif self._event == 'yut_play':
-            self._process_yut_play()
-        elif self._event == 'yut_pause':
-            self._process_yut_pause()
-        elif self._event == 'yut_stop':
-            self._process_yut_stop()
-
-        # broadcasting events
-        elif self._event in ['publish', 'unpublish',
-                             'pending_moderation']:
-            self._process_broadcasting()
-
-        # client events
-        elif self._event == 'userlist':
-            self._process_userlist()
-        elif self._event == 'banlist':
-            self._process_banlist()
-        elif self._event == 'ban':
-            self._process_ban()
-        elif self._event == 'unban':
-            self._process_unban()
-        elif self._event == 'stream_moder_allow':
-            self._process_stream_moder_allow()
-        elif self._event == 'stream_moder_close':
-            self._process_stream_moder_close()
-        elif self._event == 'captcha':
-            self._process_captcha()
-        elif self._event == 'password':
-            self._process_password()
+        :return: The processor function of the event.
+        :rtype: function
+        """
+        return PROCESSORS.get(event, cls.no_process)
 
-        else:
-            # no processing
-            self._client.run_method(self._method, self._event_data)
+    @staticmethod
+    def no_process(client, handler, event, event_data):
+        """
+        Events that needs no processing.
+        """
+        handler(event_data)
 
-    def _process_join(self):
+    # strict user events
+    @staticmethod
+    def _process_join(client, handler, event, event_data):
         """
         Process a join event.
         """
-        user = self._client.users.add(self._event_data)
-        self._client.run_method(self._method, user)
+        user = client.users.add(event_data)
+        handler(user)
 
-    def _process_nick(self):
+    @staticmethod
+    def _process_nick(client, handler, event, event_data):
         """
         Process a nick event.
         """
-        user = self._client.users.change_nick(self._event_data)
-        self._client.run_method(self._method, user)
+        user = client.users.change_nick(event_data)
+        handler(user)
 
-    def _process_quit(self):
+    @staticmethod
+    def _process_quit(client, handler, event, event_data):
         """
         Process a quit event.
         """
-        user = self._client.users.delete(self._event_data.get('handle'))
-        self._client.run_method(self._method, user)
+        user = client.users.delete(event_data.get('handle'))
+        handler(user)
 
-    def _process_msg(self):
+    # general user events
+    @staticmethod
+    def _process_msg(client, handler, event, event_data):
         """
         Process a msg event.
 
         NOTE: this could be either a private message
         or a public message.
         """
-        user = self._client.users.search(self._event_data.get('handle'))
-        msg = TextMessage(self._event_data)
+        user = client.users.search(event_data.get('handle'))
+        msg = TextMessage(event_data)
         user.messages.append(msg)
 
-        self._client.run_method(self._method, *(user, msg))
+        handler(user, msg)
 
-    def _process_yut_play(self):
+    @staticmethod
+    def _process_yut_play(client, handler, event, event_data):
         """
         Process an yut_play event.
         """
         user = None
 
-        youtube = YoutubeMessage(self._event_data)
+        youtube = YoutubeMessage(event_data)
 
-        if 'handle' in self._event_data:
-            user = self._client.users.search(self._event_data.get('handle'))
+        if 'handle' in event_data:
+            user = client.users.search(event_data.get('handle'))
             user.messages.append(youtube)
 
-        self._client.run_method(self._method, *(user, youtube))
+        handler(user, youtube)
 
-    def _process_yut_pause(self):
+    @staticmethod
+    def _process_yut_pause(client, handler, event, event_data):
         """
         Process an yut_pause event.
         """
-        user = self._client.users.search(self._event_data.get('handle'))
-        youtube = YoutubeMessage(self._event_data)
-        self._client.run_method(self._method, *(user, youtube))
+        user = client.users.search(event_data.get('handle'))
+        youtube = YoutubeMessage(event_data)
+        handler(user, youtube)
 
-    def _process_yut_stop(self):
+    @staticmethod
+    def _process_yut_stop(client, handler, event, event_data):
         """
         Process an yut_stop event.
         """
-        youtube = YoutubeMessage(self._event_data)
-        self._client.run_method(self._method, youtube)
+        youtube = YoutubeMessage(event_data)
+        handler(youtube)
 
-    def _process_broadcasting(self):
+    # broadcasting events
+    @staticmethod
+    def _process_broadcasting(client, handler, event, event_data):
         """
         Process a broadcasting event.
         """
-        user = self._client.users.search(self._event_data.get('handle'))
+        user = client.users.search(event_data.get('handle'))
         if user is not None:
 
-            if self._event == 'publish':
-                user.is_broadcasting = True
+            if event == 'publish':
+                client.users.set_broadcasting(user, True)
                 user.is_waiting = False
 
-            elif self._event == 'unpublish':
-                user.is_broadcasting = False
+            elif event == 'unpublish':
+                client.users.set_broadcasting(user, False)
 
-            elif self._event == 'pending_moderation':
-                self._client.state.set_greenroom(True)
+            elif event == 'pending_moderation':
+                client.state.set_greenroom(True)
                 user.is_waiting = True
 
-            self._client.run_method(self._method, user)
+            handler(user)
 
-    def _process_userlist(self):
+    # client events
+    @staticmethod
+    def _process_userlist(client, handler, event, event_data):
         """
         Process the userlist event.
+
+        If the users are stale from a resumed connection, the
+        userlist is reconciled and only new users are handled.
         """
+        if client.users.is_stale:
+            joined, kept, removed = client.users.reconcile(event_data.get('users'))
+            log.info('resumed userlist: %s new, %s kept, %s removed' %
+                     (len(joined), len(kept), len(removed)))
+            handler(joined)
+            return
+
         userlist = []
-        for item in self._event_data.get('users'):
+        for item in event_data.get('users'):
             # do not add the client data, it's already there
-            if item['handle'] != self._client.users.client.handle:
-                user = self._client.users.add(item)
+            if item['handle'] != client.users.client.handle:
+                user = client.users.add(item)
                 userlist.append(user)
 
-        self._client.run_method(self._method, userlist)
+        handler(userlist)
 
-    def _process_banlist(self):
+    @staticmethod
+    def _process_banlist(client, handler, event, event_data):
         """
         Process the banlist event.
+
+        A stale banlist is reconciled, and only new bans are handled.
         """
+        if client.users.is_banlist_stale:
+            added, removed = client.users.reconcile_banlist(event_data.get('items'))
+            log.info('reconciled banlist: %s new, %s removed' %
+                     (len(added), len(removed)))
+            if len(added) > 0 or len(removed) > 0:
+                client.schedule_banlist_save()
+            handler(added)
+            return
+
         banlist = []
-        for item in self._event_data.get('items'):
-            banned_user = self._client.users.add_banned_user(item)
+        for item in event_data.get('items'):
+            banned_user = client.users.add_banned_user(item)
             banlist.append(banned_user)
 
-        self._client.run_method(self._method, banlist)
+        client.schedule_banlist_save()
+        handler(banlist)
 
-    def _process_ban(self):
+    @staticmethod
+    def _process_ban(client, handler, event, event_data):
         """
         Process a ban event.
         """
-        if self._event_data.get('success'):
-            user_ban = self._client.users.add_banned_user(self._event_data)
+        if event_data.get('success'):
+            user_ban = client.users.add_banned_user(event_data)
+            client.schedule_banlist_save()
 
-            self._client.run_method(self._method, user_ban)
+            handler(user_ban)
         else:
-            self._client.error(self._event, self._event_data.get('reason'))
+            client.error(event, event_data.get('reason'))
 
-    def _process_unban(self):
+    @staticmethod
+    def _process_unban(client, handler, event, event_data):
         """
         Process an unban event.
         """
-        if self._event_data.get('success'):
-            unbanned = self._client.users.delete_banned_user(self._event_data)
+        if event_data.get('success'):
+            unbanned = client.users.delete_banned_user(event_data)
+            client.schedule_banlist_save()
 
-            self._client.run_method(self._method, unbanned)
+            handler(unbanned)
         else:
-            self._client.error(self._event, self._event_data.get('reason'))
+            client.error(event, event_data.get('reason'))
 
-    def _process_stream_moder_allow(self):
+    @staticmethod
+    def _process_stream_moder_allow(client, handler, event, event_data):
         """
         Process an stream_moder_allow event.
         """
-        allowed = self._client.users.search(self._event_data.get('handle'))
-        allowed_by = self._client.users.search(
-            self._event_data.get('allowed_by'))
+        allowed = client.users.search(event_data.get('handle'))
+        allowed_by = client.users.search(event_data.get('allowed_by'))
 
-        self._client.run_method(self._method, *(allowed, allowed_by))
+        handler(allowed, allowed_by)
 
-    def _process_stream_moder_close(self):
+    @staticmethod
+    def _process_stream_moder_close(client, handler, event, event_data):
         """
         Process and stream_moder_close event.
         """
-        if self._event_data.get('success'):
-            closed = self._client.users.search(self._event_data.get('handle'))
+        if event_data.get('success'):
+            closed = client.users.search(event_data.get('handle'))
 
-            self._client.run_method(self._method, closed)
+            handler(closed)
         else:
-            self._client.error(self._event, self._event_data.get('reason'))
+            client.error(event, event_data.get('reason'))
 
-    def _process_captcha(self):
+    @staticmethod
+    def _process_captcha(client, handler, event, event_data):
         """
         Process captcha event.
         """
-        site_key = self._event_data.get('key')
-        self._client.run_method(self._method, site_key)
+        site_key = event_data.get('key')
+        handler(site_key)
 
-    def _process_password(self):
+    @staticmethod
+    def _process_password(client, handler, event, event_data):
         """
         Process password event.
         """
-        req_id = self._event_data.get('req')
-        self._client.run_method(self._method, req_id)
+        req_id = event_data.get('req')
+        handler(req_id)
+
+
+# event -> processor, events not
+# in here will get no processing
+PROCESSORS = {
+    'join': ProcessEvent._process_join,
+    'nick': ProcessEvent._process_nick,
+    'quit': ProcessEvent._process_quit,
+    'msg': ProcessEvent._process_msg,
+    'pvtmsg': ProcessEvent._process_msg,
+    'yut_play': ProcessEvent._process_yut_play,
+    'yut_pause': ProcessEvent._process_yut_pause,
+    'yut_stop': ProcessEvent._process_yut_stop,
+    'publish': ProcessEvent._process_broadcasting,
+    'unpublish': ProcessEvent._process_broadcasting,
+    'pending_moderation': ProcessEvent._process_broadcasting,
+    'userlist': ProcessEvent._process_userlist,
+    'banlist': ProcessEvent._process_banlist,
+    'ban': ProcessEvent._process_ban,
+    'unban': ProcessEvent._process_unban,
+    'stream_moder_allow': ProcessEvent._process_stream_moder_allow,
+    'stream_moder_close': ProcessEvent._process_stream_moder_close,
+    'captcha': ProcessEvent._process_captcha,
+    'password': ProcessEvent._process_password
+}
@@ -32,6 +32,10 @@ log = logging.getLogger(__name__)
 
 class TinychatApi(object):
 
+    # the base url of the tinychat site, this can
+    # be changed to point to a local test server
+    base_url = 'https://tinychat.com'
+
     @classmethod
     def rtc_version(cls, room):
         """
@@ -43,7 +47,7 @@ class TinychatApi(object):
         :return: The current tinychat rtc version, or None on parse failure.
         :rtype: str | None
         """
-        url = 'https://tinychat.com/room/{0}'.format(room)
+        url = '{0}/room/{1}'.format(cls.base_url, room)
         response = web.get(url=url)
 
         if len(response.errors) > 0:
@@ -63,7 +67,7 @@ class TinychatApi(object):
         :return: The token and the wss endpoint.
         :rtype: dict | None
         """
-        url = 'https://tinychat.com/api/v1.0/room/token/{0}'.format(room)
+        url = '{0}/api/v1.0/room/token/{1}'.format(cls.base_url, room)
 
         response = web.get(url, as_json=True)
 
@@ -87,7 +91,7 @@ class TinychatApi(object):
         :return: A dictionary containing info about the user account.
         :rtype: dict | None
         """
-        url = 'https://tinychat.com/api/v1.0/user/profile?username={0}&'.format(account)
+        url = '{0}/api/v1.0/user/profile?username={1}&'.format(cls.base_url, account)
         response = web.get(url, as_json=True)
 
         if len(response.errors) > 0:
@@ -41,10 +41,13 @@ REFERER = 'https://tinychat.com'
 log = logging.getLogger(__name__)
 
 
-class Track:
+class Track(object):
     """
     Class representing a youtube video.
     """
+    __slots__ = ('id', 'time', 'title', 'image', 'owner', 'is_embeddable',
+                 'type', 'rq_time', 'start', 'pause')
+
     def __init__(self, video_id='', video_time=0, video_title='',
                  image='', owner=None, embeddable=True, video_type='youTube'):
         self.id = video_id
@@ -54,11 +57,20 @@ class Track:
         self.owner = owner
         self.is_embeddable = embeddable
         self.type = video_type
-        self.link = 'https://youtu.be/%s' % video_id
         self.rq_time = time.time()
         self.start = 0
         self.pause = 0
 
+    @property
+    def link(self):
+        """
+        The short link of the video.
+
+        :return: The youtu.be link.
+        :rtype: str
+        """
+        return 'https://youtu.be/%s' % self.id
+
     def __repr__(self):
         return '<%s id=%s, ' \
                'time=%s, title=%s, image=%s, ' \
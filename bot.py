@@ -30,7 +30,8 @@ import random
 
 from page import Privacy
 from apis import Youtube, other
-from util import Timer, ThreadPool, Color, file_handler, PlayList
+from util import Timer, Color, file_handler, \
+    PlayList, StringBans, NickBans, worker, get_scheduler
 from handlers import JoinHandler, NickHandler, \
     MessageHandler, CommandHandler
 from users import User
@@ -45,16 +46,40 @@ other.WEATHER_API_KEY = CONF.WEATHER_KEY
 
 class NortBot(tinychat.Client):
 
-    privacy = None
-    search_list = []
-    bl_search_list = []
-    is_search_list_yt_playlist = False
-    playlist = PlayList()
-    timer = Timer()
-    pool = ThreadPool(CONF.THREAD_POOL)
-    live_count = None
-    _init_time = time.time()
-    vote = None
+    def __init__(self, room, nick=None, **kwargs):
+        tinychat.Client.__init__(self, room, nick, **kwargs)
+        # room specific state, several bots
+        # may be running in the same process
+        self.conf = CONF.room_config()
+        # the lists are immutable snapshots, see get_list
+        self.conf.APPROVED = frozenset(self.conf.APPROVED)
+        self.conf.ACCOUNT_BANS = frozenset(self.conf.ACCOUNT_BANS)
+        self.conf.NICK_BANS = NickBans(self.conf.NICK_BANS)
+        self.conf.STRING_BANS = StringBans(self.conf.STRING_BANS)
+        self.privacy = None
+        self.search_list = []
+        self.bl_search_list = []
+        self.is_search_list_yt_playlist = False
+        self.playlist = PlayList()
+        self.timer = Timer()
+        self.live_count = None
+        self.vote = None
+        self._init_time = time.time()
+        # moderation tasks are never rejected. when the moderation
+        # pool is full, the receive thread of the room runs the task.
+        # the reactor thread serves all rooms, so it waits for room
+        # in the queue instead, and stops reading until then
+        self.moderation_overflow = worker.INLINE \
+            if self._reactor is None else worker.BLOCK
+
+    @property
+    def pool(self):
+        """
+        The moderation pool of the executors.
+
+        :rtype: ThreadPool
+        """
+        return self.executors[worker.MODERATION]
 
     @property
     def config_path(self):
@@ -97,7 +122,7 @@ class NortBot(tinychat.Client):
                                Color.B_GREEN)
 
         self.on_room_info(data.get('room'))
-        self.pool.add_task(self._options)
+        self.executors[worker.HOUSEKEEPING].add_task(self._options)
 
     def on_userlist(self, user_list):  # P
         """
@@ -116,7 +141,7 @@ class NortBot(tinychat.Client):
                                    (user.nick, user.handle, user.account),
                                    Color.B_RED)
             elif user.account:
-                if user.account in CONF.APPROVED:
+                if user.account in self.conf.APPROVED:
                     self.users.mark_as_approved(user.handle)
                 else:
                     self.console.write('Joins: %s:%s:%s' %
@@ -133,10 +158,10 @@ class NortBot(tinychat.Client):
         :param user: The User object of the user joining.
         :type user: users.User
         """
-        jh = JoinHandler(self, user, CONF)
+        jh = JoinHandler(self, user, self.conf)
         jh.console()
         if self.users.client.is_mod:
-            self.pool.add_task(jh.handle)
+            self.pool.put(jh.handle, overflow=self.moderation_overflow)
 
     def on_nick(self, user):  # P
         """
@@ -145,10 +170,10 @@ class NortBot(tinychat.Client):
         :param user: The user changing nick as User object.
         :type user: Users.User
         """
-        nh = NickHandler(self, user, CONF)
+        nh = NickHandler(self, user, self.conf)
         nh.console()
         if self.users.client.is_mod:
-            self.pool.add_task(nh.handle)
+            self.pool.put(nh.handle, overflow=self.moderation_overflow)
 
     def on_msg(self, user, msg):  # P
         """
@@ -160,16 +185,16 @@ class NortBot(tinychat.Client):
         :type msg: TextMessage
         """
         if user.handle != self.users.client.handle:
-            mh = MessageHandler(self, user, CONF, msg)
+            mh = MessageHandler(self, user, self.conf, msg)
             # write message to console
             mh.console()
 
             if self.users.client.is_mod:
                 # check message for ban string
-                self.pool.add_task(mh.handle)
+                self.pool.put(mh.handle, overflow=self.moderation_overflow)
 
                 # initialize the command handler
-                ch = CommandHandler(self, user, msg, CONF, self.pool)
+                ch = CommandHandler(self, user, msg, self.conf, self.executors)
                 # handle command
                 ch.handle()
 
@@ -183,16 +208,16 @@ class NortBot(tinychat.Client):
         :type msg: TextMessage
         """
         if user.handle != self.users.client.handle:
-            mh = MessageHandler(self, user, CONF, msg)
+            mh = MessageHandler(self, user, self.conf, msg)
             # write message to console
             mh.console()
 
             if self.users.client.is_mod:
                 # check private message for ban string
-                self.pool.add_task(mh.handle)
+                self.pool.put(mh.handle, overflow=self.moderation_overflow)
 
                 # initialize the command handler
-                ch = CommandHandler(self, user, msg, CONF, self.pool)
+                ch = CommandHandler(self, user, msg, self.conf, self.executors)
                 # handle command
                 ch.handle()
 
@@ -203,7 +228,7 @@ class NortBot(tinychat.Client):
         :param user: The user waiting in the green room as User object.
         :type user: Users.User
         """
-        if user.account is not None and user.account in CONF.APPROVED:
+        if user.account is not None and user.account in self.conf.APPROVED:
             self.send_cam_approve_msg(user.handle)
             self.console.write('%s:%s:%s was auto approved for broadcast' %
                                (user.nick, user.handle, user.account), Color.B_CYAN)
@@ -236,6 +261,12 @@ class NortBot(tinychat.Client):
         :param youtube: The YoutubeMessage object.
         :type youtube: message.YoutubeMessage
         """
+        # the video details are looked up with the youtube api
+        self.executors[worker.API].submit(
+            self._yut_play, args=(user, youtube),
+            timeout=self.conf.COMMAND_TIMEOUT)
+
+    def _yut_play(self, user, youtube):
         track = Youtube.id_details(youtube.video_id)
 
         if user is None:
@@ -276,6 +307,12 @@ class NortBot(tinychat.Client):
         :param youtube: The YoutubeMessage object.
         :type youtube: message.YoutubeMessage
         """
+        # the video details are looked up with the youtube api
+        self.executors[worker.API].submit(
+            self._yut_pause, args=(user, youtube),
+            timeout=self.conf.COMMAND_TIMEOUT)
+
+    def _yut_pause(self, user, youtube):
         if user is None:
             track = Youtube.id_details(youtube.video_id)
             self.playlist.start('paused @ join', track)
@@ -344,9 +381,9 @@ class NortBot(tinychat.Client):
         A wrapper around the send_chat_msg and
         send_private_msg.
 
-        It is important to understand, that if the
-        timeout is to be used, then the parent
-        caller *must* be running in a thread.
+        If a timeout is given, the message is scheduled
+        on the scheduler and this returns right away,
+        no thread is kept waiting for the timeout.
 
         :param msg: The message to send.
         :type msg: str
@@ -356,23 +393,41 @@ class NortBot(tinychat.Client):
         and the msg type is 2, then the message
         will be sent as private message.
         :type user: User
-        :param timeout: The time to sleep before the message
+        :param timeout: The time to wait before the message
         will be sent.
         :type timeout: int | float
         """
         if timeout > 0.0:
-            time.sleep(timeout)
+            get_scheduler().call_later(timeout, self.responder,
+                                       msg, msg_type, user)
+            return
 
         if msg_type == 2 and isinstance(user, User):
             self.send_private_msg(user.handle, msg)
         else:
             self.send_chat_msg(msg)
 
+    def respond_later(self, msg):
+        """
+        Send a chat message after a random delay.
+
+        Used for greetings and ban notifications.
+
+        :param msg: The message to send.
+        :type msg: str
+        """
+        self.responder(msg, timeout=self.rand_float())
+
     def get_list(self, approved=False, nicks=False,
                  accounts=False, strings=False):
         """
         Read bot specific files to memory.
 
+        Each list is read into a new frozenset, replacing the
+        previous in one assignment. The handlers reading a list
+        from another thread, see either the old or the new list,
+        never one being changed.
+
         :param approved: Read the approved accounts file.
         :type approved: bool
         :param nicks: Read the nick bans file.
@@ -387,17 +442,24 @@ class NortBot(tinychat.Client):
                   (approved, nicks, accounts, strings))
 
         if approved:
-            CONF.APPROVED = file_handler.reader(
-                self.config_path, CONF.APPROVED_FILE_NAME)
+            self.conf.APPROVED = frozenset(file_handler.reader(
+                self.config_path, self.conf.APPROVED_FILE_NAME))
         if nicks:
-            CONF.NICK_BANS = file_handler.reader(
-                self.config_path, CONF.NICK_BANS_FILE_NAME)
+            # only compiled if the file changed
+            nick_bans = frozenset(file_handler.reader(
+                self.config_path, self.conf.NICK_BANS_FILE_NAME))
+            if nick_bans != self.conf.NICK_BANS:
+                self.conf.NICK_BANS = NickBans(nick_bans)
         if accounts:
-            CONF.ACCOUNT_BANS = file_handler.reader(
-                self.config_path, CONF.ACCOUNT_BANS_FILE_NAME)
+            self.conf.ACCOUNT_BANS = frozenset(file_handler.reader(
+                self.config_path, self.conf.ACCOUNT_BANS_FILE_NAME))
         if strings:
-            CONF.STRING_BANS = file_handler.reader(
-                self.config_path, CONF.STRING_BANS_FILE_NAME)
+            # compiled here, instead of for every message, and
+            # only if the file changed, since compiling is costly
+            string_bans = frozenset(file_handler.reader(
+                self.config_path, self.conf.STRING_BANS_FILE_NAME))
+            if string_bans != self.conf.STRING_BANS:
+                self.conf.STRING_BANS = StringBans(string_bans)
 
     @staticmethod
     def format_time(time_stamp, is_milli=False):
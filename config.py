@@ -177,6 +177,35 @@ class Config:
         return default
 
 
+class RoomConfig(object):
+    """
+    A room specific copy of the config options.
+
+    Commands change options at runtime, e.g toggling greet, and
+    the ban lists are read per room. Giving every room it's own
+    copy, lets several rooms run in the same process.
+    """
+    def __init__(self, **options):
+        self.__dict__.update(options)
+
+
+def room_config():
+    """
+    Create a copy of the module level config options.
+
+    :return: A RoomConfig with the upper case options of this module.
+    :rtype: RoomConfig
+    """
+    options = {}
+    for name, value in globals().items():
+        if name.isupper():
+            if isinstance(value, list):
+                value = list(value)
+            options[name] = value
+
+    return RoomConfig(**options)
+
+
 _errors = []
 _application_path = ''
 
@@ -228,6 +257,8 @@ ANTI_CAPTCHA_KEY = config.get('strings', 'AntiCaptchaKey')
 WEATHER_KEY = config.get('strings', 'WeatherApiKey')
 FALLBACK_RTC_VERSION = config.get(
     'strings', 'FallbackRtcVersion', default='2.0.22-4')
+TINYCHAT_URL = config.get(
+    'strings', 'TinychatUrl', default='https://tinychat.com')
 CHAT_LOGGING = config.get('booleans', 'ChatLogging', rtype='bool')
 DEBUG_MODE = config.get('booleans', 'DebugMode', rtype='bool')
 DEBUG_TO_FILE = config.get('booleans', 'DebugToFile', rtype='bool')
@@ -237,6 +268,30 @@ USE_24HOUR = config.get('booleans', 'Use24Hour', rtype='bool')
 DEBUG_FILE_NAME = config.get('strings', 'DebugFileName', default='debug.log')
 CONFIG_PATH = config.get('strings', 'ConfigPath', default='rooms/')
 THREAD_POOL = config.get('integers', 'ThreadPool', default=10, rtype='int')
+THREAD_POOL_QUEUE = config.get(
+    'integers', 'ThreadPoolQueue', default=1000, rtype='int')
+THREAD_POOL_OVERFLOW = config.get(
+    'strings', 'ThreadPoolOverflow', default='reject')
+THREAD_POOL_MAX = config.get(
+    'integers', 'ThreadPoolMax', default=0, rtype='int')
+THREAD_POOL_TARGET_WAIT = config.get(
+    'integers', 'ThreadPoolTargetWait', default=100, rtype='int')
+THREAD_POOL_COOLDOWN = config.get(
+    'integers', 'ThreadPoolCooldown', default=60, rtype='int')
+API_THREAD_POOL = config.get(
+    'integers', 'ApiThreadPool', default=5, rtype='int')
+API_THREAD_POOL_QUEUE = config.get(
+    'integers', 'ApiThreadPoolQueue', default=50, rtype='int')
+API_THREAD_POOL_MAX = config.get(
+    'integers', 'ApiThreadPoolMax', default=0, rtype='int')
+HOUSEKEEPING_THREAD_POOL = config.get(
+    'integers', 'HousekeepingThreadPool', default=1, rtype='int')
+COMMAND_TIMEOUT = config.get(
+    'integers', 'CommandTimeout', default=30, rtype='int')
+USER_MESSAGE_HISTORY = config.get(
+    'integers', 'UserMessageHistory', default=50, rtype='int')
+USER_NICK_HISTORY = config.get(
+    'integers', 'UserNickHistory', default=10, rtype='int')
 # these used to have the B prefix
 BOT_VERSION = __version__
 PREFIX = config.get('strings', 'Prefix', default='!')
@@ -245,6 +300,14 @@ SUPER_KEY = config.get('strings', 'SuperKey', default='8ssfy7723avf')
 MAX_MATCH_BANS = config.get('integers', 'MaxMatchBans', default=2, rtype='int')
 MAX_NOTIFY_DELAY = config.get(
     'integers', 'MaxNotifyDelay', default=2, rtype='int')
+SEND_RATE = config.get('integers', 'SendRate', default=5, rtype='int')
+SEND_BURST = config.get('integers', 'SendBurst', default=10, rtype='int')
+SEND_QUEUE_SIZE = config.get(
+    'integers', 'SendQueueSize', default=500, rtype='int')
+RECONNECT_TRIES = config.get(
+    'integers', 'ReconnectTries', default=10, rtype='int')
+RECONNECT_MAX_DELAY = config.get(
+    'integers', 'ReconnectMaxDelay', default=60, rtype='int')
 PUBLIC_CMD = config.get('booleans', 'PublicCmd', rtype='bool')
 GREET = config.get('booleans', 'Greet', rtype='bool')
 AUTO_LOGIN = config.get('booleans', 'AutoLogin', rtype='bool')
@@ -257,6 +320,10 @@ ENABLE_VOTING = config.get('booleans', 'EnableVoting', rtype='bool')
 TRY_TIME_BASED_CHECKS = config.get(
     'booleans', 'TryTimeBasedCheck', rtype='bool')
 NOTIFY_ON_BAN = config.get('booleans', 'NotifyOnBan', rtype='bool')
+RECORD_FRAMES = config.get('booleans', 'RecordFrames', rtype='bool')
+BANLIST_CACHE = config.get('booleans', 'BanlistCache', rtype='bool')
+BANLIST_CACHE_FILE_NAME = config.get(
+    'strings', 'BanlistCacheFileName', default='banlist_cache.jsonl')
 APPROVED_FILE_NAME = config.get(
     'strings', 'ApprovedFileName', default='approved_accounts.txt')
 NICK_BANS_FILE_NAME = config.get(
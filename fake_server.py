@@ -0,0 +1,592 @@
+# -*- coding: utf-8 -*-
+
+"""
+The MIT License (MIT)
+
+Copyright (c) 2019 Nortxort
+
+Permission is hereby granted, free of charge, to any person obtaining a
+copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the
+Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+"""
+
+# A local stand-in for the tinychat servers, used for load testing.
+#
+# It serves the token, rtc version and user profile endpoints used by
+# TinychatApi, and a websocket endpoint speaking the `tc` protocol.
+# Synthetic users can be set to produce join/message/nick storms, while
+# the latency of the bot's moderation actions and command replies
+# are measured.
+#
+# Usage: python fake_server.py --users 200 --join-rate 50 --msg-rate 200
+# then set TinychatUrl=http://127.0.0.1:8080 in config.ini and start the bot.
+
+import json
+import time
+import base64
+import random
+import struct
+import hashlib
+import argparse
+import threading
+import SocketServer
+from urlparse import urlparse, parse_qs
+
+
+WS_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+OP_CONT = 0x0
+OP_TEXT = 0x1
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+WORDS = ['hello', 'hi', 'lol', 'what', 'is', 'up', 'music', 'nice',
+         'room', 'ok', 'yes', 'no', 'maybe', 'cool', 'cam', 'brb']
+
+COMMANDS = ['!t', '!v', '!help', '!np', '!q', '!flip', '!roll', '!8ball ok?']
+
+
+class Latency:
+    """
+    Thread safe collection of latency samples.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = {}
+
+    def add(self, name, seconds):
+        with self._lock:
+            self._samples.setdefault(name, []).append(seconds)
+
+    def report(self):
+        """
+        Format the latency samples as percentiles.
+
+        :return: A report line for each sample name.
+        :rtype: list
+        """
+        lines = []
+        with self._lock:
+            for name in sorted(self._samples):
+                samples = sorted(self._samples[name])
+                count = len(samples)
+                lines.append('%-12s count=%-7s p50=%.1fms p95=%.1fms p99=%.1fms max=%.1fms' %
+                             (name, count,
+                              samples[int(count * 0.50)] * 1000,
+                              samples[min(count - 1, int(count * 0.95))] * 1000,
+                              samples[min(count - 1, int(count * 0.99))] * 1000,
+                              samples[-1] * 1000))
+        return lines
+
+
+class Storm:
+    """
+    Settings for the synthetic user activity.
+    """
+
+    def __init__(self, args):
+        self.users = args.users
+        self.join_rate = args.join_rate
+        self.msg_rate = args.msg_rate
+        self.nick_rate = args.nick_rate
+        self.publish_rate = args.publish_rate
+        self.account_ratio = args.account_ratio
+        self.command_ratio = args.command_ratio
+        self.commands = args.command or COMMANDS
+        self.bad_nicks = args.bad_nick
+        self.bad_strings = args.bad_string
+        self.bad_ratio = args.bad_ratio
+        self.banlist = args.banlist
+        self.duration = args.duration
+
+
+class RoomSession:
+    """
+    A room session for a single connected client.
+    """
+
+    def __init__(self, handler, storm, latency):
+        self._handler = handler
+        self._storm = storm
+        self._latency = latency
+        self._lock = threading.Lock()
+
+        self.room = None
+        self.client_handle = 1
+        self.users = {}
+        self.bans = {}
+        self._next_handle = 2
+        self._next_ban_id = 1
+        # handle -> time of the last event that could trigger moderation
+        self._moderation_pending = {}
+        # time of command messages waiting for a reply
+        self._command_pending = []
+        self.running = True
+
+        for _ in range(self._storm.banlist):
+            self._ban_item(self._user_info(account=random.random() < 0.5))
+
+    # Incoming client messages.
+    def on_client_message(self, data):
+        event = data.get('tc')
+        req = data.get('req', -1)
+
+        if event == 'join':
+            self.room = data.get('room')
+            self._joined(data, req)
+
+        elif event == 'pong':
+            pass
+
+        elif event == 'nick':
+            self.send({'tc': 'nick', 'handle': self.client_handle,
+                       'nick': data.get('nick')})
+
+        elif event in ('msg', 'pvtmsg'):
+            self._command_reply()
+
+        elif event in ('kick', 'ban'):
+            self._moderation(event, data.get('handle'), req)
+
+        elif event == 'unban':
+            ban = self.bans.pop(data.get('id'), None)
+            if ban is not None:
+                self.send(dict(ban, tc='unban', success=True, req=req))
+            else:
+                self.send({'tc': 'unban', 'success': False,
+                           'reason': 'no such ban', 'req': req})
+
+        elif event == 'banlist':
+            self.send({'tc': 'banlist', 'items': self.bans.values(), 'req': req})
+
+        elif event == 'stream_moder_close':
+            handle = data.get('handle')
+            if handle in self.users:
+                self.users[handle]['broadcasting'] = False
+            self.send({'tc': 'stream_moder_close', 'success': True,
+                       'handle': handle, 'req': req})
+
+        elif event == 'stream_moder_allow':
+            self.send({'tc': 'stream_moder_allow', 'handle': data.get('handle'),
+                       'allowed_by': self.client_handle, 'req': req})
+
+        elif event in ('yut_play', 'yut_pause', 'yut_stop'):
+            self.send({'tc': event, 'item': data.get('item'), 'req': req,
+                       'handle': self.client_handle})
+
+    def _joined(self, data, req):
+        client = {
+            'handle': self.client_handle,
+            'nick': data.get('nick'),
+            'username': '',
+            'mod': True,
+            'owner': False,
+            'lurker': False
+        }
+        self.send({'tc': 'joined', 'self': client, 'req': req,
+                   'room': {'name': self.room, 'topic': 'load test'}})
+
+        users = [client]
+        for _ in range(self._storm.users):
+            user = self._user_info()
+            self.users[user['handle']] = user
+            users.append(user)
+        self.send({'tc': 'userlist', 'users': users})
+
+    def _command_reply(self):
+        # a bot message is paired with the oldest unanswered command,
+        # greetings will skew this, so disable Greet for accurate numbers.
+        with self._lock:
+            if self._command_pending:
+                ts = self._command_pending.pop(0)
+                self._latency.add('command', time.time() - ts)
+
+    def _moderation(self, event, handle, req):
+        with self._lock:
+            ts = self._moderation_pending.pop(handle, None)
+        if ts is not None:
+            self._latency.add(event, time.time() - ts)
+
+        user = self.users.pop(handle, None)
+        if user is not None:
+            if event == 'ban':
+                ban = self._ban_item(user)
+                self.send(dict(ban, tc='ban', success=True, req=req))
+            self.send({'tc': 'quit', 'handle': handle})
+
+    # Synthetic users.
+    def _user_info(self, account=None):
+        handle = self._next_handle
+        self._next_handle += 1
+
+        if account is None:
+            account = random.random() < self._storm.account_ratio
+
+        nick = 'user%s' % handle
+        if self._storm.bad_nicks and random.random() < self._storm.bad_ratio:
+            nick = random.choice(self._storm.bad_nicks)
+
+        return {
+            'handle': handle,
+            'nick': nick if account else 'guest-%s' % handle,
+            'username': 'acc%s' % handle if account else '',
+            'mod': False,
+            'owner': False,
+            'lurker': False,
+            'session_id': str(handle),
+            'giftpoints': 0
+        }
+
+    def _ban_item(self, user):
+        ban = {
+            'id': self._next_ban_id,
+            'nick': user['nick'],
+            'username': user['username'],
+            'moderator': 'loadtest',
+            'reason': ''
+        }
+        self.bans[self._next_ban_id] = ban
+        self._next_ban_id += 1
+        return ban
+
+    def _expect_moderation(self, handle):
+        with self._lock:
+            self._moderation_pending[handle] = time.time()
+
+    def _join(self):
+        user = self._user_info()
+        self.users[user['handle']] = user
+        self._expect_moderation(user['handle'])
+        self.send(dict(user, tc='join'))
+
+        # keep the room size around the user count
+        if len(self.users) > self._storm.users:
+            self._quit()
+
+    def _quit(self):
+        if self.users:
+            handle = random.choice(self.users.keys())
+            del self.users[handle]
+            with self._lock:
+                self._moderation_pending.pop(handle, None)
+            self.send({'tc': 'quit', 'handle': handle})
+
+    def _msg(self):
+        if not self.users:
+            return
+        handle = random.choice(self.users.keys())
+
+        if random.random() < self._storm.command_ratio:
+            text = random.choice(self._storm.commands)
+            with self._lock:
+                self._command_pending.append(time.time())
+
+        elif self._storm.bad_strings and random.random() < self._storm.bad_ratio:
+            text = '%s %s' % (random.choice(WORDS), random.choice(self._storm.bad_strings))
+            self._expect_moderation(handle)
+        else:
+            text = ' '.join(random.sample(WORDS, random.randint(1, 6)))
+
+        self.send({'tc': 'msg', 'handle': handle, 'text': text})
+
+    def _nick(self):
+        if not self.users:
+            return
+        handle = random.choice(self.users.keys())
+        nick = 'nick%s' % random.randint(0, 10 ** 6)
+        if self._storm.bad_nicks and random.random() < self._storm.bad_ratio:
+            nick = random.choice(self._storm.bad_nicks)
+
+        self.users[handle]['nick'] = nick
+        self._expect_moderation(handle)
+        self.send({'tc': 'nick', 'handle': handle, 'nick': nick})
+
+    def _publish(self):
+        if not self.users:
+            return
+        handle = random.choice(self.users.keys())
+        user = self.users[handle]
+        if user.get('broadcasting'):
+            user['broadcasting'] = False
+            self.send({'tc': 'unpublish', 'handle': handle})
+        else:
+            user['broadcasting'] = True
+            self.send({'tc': 'publish', 'handle': handle})
+
+    def storm(self):
+        """
+        Produce the synthetic user activity, until the duration is reached.
+        """
+        rates = [(self._storm.join_rate, self._join),
+                 (self._storm.msg_rate, self._msg),
+                 (self._storm.nick_rate, self._nick),
+                 (self._storm.publish_rate, self._publish)]
+        credit = [0.0] * len(rates)
+
+        start = last = last_ping = time.time()
+        while self.running:
+            now = time.time()
+            if self._storm.duration and now - start > self._storm.duration:
+                break
+
+            elapsed = now - last
+            last = now
+            for i, (rate, func) in enumerate(rates):
+                credit[i] += rate * elapsed
+                while credit[i] >= 1:
+                    credit[i] -= 1
+                    func()
+
+            if now - last_ping > 20:
+                last_ping = now
+                self.send({'tc': 'ping'})
+
+            time.sleep(0.005)
+
+    def send(self, payload):
+        self._handler.send_text(json.dumps(payload))
+
+
+class RequestHandler(SocketServer.StreamRequestHandler):
+    """
+    Serves both the http API endpoints and the websocket endpoint.
+    """
+
+    def setup(self):
+        SocketServer.StreamRequestHandler.setup(self)
+        self._send_lock = threading.Lock()
+
+    def handle(self):
+        request_line = self.rfile.readline().strip()
+        if not request_line:
+            return
+
+        headers = {}
+        while True:
+            line = self.rfile.readline().strip()
+            if not line:
+                break
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        path = request_line.split(' ')[1]
+        if headers.get('upgrade', '').lower() == 'websocket':
+            self._websocket(headers)
+        else:
+            self._http(path)
+
+    # Http.
+    def _http(self, path):
+        url = urlparse(path)
+        host = '%s:%s' % self.server.server_address
+
+        if url.path.startswith('/api/v1.0/room/token/'):
+            body = json.dumps({'result': 'fake-token-%s' % random.randint(0, 10 ** 9),
+                               'endpoint': 'ws://%s/ws' % host})
+            content_type = 'application/json'
+
+        elif url.path.startswith('/api/v1.0/user/profile'):
+            account = parse_qs(url.query).get('username', [''])[0]
+            body = json.dumps({'result': 'success', 'username': account,
+                               'biography': '', 'gender': '', 'location': '',
+                               'role': 'user', 'age': ''})
+            content_type = 'application/json'
+
+        elif url.path.startswith('/room/'):
+            body = '<html><head><link rel="manifest" href="/webrtc/' \
+                   '%s/manifest.json"></head></html>' % self.server.rtc_version
+            content_type = 'text/html'
+
+        else:
+            self.wfile.write('HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\n'
+                             'Connection: close\r\n\r\n')
+            return
+
+        self.wfile.write('HTTP/1.1 200 OK\r\nContent-Type: %s\r\n'
+                         'Content-Length: %s\r\nConnection: close\r\n\r\n%s' %
+                         (content_type, len(body), body))
+
+    # Websocket.
+    def _websocket(self, headers):
+        key = headers.get('sec-websocket-key', '')
+        accept = base64.b64encode(hashlib.sha1(key + WS_GUID).digest())
+
+        response = ['HTTP/1.1 101 Switching Protocols',
+                    'Upgrade: websocket',
+                    'Connection: Upgrade',
+                    'Sec-WebSocket-Accept: %s' % accept]
+        if 'sec-websocket-protocol' in headers:
+            response.append('Sec-WebSocket-Protocol: tc')
+        self.wfile.write('\r\n'.join(response) + '\r\n\r\n')
+
+        session = RoomSession(self, self.server.storm, self.server.latency)
+        storm_thread = None
+
+        try:
+            while True:
+                opcode, payload = self._read_message()
+                if opcode is None or opcode == OP_CLOSE:
+                    break
+
+                elif opcode == OP_PING:
+                    self._send_frame(OP_PONG, payload)
+
+                elif opcode == OP_TEXT:
+                    data = json.loads(payload.decode('utf-8'))
+                    session.on_client_message(data)
+
+                    if data.get('tc') == 'join' and storm_thread is None:
+                        storm_thread = threading.Thread(target=session.storm)
+                        storm_thread.daemon = True
+                        storm_thread.start()
+        finally:
+            session.running = False
+
+    def _read_exact(self, length):
+        data = self.rfile.read(length)
+        if len(data) < length:
+            return None
+        return data
+
+    def _read_frame(self):
+        header = self._read_exact(2)
+        if header is None:
+            return None, None, None
+
+        b1, b2 = struct.unpack('!BB', header)
+        fin = b1 & 0x80
+        opcode = b1 & 0x0f
+        length = b2 & 0x7f
+
+        if length == 126:
+            length = struct.unpack('!H', self._read_exact(2))[0]
+        elif length == 127:
+            length = struct.unpack('!Q', self._read_exact(8))[0]
+
+        mask = None
+        if b2 & 0x80:
+            mask = bytearray(self._read_exact(4))
+
+        payload = bytearray(self._read_exact(length) or '')
+        if mask is not None:
+            for i in range(len(payload)):
+                payload[i] ^= mask[i % 4]
+
+        return fin, opcode, bytes(payload)
+
+    def _read_message(self):
+        fin, opcode, payload = self._read_frame()
+        if fin is None:
+            return None, None
+
+        # fragmented message
+        while not fin:
+            fin, _, more = self._read_frame()
+            if fin is None:
+                return None, None
+            payload += more
+
+        return opcode, payload
+
+    def _send_frame(self, opcode, payload):
+        length = len(payload)
+        if length < 126:
+            header = struct.pack('!BB', 0x80 | opcode, length)
+        elif length < 65536:
+            header = struct.pack('!BBH', 0x80 | opcode, 126, length)
+        else:
+            header = struct.pack('!BBQ', 0x80 | opcode, 127, length)
+
+        with self._send_lock:
+            self.wfile.write(header + payload)
+
+    def send_text(self, text):
+        if isinstance(text, unicode):
+            text = text.encode('utf-8')
+        try:
+            self._send_frame(OP_TEXT, text)
+        except IOError:
+            pass
+
+
+class FakeServer(SocketServer.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address, storm, rtc_version='2.0.0-48'):
+        SocketServer.ThreadingTCPServer.__init__(self, address, RequestHandler)
+        self.storm = storm
+        self.latency = Latency()
+        self.rtc_version = rtc_version
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Local fake tinychat server for load testing.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--users', type=int, default=50,
+                        help='users in the userlist, and the room size to keep.')
+    parser.add_argument('--join-rate', type=float, default=1.0,
+                        help='joins per second.')
+    parser.add_argument('--msg-rate', type=float, default=5.0,
+                        help='messages per second.')
+    parser.add_argument('--nick-rate', type=float, default=0.5,
+                        help='nick changes per second.')
+    parser.add_argument('--publish-rate', type=float, default=0.2,
+                        help='publish/unpublish per second.')
+    parser.add_argument('--account-ratio', type=float, default=0.5,
+                        help='ratio of users signed in to an account.')
+    parser.add_argument('--command-ratio', type=float, default=0.1,
+                        help='ratio of messages that are bot commands.')
+    parser.add_argument('--command', action='append', default=[],
+                        help='command to use instead of the default commands, can be repeated.')
+    parser.add_argument('--bad-nick', action='append', default=[],
+                        help='nick expected to be banned, can be repeated.')
+    parser.add_argument('--bad-string', action='append', default=[],
+                        help='string expected to be banned, can be repeated.')
+    parser.add_argument('--bad-ratio', type=float, default=0.05,
+                        help='ratio of nicks/messages using the bad nicks/strings.')
+    parser.add_argument('--banlist', type=int, default=0,
+                        help='synthetic banlist size.')
+    parser.add_argument('--duration', type=float, default=0,
+                        help='seconds the storm should last, 0 = forever.')
+    parser.add_argument('--report', type=float, default=10,
+                        help='seconds between latency reports.')
+    args = parser.parse_args()
+
+    server = FakeServer((args.host, args.port), Storm(args))
+    server_thread = threading.Thread(target=server.serve_forever)
+    server_thread.daemon = True
+    server_thread.start()
+
+    print('Fake tinychat server on http://%s:%s' % (args.host, args.port))
+    print('Set TinychatUrl=http://%s:%s in config.ini' % (args.host, args.port))
+
+    try:
+        while True:
+            time.sleep(args.report)
+            for line in server.latency.report():
+                print(line)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -56,14 +56,12 @@ class Check(object):
                 self._bot.send_kick_msg(self._user.handle)
 
                 if self._conf.NOTIFY_ON_BAN:
-                    self._bot.responder('Auto-Kicked: (account not allowed)',
-                                        timeout=self._bot.rand_float())
+                    self._bot.respond_later('Auto-Kicked: (account not allowed)')
             else:
                 self._bot.send_ban_msg(self._user.handle)
 
                 if self._conf.NOTIFY_ON_BAN:
-                    self._bot.responder('Auto-Banned: (account not allowed)',
-                                        timeout=self._bot.rand_float())
+                    self._bot.respond_later('Auto-Banned: (account not allowed)')
 
             return True
 
@@ -83,14 +81,12 @@ class Check(object):
                 self._bot.send_kick_msg(self._user.handle)
 
                 if self._conf.NOTIFY_ON_BAN:
-                    self._bot.responder('Auto-Kicked: (guests not allowed)',
-                                        timeout=self._bot.rand_float())
+                    self._bot.respond_later('Auto-Kicked: (guests not allowed)')
             else:
                 self._bot.send_ban_msg(self._user.handle)
 
                 if self._conf.NOTIFY_ON_BAN:
-                    self._bot.responder('Auto-Banned: (guests not allowed)',
-                                        timeout=self._bot.rand_float())
+                    self._bot.respond_later('Auto-Banned: (guests not allowed)')
 
             return True
 
@@ -110,14 +106,12 @@ class Check(object):
                 self._bot.send_kick_msg(self._user.handle)
 
                 if self._conf.NOTIFY_ON_BAN:
-                    self._bot.responder('Auto-Kicked: (lurkers not allowed)',
-                                        timeout=self._bot.rand_float())
+                    self._bot.respond_later('Auto-Kicked: (lurkers not allowed)')
             else:
                 self._bot.send_ban_msg(self._user.handle)
 
                 if self._conf.NOTIFY_ON_BAN:
-                    self._bot.responder('Auto-Banned: (lurkers not allowed)',
-                                        timeout=self._bot.rand_float())
+                    self._bot.respond_later('Auto-Banned: (lurkers not allowed)')
 
             return True
 
@@ -137,15 +131,13 @@ class Check(object):
                 self._bot.send_kick_msg(self._user.handle)
 
                 if self._conf.NOTIFY_ON_BAN:
-                    self._bot.responder('Auto-Kicked: (vip mode enabled)',
-                                        timeout=self._bot.rand_float())
+                    self._bot.respond_later('Auto-Kicked: (vip mode enabled)')
 
             else:
                 self._bot.send_ban_msg(self._user.handle)
 
                 if self._conf.NOTIFY_ON_BAN:
-                    self._bot.responder('Auto-Banned: (vip mode enabled)',
-                                        timeout=self._bot.rand_float())
+                    self._bot.respond_later('Auto-Banned: (vip mode enabled)')
 
             return True
 
@@ -166,29 +158,23 @@ class Check(object):
                 self._bot.send_kick_msg(self._user.handle)
 
                 if self._conf.NOTIFY_ON_BAN:
-                    self._bot.responder('Auto-Kicked: (nick not allowed)',
-                                        timeout=self._bot.rand_float())
+                    self._bot.respond_later('Auto-Kicked: (nick not allowed)')
             else:
                 self._bot.send_ban_msg(self._user.handle)
 
                 if self._conf.NOTIFY_ON_BAN:
-                    self._bot.responder('Auto-Banned: (nick not allowed)',
-                                        timeout=self._bot.rand_float())
+                    self._bot.respond_later('Auto-Banned: (nick not allowed)')
             return True
 
         return False
 
     def _nick(self):
 
-        for nick in self._conf.NICK_BANS:
+        bad = self._conf.NICK_BANS.match(self._user.nick)
+        if bad is not None:
+            log.debug('nick matched nick ban: %s' % bad)
 
-            if nick.startswith('*'):
-                _ = nick.lstrip('*')
-                if _ in self._user.nick:
-                    return True
-
-            elif nick == self._user.nick:
-                return True
+            return True
 
         return False
 
@@ -209,33 +195,23 @@ class Check(object):
                         self._bot.send_kick_msg(self._user.handle)
 
                         if self._conf.NOTIFY_ON_BAN:
-                            self._bot.responder('Auto-Kicked',
-                                                timeout=self._bot.rand_float())
+                            self._bot.respond_later('Auto-Kicked')
                     else:
                         self._bot.send_ban_msg(self._user.handle)
 
                         if self._conf.NOTIFY_ON_BAN:
-                            self._bot.responder('Auto-Banned',
-                                                timeout=self._bot.rand_float())
+                            self._bot.respond_later('Auto-Banned')
 
     def _message(self):
 
         if self._msg is not None:
             log.debug('checking message %s' % self._msg.text)
 
-            chat_words = self._msg.text.split(' ')
-
-            for bad in self._conf.STRING_BANS:
+            bad = self._conf.STRING_BANS.match(self._msg.text)
+            if bad is not None:
+                log.debug('message matched string ban: %s' % bad)
 
-                if bad.startswith('*'):
-                    _ = bad.replace('*', '')
-                    if _ in repr(self._msg.text):
-
-                        return True
-
-                elif bad in chat_words:
-
-                    return True
+                return True
 
             return False
 
@@ -28,23 +28,45 @@ import logging
 import time
 
 from users import UserLevel
-from util import string_util, file_handler, thread_task
+from util import string_util, file_handler, thread_task, worker
 from apis import Youtube, TinychatApi, JumpinChatApi, WikiPedia, lastfm, locals_, other
 from lc import LiveCount
 from vote import Vote
 
 log = logging.getLogger(__name__)
 
+TASK_PROFILE_FILE_NAME = 'task_profile.txt'
+
+# the commands handled by CommandHandler._handle_command,
+# the timings are only kept for these
+COMMANDS = frozenset([
+    '8ball', 'acspy', 'apr', 'ba', 'ban', 'bb', 'bn', 'bs', 'cam', 'cbc',
+    'close', 'clr', 'clrap', 'clrba', 'clrbn', 'clrbs', 'cm', 'cn', 'cpl',
+    'crb', 'cv', 'dapr', 'del', 'deop', 'dev', 'dir', 'fg', 'flip', 'greet',
+    'guestnick', 'help', 'ip', 'is', 'jcd', 'jcr', 'jcu', 'kab', 'key', 'kick',
+    'kill', 'lc', 'lcc', 'lci', 'lcm', 'lcr', 'lcs', 'lcw', 'list', 'lurkers',
+    'mbpa', 'mbpl', 'mi', 'mod', 'n', 'nick', 'nob', 'noguest', 'np', 'op',
+    'opme', 'p2t', 'plp', 'pls', 'pmme', 'porn', 'profile', 'pub', 'pyts', 'q',
+    'ran', 'reboot', 'rmba', 'rmbn', 'rmbs', 'rmod', 'roll', 'rpl', 'rs',
+    'sbl', 'seek', 'skip', 'spl', 'ssl', 'stats', 't', 'tag', 'top', 'uinfo',
+    'unb', 'urb', 'v', 'vip', 'vo', 'vote', 'vtb', 'vtc', 'vtk', 'wea', 'wiki',
+    'wp', 'yt', 'yts'
+])
+
 
 class CommandHandler:
-    def __init__(self, bot, user, msg, config, pool):
+    def __init__(self, bot, user, msg, config, executors):
         self._bot = bot
         self._user = user
         self._msg = msg
         self._conf = config
-        self._pool = pool
+        self._executors = executors
+        self._pool = executors[worker.MODERATION]
 
         self._playlist = bot.playlist
+        self._cmd = None
+        self._ts = None
+        self._is_submitted = False
 
     def handle(self):
         """
@@ -55,13 +77,73 @@ class CommandHandler:
             parts = self._msg.text.split(' ')
             cmd = parts[0].lstrip(self._conf.PREFIX).lower().strip()
             cmd_arg = ' '.join(parts[1:]).strip()
+            self._cmd = cmd
 
+            self._ts = time.time()
             self._handle_command(cmd, cmd_arg)
+            # a command run in a pool is timed once it's finished
+            if not self._is_submitted:
+                self._add_timing()
+
+    def _add_timing(self):
+        # unknown commands are not timed, so user
+        # text can not fill up the histogram names
+        if self._cmd in COMMANDS:
+            self._bot.timings.add('command.' + self._cmd,
+                                  time.time() - self._ts)
 
     def _responder(self, msg, timeout=0.0):
+        future = worker.current_future()
+        if future is not None and future.timed_out:
+            # the user was already told the command timed out
+            log.debug('discarding reply of timed out task %s: %s' %
+                      (future.name, msg))
+            return
+
         self._bot.responder(msg, msg_type=self._msg.type,
                             user=self._user, timeout=timeout)
 
+    def _submit(self, func, *args):
+        """
+        Run a command method calling an external API in the api pool.
+
+        The method has CommandTimeout seconds to finish. If it
+        does not, the user is told the command timed out, and
+        the pool replaces the worker stuck with it.
+
+        :param func: The command method.
+        :param args: The command method arguments.
+        """
+        self._is_submitted = True
+        future = self._executors[worker.API].submit(
+            func, args, timeout=self._conf.COMMAND_TIMEOUT)
+        future.add_done_callback(self._on_submit_done)
+
+    def _moderate(self, func, *args):
+        """
+        Run a moderation command method in the moderation pool.
+
+        :param func: The command method.
+        :param args: The command method arguments.
+        """
+        self._is_submitted = True
+        future = self._pool.submit(func, args,
+                                   overflow=self._bot.moderation_overflow)
+        future.add_done_callback(self._on_submit_done)
+
+    def _on_submit_done(self, future):
+        if future.cancelled:
+            # not replied to the room, a flood would only grow by it.
+            # the pool counts it as rejected or dropped in `stats pool`
+            log.warning('command `%s` of %s was not run, task %s' %
+                        (self._cmd, self._user.nick, future.status))
+            return
+
+        self._add_timing()
+        if future.timed_out:
+            self._responder('%s%s timed out, try again later.' %
+                            (self._conf.PREFIX, self._cmd))
+
     def _handle_command(self, cmd, cmd_arg):
         log.debug('handling command `%s`, args: %s, user: %s' %
                   (cmd, cmd_arg, self._user))
@@ -71,16 +153,16 @@ class CommandHandler:
             if self._bot.users.client.is_owner:
 
                 if cmd == 'mod':
-                    self._pool.add_task(self.do_make_mod, cmd_arg)
+                    self._submit(self.do_make_mod, cmd_arg)
 
                 elif cmd == 'rmod':
-                    self._pool.add_task(self.do_remove_mod, cmd_arg)
+                    self._submit(self.do_remove_mod, cmd_arg)
 
                 elif cmd == 'dir':
-                    self._pool.add_task(self.do_directory)
+                    self._submit(self.do_directory)
 
                 elif cmd == 'p2t':
-                    self._pool.add_task(self.do_push2talk)
+                    self._submit(self.do_push2talk)
 
                 elif cmd == 'crb':
                     self._bot.send_chat_msg('command `crb` is not supported.')
@@ -106,6 +188,12 @@ class CommandHandler:
             elif cmd == 'reboot':
                 self.do_reboot()
 
+            elif cmd == 'stats':
+                self.do_stats(cmd_arg)
+
+            elif cmd == 'profile':
+                self.do_profile(cmd_arg)
+
         if self._user.level <= UserLevel.SUPER:
 
             if cmd == 'mi':
@@ -162,19 +250,19 @@ class CommandHandler:
                 self.do_room_settings()
 
             elif cmd == 'top':
-                self._pool.add_task(self.do_lastfm_chart, cmd_arg)
+                self._submit(self.do_lastfm_chart, cmd_arg)
 
             elif cmd == 'ran':
-                self._pool.add_task(self.do_lastfm_random_tunes, cmd_arg)
+                self._submit(self.do_lastfm_random_tunes, cmd_arg)
 
             elif cmd == 'tag':
-                self._pool.add_task(self.do_search_lastfm_by_tag, cmd_arg)
+                self._submit(self.do_search_lastfm_by_tag, cmd_arg)
 
             elif cmd == 'pls':
-                self._pool.add_task(self.do_youtube_playlist_search, cmd_arg)
+                self._submit(self.do_youtube_playlist_search, cmd_arg)
 
             elif cmd == 'plp':
-                self._pool.add_task(self.do_play_youtube_playlist, cmd_arg)
+                self._submit(self.do_play_youtube_playlist, cmd_arg)
 
             elif cmd == 'ssl':
                 self.do_show_search_list()
@@ -206,7 +294,7 @@ class CommandHandler:
                 self.do_clear_playlist()
 
             elif cmd == 'yts':
-                self._pool.add_task(self.do_youtube_search, cmd_arg)
+                self._submit(self.do_youtube_search, cmd_arg)
 
             elif cmd == 'pyts':
                 self.do_play_youtube_search(cmd_arg)
@@ -247,10 +335,10 @@ class CommandHandler:
                 self.do_nick(cmd_arg)
 
             elif cmd == 'kick':
-                self._pool.add_task(self.do_kick, cmd_arg)
+                self._moderate(self.do_kick, cmd_arg)
 
             elif cmd == 'ban':
-                self._pool.add_task(self.do_ban, cmd_arg)
+                self._moderate(self.do_ban, cmd_arg)
 
             elif cmd == 'bn':
                 self.do_bad_nick(cmd_arg)
@@ -283,10 +371,10 @@ class CommandHandler:
                 self.do_broadcast(cmd_arg)
 
             elif cmd == 'is':
-                self._pool.add_task(self.do_instagram_search, cmd_arg)
+                self._submit(self.do_instagram_search, cmd_arg)
 
             elif cmd == 'porn':
-                self._pool.add_task(self.do_porn_search, cmd_arg)
+                self._submit(self.do_porn_search, cmd_arg)
 
             elif cmd == 'close':
                 self.do_close_broadcast(cmd_arg)
@@ -301,13 +389,13 @@ class CommandHandler:
                 self.do_unban(cmd_arg)
 
             elif cmd == 'jcd':
-                self._pool.add_task(self.do_jc_directory)
+                self._submit(self.do_jc_directory)
 
             elif cmd == 'jcr':
-                self._pool.add_task(self.do_jc_room_info, cmd_arg)
+                self._submit(self.do_jc_room_info, cmd_arg)
 
             elif cmd == 'jcu':
-                self._pool.add_task(self.do_jc_user_search, cmd_arg)
+                self._submit(self.do_jc_user_search, cmd_arg)
 
         if (self._conf.PUBLIC_CMD and self._user.level <= UserLevel.DEFAULT) \
                 or self._user.level < UserLevel.DEFAULT:
@@ -328,7 +416,7 @@ class CommandHandler:
                 self.do_uptime()
 
             elif cmd == 'yt':
-                self._pool.add_task(self.do_play_youtube, cmd_arg)
+                self._submit(self.do_play_youtube, cmd_arg)
 
             elif cmd == 'q':
                 self.do_playlist_status()
@@ -344,24 +432,24 @@ class CommandHandler:
 
             # Tinychat API commands.
             elif cmd == 'acspy':
-                self._pool.add_task(self.do_account_spy, cmd_arg)
+                self._submit(self.do_account_spy, cmd_arg)
 
             # Other API commands.
             elif cmd == 'urb':
-                self._pool.add_task(self.do_search_urban_dictionary, cmd_arg)
+                self._submit(self.do_search_urban_dictionary, cmd_arg)
 
             elif cmd == 'wea':
-                self._pool.add_task(self.do_weather_search, cmd_arg)
+                self._submit(self.do_weather_search, cmd_arg)
 
             elif cmd == 'ip':
-                self._pool.add_task(self.do_whois_ip, cmd_arg)
+                self._submit(self.do_whois_ip, cmd_arg)
 
             elif cmd == 'wiki':
-                self._pool.add_task(self.do_wiki, cmd_arg)
+                self._submit(self.do_wiki, cmd_arg)
 
             # Just for fun.
             elif cmd == 'cn':
-                self._pool.add_task(self.do_chuck_noris)
+                self._submit(self.do_chuck_noris)
 
             elif cmd == '8ball':
                 self.do_8ball(cmd_arg)
@@ -472,36 +560,36 @@ class CommandHandler:
         """
         Clear the nick bans file.
         """
-        self._conf.NICK_BANS[:] = []
         file_handler.delete_file_content(self._bot.config_path,
                                          self._conf.NICK_BANS_FILE_NAME)
+        self._bot.get_list(nicks=True)
         self._responder('Nick file cleared.')
 
     def do_clear_bad_strings(self):
         """
         Clear the string bans file.
         """
-        self._conf.STRING_BANS[:] = []
         file_handler.delete_file_content(self._bot.config_path,
                                          self._conf.STRING_BANS_FILE_NAME)
+        self._bot.get_list(strings=True)
         self._responder('String file cleared.')
 
     def do_clear_bad_accounts(self):
         """
         Clear the account bans file.
         """
-        self._conf.ACCOUNT_BANS[:] = []
         file_handler.delete_file_content(self._bot.config_path,
                                          self._conf.ACCOUNT_BANS_FILE_NAME)
+        self._bot.get_list(accounts=True)
         self._responder('Account file cleared.')
 
     def do_clear_approved_users(self):
         """
         Clear the approved file.
         """
-        self._conf.APPROVED[:] = []
         file_handler.delete_file_content(self._bot.config_path,
                                          self._conf.APPROVED_FILE_NAME)
+        self._bot.get_list(approved=True)
         self._responder('Approved file cleared.')
 
         # reset current approved users in the room
@@ -530,6 +618,100 @@ class CommandHandler:
         """
         self._bot.reconnect()
 
+    def do_stats(self, prefix):
+        """
+        Shows processing latencies, the most time consuming first.
+
+        Event and command timings are from the bot, queue wait
+        and run timings of the tasks are from the executors.
+
+        :param prefix: Only show timings starting with this,
+        e.g event, command, wait, run or req. Use pool
+        to show the queue metrics of the executors.
+        :type prefix: str
+        """
+        if prefix == 'pool':
+            lines = []
+            for name, stats in sorted(self._executors.stats().items()):
+                lines.append('%s threads: %s/%s, depth: %s/%s, rejected: %s, '
+                             'dropped: %s, inline: %s, timed out: %s, stuck: %s' %
+                             (name, stats['threads'], stats['max_threads'],
+                              stats['depth'], stats['max_depth'],
+                              stats['rejected'], stats['dropped'], stats['inline'],
+                              stats['timed_out'], stats['stuck']))
+            self._responder('\n'.join(lines))
+            return
+
+        timings = self._bot.timings.summary(prefix)
+        timings.update(self._executors.timings(prefix))
+        if 'req'.startswith(prefix):
+            for event, summary in self._bot.request_stats().items():
+                timings['req.' + event] = summary
+
+        if len(timings) == 0:
+            self._responder('No timings for `%s`' % prefix)
+        else:
+            ranked = sorted(timings.items(), reverse=True,
+                            key=lambda item: item[1]['count'] * item[1]['mean'])
+            lines = []
+            for name, summary in ranked[:8]:
+                line = '%s n=%s p50=%.1f p95=%.1f p99=%.1fms' % \
+                       (name, summary['count'], summary['p50'] * 1000,
+                        summary['p95'] * 1000, summary['p99'] * 1000)
+                # keep the messages below the max message length
+                if len('\n'.join(lines + [line])) > 450:
+                    self._responder('\n'.join(lines))
+                    lines = []
+                lines.append(line)
+            self._responder('\n'.join(lines))
+
+    def do_profile(self, action):
+        """
+        Shows the task functions using the most thread pool time.
+
+        The thread pools and their profile are shared by all
+        rooms running in the process, and so is a clear.
+
+        :param action: Empty to show the task functions, `slow` to show
+        the slowest single runs, `dump` to write the full profile to the
+        room config directory, or `clear` to start a new profile.
+        :type action: str
+        """
+        profiler = self._bot.profiler
+        if action == 'dump':
+            if profiler.dump(self._bot.config_path, TASK_PROFILE_FILE_NAME):
+                self._responder('Task profile written to %s%s' %
+                                (self._bot.config_path, TASK_PROFILE_FILE_NAME))
+            else:
+                self._responder('Failed to write the task profile.')
+
+        elif action == 'clear':
+            profiler.clear()
+            self._responder('Task profile cleared, for all rooms in this process.')
+
+        elif action == 'slow':
+            slowest = profiler.slowest()[:5]
+            if len(slowest) == 0:
+                self._responder('No tasks profiled.')
+            else:
+                self._responder('\n'.join('%s %.0fms wait=%.0fms %s' %
+                                          (name, run * 1000, wait * 1000, args)
+                                          for run, _, name, wait, args in slowest))
+
+        else:
+            tasks = profiler.tasks()
+            total = sum(stats.run_total for stats in tasks) or 1.0
+            lines = []
+            for stats in tasks[:5]:
+                lines.append('%s %.1f%% n=%s err=%s tmout=%s mean=%.0fms max=%.0fms' %
+                             (stats.name, stats.run_total / total * 100, stats.count,
+                              stats.errors, stats.timeouts, stats.run_mean * 1000,
+                              stats.run_max * 1000))
+            if len(lines) == 0:
+                self._responder('No tasks profiled.')
+            else:
+                self._responder('\n'.join(lines))
+
     # SUPER Command Methods.
     def do_media_info(self):
         """
@@ -2027,7 +2209,7 @@ class CommandHandler:
                 if len(urban) > 200:
                     chunks = string_util.chunk_string(urban, 200)
                     for i in range(0, 2):
-                        self._responder(chunks[i], timeout=2.0)
+                        self._responder(chunks[i], timeout=2.0 * (i + 1))
                 else:
                     self._responder(urban)
 
@@ -28,6 +28,7 @@ import logging
 
 from check import Check
 from apis import TinychatApi
+from util import worker
 from util.console import Color
 
 log = logging.getLogger(__name__)
@@ -49,17 +50,17 @@ class JoinHandler(Check):
         if self._user.account is not None:
 
             if self._user.is_mod:
-                self._add_tc_info()
+                self._lookup_tc_info()
                 self._greet()
 
             elif self._user.account in self._conf.APPROVED:  # and not self._user.is_mod
-                self._add_tc_info()
+                self._lookup_tc_info()
                 self._set_approved()
                 self._greet()
             else:
                 if not Check.account(self) and not Check.vip_mode(self):
                     if not Check.nick(self):
-                        self._add_tc_info()
+                        self._lookup_tc_info()
                         self._greet()
         else:
             if not Check.guest_entry(self) and not Check.lurker(self) \
@@ -95,15 +96,18 @@ class JoinHandler(Check):
             if not self._user.nick.startswith('guest-'):
 
                 if self._user.account is not None:
-                    # using responder with timeout
-                    self._bot.responder('Welcome to the room %s:%s:%s' %
-                                        (self._user.nick, self._user.account,
-                                         self._user.handle),
-                                        timeout=self._bot.rand_float())
+                    self._bot.respond_later('Welcome to the room %s:%s:%s' %
+                                           (self._user.nick, self._user.account,
+                                            self._user.handle))
                 else:
-                    self._bot.responder('Welcome to the room %s:%s' %
-                                        (self._user.nick, self._user.handle),
-                                        timeout=self._bot.rand_float())
+                    self._bot.respond_later('Welcome to the room %s:%s' %
+                                           (self._user.nick, self._user.handle))
+
+    def _lookup_tc_info(self):
+        # the lookup is not part of the moderation check,
+        # run it in the api pool to keep the check fast
+        self._bot.executors[worker.API].submit(
+            self._add_tc_info, timeout=self._conf.COMMAND_TIMEOUT)
 
     def _add_tc_info(self):
         log.debug('adding tinychat info for user: %s' % self._user)
@@ -72,12 +72,9 @@ class NickHandler(Check):
                 if self._user.last_nick.startswith('guest-'):
 
                     if self._user.account is not None:
-                        # using responder with timeout
-                        self._bot.responder('Welcome to the room %s:%s:%s' %
-                                            (self._user.nick, self._user.account,
-                                             self._user.handle),
-                                            timeout=self._bot.rand_float())
+                        self._bot.respond_later('Welcome to the room %s:%s:%s' %
+                                               (self._user.nick, self._user.account,
+                                                self._user.handle))
                     else:
-                        self._bot.responder('Welcome to the room %s:%s' %
-                                            (self._user.nick, self._user.handle),
-                                            timeout=self._bot.rand_float())
+                        self._bot.respond_later('Welcome to the room %s:%s' %
+                                               (self._user.nick, self._user.handle))
@@ -27,13 +27,14 @@ DEALINGS IN THE SOFTWARE.
 from datetime import datetime
 
 
-class TextMessage:
+class TextMessage(object):
     """
     Class representing a received text message.
 
     A text message can be a public message(msg_type=1)
     or a private message(msg_type=2).
     """
+    __slots__ = ('_text', '_event', '_msg_type', '_ts')
 
     def __init__(self, event_data):
         """
@@ -82,10 +83,11 @@ class TextMessage:
         return self._text
 
 
-class YoutubeMessage:
+class YoutubeMessage(object):
     """
     Class representing a received youtube message.
     """
+    __slots__ = ('_item', '_req', '_ts')
 
     def __init__(self, youtube_data):
         """
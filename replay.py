@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+"""
+The MIT License (MIT)
+
+Copyright (c) 2019 Nortxort
+
+Permission is hereby granted, free of charge, to any person obtaining a
+copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the
+Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+"""
+
+import os
+import sys
+import time
+import argparse
+import cProfile
+import pstats
+
+import bot
+import tinychat
+from util import recorder
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Replay a websocket frame recording, without a network connection.')
+    parser.add_argument('recording', help='the recording file (.jsonl) to replay.')
+    parser.add_argument('-r', '--room', default='replay',
+                        help='the room name to use for the client.')
+    parser.add_argument('--realtime', action='store_true',
+                        help='replay at the pace the frames was recorded at.')
+    parser.add_argument('--client', action='store_true',
+                        help='replay to tinychat.Client instead of bot.NortBot')
+    parser.add_argument('--quiet', action='store_true',
+                        help='do not write the console output.')
+    parser.add_argument('--profile', action='store_true',
+                        help='profile the replay and show the stats.')
+    args = parser.parse_args()
+
+    frames = recorder.read_recording(args.recording)
+
+    if args.client:
+        client = tinychat.Client(args.room, nick='replay', record_frames=False)
+    else:
+        client = bot.NortBot(args.room, nick='replay', record_frames=False)
+
+    stdout = sys.stdout
+    if args.quiet:
+        sys.stdout = open(os.devnull, 'w')
+
+    profiler = None
+    if args.profile:
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    result = recorder.replay(client, frames, realtime=args.realtime)
+    drain_time = 0
+    if not args.client:
+        # wait for the handlers running in the executors
+        ts = time.time()
+        client.executors.wait_completion()
+        drain_time = time.time() - ts
+
+    if profiler is not None:
+        profiler.disable()
+
+    if args.quiet:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+    print('Replayed %s frames in %.3f seconds (%.0f frames/sec)' %
+          (result['frames'], result['elapsed'], result['fps']))
+    if not args.client:
+        print('Executors drained in %.3f seconds' % drain_time)
+
+    if profiler is not None:
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(30)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,353 @@
+# -*- coding: utf-8 -*-
+
+"""
+The MIT License (MIT)
+
+Copyright (c) 2019 Nortxort
+
+Permission is hereby granted, free of charge, to any person obtaining a
+copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the
+Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+"""
+
+import os
+import sys
+import time
+import Queue
+import logging
+import argparse
+import multiprocessing
+
+import config
+from util import Reactor
+
+
+log = logging.getLogger(__name__)
+
+# seconds a worker must have run, for
+# it's crash backoff to be reset.
+STABLE_TIME = 60
+# the max seconds to wait before restarting a worker.
+MAX_BACKOFF = 60
+
+
+def read_rooms(file_name):
+    """
+    Read the rooms file.
+
+    The file has one room per line, optionally followed
+    by the nick to use in that room. Empty lines and lines
+    starting with # are ignored.
+
+    :param file_name: The rooms file.
+    :type file_name: str
+    :return: A list of tuple(room, nick)
+    :rtype: list
+    """
+    rooms = []
+    with open(file_name) as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                parts = line.split()
+                nick = parts[1] if len(parts) > 1 else config.NICK
+                rooms.append((parts[0], nick))
+
+    return rooms
+
+
+def worker(worker_id, rooms, status_queue, interval, quiet):
+    """
+    A worker process running a NortBot for each of it's rooms.
+
+    All the rooms of the worker are served by a single reactor,
+    the worker reports the room stats to the supervisor every interval.
+
+    :param worker_id: The ID of the worker.
+    :type worker_id: int
+    :param rooms: A list of tuple(room, nick)
+    :type rooms: list
+    :param status_queue: The queue to report to.
+    :type status_queue: multiprocessing.Queue
+    :param interval: Seconds between reports.
+    :type interval: int | float
+    :param quiet: Do not write the console output of the rooms.
+    :type quiet: bool
+    """
+    if quiet:
+        sys.stdout = open(os.devnull, 'w')
+
+    # imported after the fork, so the executors and the
+    # scheduler of the bots are created in this process
+    import bot
+
+    reactor = Reactor()
+    bots = []
+    try:
+        for room, nick in rooms:
+            client = bot.NortBot(room, nick=nick,
+                                 account=bot.CONF.ACCOUNT,
+                                 password=bot.CONF.PASSWORD,
+                                 reactor=reactor)
+            if client.account is not None and client.password is not None:
+                client.login()
+
+            client.connect()
+            bots.append(client)
+
+        while True:
+            report = {}
+            for client in bots:
+                report[client.room] = client.stats()
+
+            status_queue.put((worker_id, os.getpid(), report))
+            time.sleep(interval)
+
+    except KeyboardInterrupt:
+        pass
+
+
+class Supervisor:
+    """
+    Shards rooms across worker processes, one per core.
+
+    Every worker has it's own interpreter, so a join storm
+    in one room does not hold the GIL of rooms in other workers.
+    Crashed workers are restarted with an exponential backoff.
+    """
+
+    def __init__(self, rooms, workers=None, interval=5, quiet=True):
+        """
+        Initialize the supervisor.
+
+        :param rooms: A list of tuple(room, nick)
+        :type rooms: list
+        :param workers: The amount of worker processes,
+        defaults to the amount of cores.
+        :type workers: int | None
+        :param interval: Seconds between worker reports.
+        :type interval: int | float
+        :param quiet: Do not write the console output of the rooms.
+        :type quiet: bool
+        """
+        if workers is None:
+            workers = multiprocessing.cpu_count()
+
+        self.interval = interval
+        self.quiet = quiet
+        # round robin sharding, empty shards are left out
+        self.shards = [rooms[i::workers] for i in range(workers)
+                       if len(rooms[i::workers]) > 0]
+
+        self._status_queue = multiprocessing.Queue()
+        self._processes = {}
+        self._started = {}
+        self._crashes = {}
+        self._restart_at = {}
+        self._restarts = 0
+        # room -> (worker id, pid, time, stats)
+        self._rooms = {}
+
+    @property
+    def rooms(self):
+        """
+        The latest reported stats of every room.
+
+        :return: A dictionary where the key is the room and the
+        value is a tuple(worker id, pid, report time, stats)
+        :rtype: dict
+        """
+        return self._rooms
+
+    def start(self):
+        """
+        Start all the workers.
+        """
+        for worker_id in range(len(self.shards)):
+            self._spawn(worker_id)
+
+    def stop(self):
+        """
+        Stop all the workers.
+        """
+        for process in self._processes.values():
+            if process.is_alive():
+                process.terminate()
+
+    def run(self):
+        """
+        Supervise the workers until interrupted.
+        """
+        self.start()
+        next_print = time.time() + self.interval
+        try:
+            while True:
+                self._collect(timeout=1)
+                self._check_workers()
+
+                if time.time() >= next_print:
+                    next_print = time.time() + self.interval
+                    print(self.formatted())
+
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def health(self, room):
+        """
+        The health of a room.
+
+        :param room: The room name.
+        :type room: str
+        :return: `up` if connected, `down` if not connected,
+        `stale` if the worker has not reported in time.
+        :rtype: str
+        """
+        _, _, ts, stats = self._rooms[room]
+        if time.time() - ts > self.interval * 3:
+            return 'stale'
+        if stats['connected']:
+            return 'up'
+        return 'down'
+
+    def formatted(self):
+        """
+        Format the room stats as a table.
+
+        :return: The table with a totals line.
+        :rtype: str
+        """
+        header = ('room', 'worker', 'pid', 'health', 'users',
+                  'banned', 'received', 'sent', 'dropped', 'queue')
+        row = '%-20s %6s %7s %6s %6s %6s %9s %8s %7s %5s'
+        lines = [row % header]
+
+        totals = dict(users=0, banned=0, received=0, sent=0,
+                      dropped=0, send_queue=0, up=0)
+        for room in sorted(self._rooms):
+            worker_id, pid, _, stats = self._rooms[room]
+            health = self.health(room)
+            lines.append(row % (room[:20], worker_id, pid, health,
+                                stats['users'], stats['banned'],
+                                stats['received'], stats['sent'],
+                                stats['dropped'], stats['send_queue']))
+            for key in totals:
+                if key in stats:
+                    totals[key] += stats[key]
+            if health == 'up':
+                totals['up'] += 1
+
+        lines.append('rooms up: %s/%s, workers: %s, restarts: %s, users: %s, '
+                     'received: %s, sent: %s, dropped: %s' %
+                     (totals['up'], sum(len(shard) for shard in self.shards),
+                      len(self.shards), self._restarts,
+                      totals['users'], totals['received'], totals['sent'],
+                      totals['dropped']))
+
+        return '\n'.join(lines)
+
+    def _spawn(self, worker_id):
+        process = multiprocessing.Process(
+            target=worker,
+            args=(worker_id, self.shards[worker_id], self._status_queue,
+                  self.interval, self.quiet))
+        process.daemon = True
+        process.start()
+
+        log.info('started worker %s (pid %s) with %s room(s)' %
+                 (worker_id, process.pid, len(self.shards[worker_id])))
+        self._processes[worker_id] = process
+        self._started[worker_id] = time.time()
+        self._restart_at.pop(worker_id, None)
+
+    def _collect(self, timeout):
+        # read the worker reports
+        try:
+            report = self._status_queue.get(timeout=timeout)
+            while True:
+                worker_id, pid, rooms = report
+                ts = time.time()
+                for room, stats in rooms.items():
+                    self._rooms[room] = (worker_id, pid, ts, stats)
+
+                report = self._status_queue.get_nowait()
+        except Queue.Empty:
+            pass
+
+    def _check_workers(self):
+        now = time.time()
+        for worker_id, process in self._processes.items():
+            if process.is_alive():
+                continue
+
+            if worker_id not in self._restart_at:
+                if now - self._started[worker_id] > STABLE_TIME:
+                    self._crashes[worker_id] = 0
+
+                crashes = self._crashes.get(worker_id, 0) + 1
+                self._crashes[worker_id] = crashes
+                delay = min(2 ** (crashes - 1), MAX_BACKOFF)
+                self._restart_at[worker_id] = now + delay
+                self._restarts += 1
+
+                log.warning('worker %s (pid %s) exited with code %s, '
+                            'restarting in %s seconds' %
+                            (worker_id, process.pid, process.exitcode, delay))
+                print('worker %s (pid %s) exited with code %s, '
+                      'restarting in %s seconds' %
+                      (worker_id, process.pid, process.exitcode, delay))
+
+            elif now >= self._restart_at[worker_id]:
+                self._spawn(worker_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Run a NortBot in many rooms, sharded across processes.')
+    parser.add_argument('rooms', help='file with one room per line, '
+                                      'optionally followed by a nick.')
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help='the amount of worker processes '
+                             '(default: one per core).')
+    parser.add_argument('-i', '--interval', type=float, default=5,
+                        help='seconds between stats reports.')
+    parser.add_argument('--verbose', action='store_true',
+                        help='write the console output of the rooms.')
+    args = parser.parse_args()
+
+    if config.DEBUG_TO_FILE:
+        fmt = '%(asctime)s : %(levelname)s : %(processName)s : %(filename)s : ' \
+              '%(lineno)d : %(funcName)s() : %(name)s : %(message)s'
+        logging.basicConfig(filename=config.DEBUG_FILE_NAME,
+                            level=config.DEBUG_LEVEL, format=fmt)
+
+    rooms = read_rooms(args.rooms)
+    if len(rooms) == 0:
+        print('no rooms in %s' % args.rooms)
+        sys.exit(1)
+
+    supervisor = Supervisor(rooms, workers=args.workers,
+                            interval=args.interval, quiet=not args.verbose)
+    print('Starting %s room(s) in %s worker(s)' %
+          (len(rooms), len(supervisor.shards)))
+    supervisor.run()
+
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+    main()
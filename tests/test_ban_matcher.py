@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+
+"""
+The MIT License (MIT)
+
+Copyright (c) 2019 Nortxort
+
+Permission is hereby granted, free of charge, to any person obtaining a
+copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the
+Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from util.ban_matcher import NickBans, StringBans
+
+
+class StringBansTest(unittest.TestCase):
+
+    def test_contains_and_word(self):
+        bans = StringBans(['*spam', 'bad'])
+        self.assertEqual(bans.match('buy spammy things'), '*spam')
+        self.assertEqual(bans.match('so bad here'), 'bad')
+        self.assertIsNone(bans.match('badly done'))
+
+    def test_lone_star_matches_every_message(self):
+        bans = StringBans(['*', 'bad'])
+        self.assertEqual(bans.match('hello'), '*')
+        self.assertEqual(bans.match(''), '*')
+
+    def test_equal_to_read_list(self):
+        # get_list only compiles a new StringBans if the read list differs
+        bans = StringBans(['*spam', 'bad'])
+        self.assertEqual(frozenset(['bad', '*spam']), bans)
+        self.assertNotEqual(frozenset(['bad']), bans)
+
+
+
+class NickBansTest(unittest.TestCase):
+
+    def test_equal_to_read_list(self):
+        # get_list only compiles a new NickBans if the read list differs
+        bans = NickBans(['*guest', 'troll'])
+        self.assertEqual(frozenset(['troll', '*guest']), bans)
+        self.assertNotEqual(frozenset(['troll']), bans)
+        self.assertEqual(bans.match('guest-123'), '*guest')
+
+
+if __name__ == '__main__':
+    unittest.main()
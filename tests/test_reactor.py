@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+"""
+The MIT License (MIT)
+
+Copyright (c) 2019 Nortxort
+
+Permission is hereby granted, free of charge, to any person obtaining a
+copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the
+Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+"""
+
+import os
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from util.reactor import Reactor
+from util.sender import Sender
+
+
+class ReactorTest(unittest.TestCase):
+
+    def test_wakeup_from_many_threads(self):
+        # payloads queued while the reactor drains the wakeup socket
+        # must still wake it up, not wait for the poll timeout
+        reactor = Reactor()
+        sender = Sender(lambda payload, request=None: payload['written'].set(),
+                        rate=100000, burst=1000, threaded=False,
+                        on_put=reactor.wakeup)
+        reactor.add_sender(sender)
+        slow = []
+
+        def loop():
+            for _ in range(300):
+                written = threading.Event()
+                sender.put({'tc': 'msg', 'written': written})
+                # the poll timeout of the reactor is 1 second
+                if not written.wait(0.5):
+                    slow.append(reactor._woken)
+                    return
+
+        threads = [threading.Thread(target=loop) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(slow, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+"""
+The MIT License (MIT)
+
+Copyright (c) 2019 Nortxort
+
+Permission is hereby granted, free of charge, to any person obtaining a
+copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the
+Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+"""
+
+import os
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from util.scheduler import Scheduler
+
+
+class SchedulerTest(unittest.TestCase):
+
+    def test_call_later_from_many_threads(self):
+        # calls added while the scheduler thread drains the wakeup
+        # socket must still wake it up, or it sleeps forever
+        scheduler = Scheduler()
+        failed = []
+
+        def loop():
+            for _ in range(500):
+                event = threading.Event()
+                scheduler.call_later(0, event.set)
+                if not event.wait(2):
+                    failed.append(scheduler.stats())
+                    return
+
+        threads = [threading.Thread(target=loop) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(failed, [])
+        self.assertEqual(len(scheduler), 0)
+
+    def test_call_later_after_idle(self):
+        scheduler = Scheduler()
+        event = threading.Event()
+        scheduler.call_later(0.05, event.set)
+        self.assertTrue(event.wait(2))
+
+    def test_cancel(self):
+        scheduler = Scheduler()
+        event = threading.Event()
+        handle = scheduler.call_later(0.05, event.set)
+        self.assertTrue(handle.cancel())
+        self.assertFalse(event.wait(0.2))
+        self.assertFalse(handle.cancel())
+
+
+if __name__ == '__main__':
+    unittest.main()
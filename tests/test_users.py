@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+"""
+The MIT License (MIT)
+
+Copyright (c) 2019 Nortxort
+
+Permission is hereby granted, free of charge, to any person obtaining a
+copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the
+Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+"""
+
+import os
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from users import Users
+
+
+def ban_info(ban_id, nick):
+    return {'id': ban_id, 'nick': nick, 'username': None, 'moderator': 'mod'}
+
+
+class BanlistTest(unittest.TestCase):
+
+    def test_ban_events_while_loading_the_cache(self):
+        # bans arriving while the cached banlist is loaded
+        # must be in the banlist and all of it's indexes
+        users = Users()
+        cached = [ban_info(ban_id, 'cached%d' % ban_id)
+                  for ban_id in range(1, 30001)]
+        added = [ban_info(ban_id, 'added%d' % ban_id)
+                 for ban_id in range(30001, 32001)]
+
+        loader = threading.Thread(target=users.load_banlist, args=(cached,))
+        loader.start()
+        for info in added:
+            users.add_banned_user(info)
+        loader.join()
+
+        self.assertEqual(len(users.banlist), len(cached) + len(added))
+        self.assertEqual(users.last_banned.ban_id, 32000)
+        self.assertEqual(len(users.search_banlist_containing('added')),
+                         len(added))
+        for info in added[::100]:
+            self.assertEqual(users.search_banlist_by_nick(info['nick']).ban_id,
+                             info['id'])
+
+    def test_load_then_reconcile(self):
+        users = Users()
+        users.load_banlist([ban_info(1, 'one'), ban_info(2, 'two')])
+        added, removed = users.reconcile_banlist([ban_info(2, 'two'),
+                                                  ban_info(3, 'three')])
+        self.assertEqual([banned.ban_id for banned in added], [3])
+        self.assertEqual([banned.ban_id for banned in removed], [1])
+        self.assertEqual(users.last_banned.ban_id, 3)
+        self.assertEqual(users.search_banlist_containing('one'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -24,8 +24,12 @@ FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 DEALINGS IN THE SOFTWARE.
 """
 
+import os
 import json
+import time
+import random
 import logging
+import threading
 
 import websocket
 import config
@@ -34,7 +38,9 @@ from page import Account
 from apis import TinychatApi
 from room import RoomState
 from _process_event import ProcessEvent
-from util import string_util, Console, Color, captcha, thread_task
+from util import string_util, Console, Color, captcha, thread_task, \
+    FrameRecorder, Sender, Request, PendingRequests, Histograms, \
+    BanlistCache, ThreadPool, TaskProfiler, worker, get_scheduler
 
 
 log = logging.getLogger(__name__)
@@ -44,6 +50,77 @@ log = logging.getLogger(__name__)
 # access it through tinychat
 CONF = config
 
+TinychatApi.base_url = config.TINYCHAT_URL
+
+# seconds a prefetched connect token is used for.
+CONNECT_TOKEN_TTL = 60
+# seconds to wait for the server to acknowledge a request.
+REQUEST_TIMEOUT = 10
+# the events the server responds to with the req id of the payload,
+# others such as msg, pvtmsg and kick are never acknowledged.
+ACKED_EVENTS = frozenset([
+    'join', 'ban', 'unban', 'banlist', 'stream_moder_close',
+    'stream_moder_allow', 'yut_play', 'yut_pause', 'yut_stop'
+])
+# seconds to wait before saving a changed banlist,
+# so a burst of bans is saved only once.
+BANLIST_SAVE_DELAY = 5
+# new bans of a banlist event written to console one by one,
+# above this only the summary is written.
+BANLIST_CONSOLE_MAX = 10
+
+
+# the executors and task profiler of the process, see get_executors
+_executors = None
+_profiler = None
+_executors_pid = None
+_executors_lock = threading.Lock()
+
+
+def _create_executors():
+    profiler = TaskProfiler()
+    executors = worker.Executors(**{
+        worker.MODERATION: ThreadPool(CONF.THREAD_POOL,
+                                      max_queue=CONF.THREAD_POOL_QUEUE,
+                                      overflow=CONF.THREAD_POOL_OVERFLOW,
+                                      max_threads=CONF.THREAD_POOL_MAX,
+                                      target_wait=CONF.THREAD_POOL_TARGET_WAIT / 1000.0,
+                                      cooldown=CONF.THREAD_POOL_COOLDOWN,
+                                      profiler=profiler),
+        worker.API: ThreadPool(CONF.API_THREAD_POOL,
+                               max_queue=CONF.API_THREAD_POOL_QUEUE,
+                               max_threads=CONF.API_THREAD_POOL_MAX,
+                               target_wait=CONF.THREAD_POOL_TARGET_WAIT / 1000.0,
+                               cooldown=CONF.THREAD_POOL_COOLDOWN,
+                               profiler=profiler),
+        worker.HOUSEKEEPING: ThreadPool(CONF.HOUSEKEEPING_THREAD_POOL,
+                                        max_queue=CONF.THREAD_POOL_QUEUE,
+                                        overflow=CONF.THREAD_POOL_OVERFLOW,
+                                        profiler=profiler)
+    })
+    return executors, profiler
+
+
+def get_executors():
+    """
+    The executors shared by all bots in the process, created on first use.
+
+    Sharing them keeps the amount of threads from growing with the
+    rooms. They are created per process, since a forked process
+    inherits the pools, but not the threads running their tasks.
+
+    :return: A tuple of (executors, task profiler)
+    :rtype: tuple
+    """
+    global _executors, _profiler, _executors_pid
+    pid = os.getpid()
+    if _executors_pid != pid:
+        with _executors_lock:
+            if _executors_pid != pid:
+                _executors, _profiler = _create_executors()
+                _executors_pid = pid
+    return _executors, _profiler
+
 
 class ClientBaseError(Exception):
     pass
@@ -71,16 +148,59 @@ class Client:
 
         self.proxy = kwargs.get('proxy', None)
 
-        self.users = Users()
+        self.users = Users(max_messages=config.USER_MESSAGE_HISTORY,
+                           max_nicks=config.USER_NICK_HISTORY)
         self.state = RoomState()
         self.console = Console(self.room,
                                log_path=config.CONFIG_PATH,
                                chat_logging=config.CHAT_LOGGING,
                                use_colors=config.CONSOLE_COLORS)
         self._connect_args = None
+        # tuple(fetch time, connect args)
+        self._prefetched = None
+        self._is_prefetching = False
+        self._is_opened = False
+        self._is_reconnecting = False
         self._ws = None
         self._is_connected = False
         self._req = 1
+        self._received = 0
+        self._pending = PendingRequests()
+        # processing time by `event.<event>` and `command.<command>`
+        self.timings = Histograms()
+        self._recorder = None
+        # if a reactor is given, the connection and the
+        # sender are served by the reactor thread
+        self._reactor = kwargs.get('reactor')
+        if self._reactor is None:
+            self._sender = Sender(self._write,
+                                  rate=config.SEND_RATE,
+                                  burst=config.SEND_BURST,
+                                  max_size=config.SEND_QUEUE_SIZE)
+        else:
+            self._sender = Sender(self._write,
+                                  rate=config.SEND_RATE,
+                                  burst=config.SEND_BURST,
+                                  max_size=config.SEND_QUEUE_SIZE,
+                                  threaded=False,
+                                  on_put=self._reactor.wakeup)
+            self._reactor.add_sender(self._sender)
+
+        self._banlist_cache = None
+        self._banlist_save = None
+        if config.BANLIST_CACHE:
+            self._banlist_cache = BanlistCache(
+                config.CONFIG_PATH + self.room + '/',
+                config.BANLIST_CACHE_FILE_NAME)
+
+        if kwargs.get('record_frames', config.RECORD_FRAMES):
+            self._recorder = FrameRecorder(
+                config.CONFIG_PATH + self.room + '/recordings/', self.room)
+
+        # event -> (processor, bound handler)
+        self._handlers = {event: (processor, getattr(self, name))
+                          for event, (processor, name)
+                          in self.event_registry().items()}
 
         captcha.MAX_TRIES = kwargs.get('captcha_tries', 11)
         captcha.CAPTCHA_TIMEOUT = kwargs.get('captcha_timeout', 5)
@@ -88,6 +208,24 @@ class Client:
         if self.nick is None or self.nick == '':
             self.nick = string_util.create_random_string(3, 20)
 
+    @property
+    def executors(self):
+        """
+        The executors of the process, shared by all bots in it.
+
+        :rtype: worker.Executors
+        """
+        return get_executors()[0]
+
+    @property
+    def profiler(self):
+        """
+        The profile of the tasks run by the executors of the process.
+
+        :rtype: TaskProfiler
+        """
+        return get_executors()[1]
+
     @property
     def connected(self):
         """
@@ -95,6 +233,46 @@ class Client:
         """
         return self._is_connected
 
+    @property
+    def sender(self):
+        """
+        The outbound message sender.
+
+        :return: The Sender, this can be used for send queue metrics.
+        :rtype: Sender
+        """
+        return self._sender
+
+    def stats(self):
+        """
+        Returns the health and counters of the client.
+
+        :return: A dictionary of counters.
+        :rtype: dict
+        """
+        sender = self._sender.stats()
+        return {
+            'connected': self.connected,
+            'users': len(self.users.all),
+            'banned': len(self.users.banlist),
+            'received': self._received,
+            'sent': sender['sent'],
+            'dropped': sender['dropped'],
+            'send_queue': sender['depth'],
+            'pending': len(self._pending)
+        }
+
+    def request_stats(self):
+        """
+        Returns the round trip latency of the requests, per event.
+
+        :return: A dictionary where the key is the event and the
+        value is a dictionary of count, mean, p50, p95, p99, max
+        and timeouts. Latencies are in seconds.
+        :rtype: dict
+        """
+        return self._pending.stats()
+
     @property
     def page_url(self):
         """
@@ -132,6 +310,9 @@ class Client:
     def connect(self):
         """
         Connect to the websocket server.
+
+        NOTE: Without a reactor this blocks until the connection
+        is closed. With a reactor it returns once connected.
         """
         if not string_util.is_valid_string(self.room):
             raise InvalidRoomNameError(
@@ -148,9 +329,16 @@ class Client:
 
             websocket.enableTrace(config.DEBUG_MODE)
 
-            self._connect_args = TinychatApi.connect_token(self.room)
+            self._connect_args = self._connect_token()
             if self._connect_args is not None:
 
+                if self._recorder is not None:
+                    self._recorder.start()
+
+                if self._reactor is not None:
+                    self._connect_reactor(tc_header)
+                    return
+
                 self._ws = websocket.WebSocketApp(
                     self._connect_args['endpoint'],
                     header=tc_header,
@@ -168,30 +356,161 @@ class Client:
             else:
                 log.info('missing connect args %s' % self._connect_args)
 
-    def disconnect(self):
+    def _connect_reactor(self, tc_header):
+        # do the handshake here, and let the
+        # reactor read from the connection
+        try:
+            self._ws = websocket.create_connection(
+                self._connect_args['endpoint'],
+                header=tc_header,
+                origin='https://tinychat.com',
+                enable_multithread=True
+            )
+        except Exception as e:
+            log.error('failed to connect: %s' % e)
+            self.error('connect', e)
+        else:
+            self._reactor.add(self._ws, self.on_message,
+                              self.on_close, self.on_error)
+            self.on_open()
+
+    def disconnect(self, keep_state=False):
         """
         Disconnect from the websocket server
+
+        :param keep_state: Keep the users and banlist
+        as stale state, to be reconciled on the next connect.
+        :type keep_state: bool
         """
         log.info('disconnecting from server')
         if self._ws is not None:
+            if self._reactor is not None:
+                self._reactor.remove(self._ws)
             self._ws.close(timeout=0)
 
+        if self._recorder is not None:
+            self._recorder.stop()
+
+        self._sender.clear()
+        self._pending.clear()
         self._req = 1
         self._ws = None
-        self.users.clear()
-        self.users.clear_banlist()
+        # without a reactor, on_close does this, but the reactor
+        # does not call on_close for a removed connection
+        self._is_connected = False
+        if keep_state:
+            self.users.mark_stale()
+        else:
+            self.users.clear()
+            self.users.clear_banlist()
 
-    def reconnect(self):
+    def reconnect(self, resume=True):
         """
         Reconnect to the server.
+
+        The first attempt is made right away, failed attempts
+        are retried with an exponential backoff with jitter.
+
+        NOTE: This is called from the receive thread or the reactor
+        thread, so the attempts are made in a thread of their own.
+
+        :param resume: Keep the users and banlist, and reconcile
+        them against the userlist and banlist of the new connection.
+        :type resume: bool
         """
-        log.info('reconnecting')
-        if self.connected:  # this check might not be needed anymore
-            self.disconnect()
+        if self._is_reconnecting:
+            log.info('already reconnecting')
+        else:
+            self._is_reconnecting = True
+            thread_task(self._reconnect, resume)
+
+    def _reconnect(self, resume):
+        # without a reactor, connect blocks while connected,
+        # so on_open ends the reconnect, not this method
+        log.info('reconnecting, resume=%s' % resume)
+        try:
+            self._reconnect_attempts(resume)
+        except Exception:
+            self._is_reconnecting = False
+            raise
+
+    def _reconnect_attempts(self, resume):
+        if self._ws is not None:
+            self.disconnect(keep_state=resume)
+        elif resume:
+            self.users.mark_stale()
+
+        for attempt in range(config.RECONNECT_TRIES):
+            delay = self._backoff(attempt)
+            if delay > 0:
+                self.console.write('Reconnect attempt %s in %.1f seconds.' %
+                                   (attempt + 1, delay), Color.B_RED)
+                time.sleep(delay)
+
+            self._is_opened = False
+            self.login()
+            self.connect()
+            if self._is_opened:
+                break
+        else:
+            self._is_reconnecting = False
+            self.console.write('Failed to reconnect after %s attempts.' %
+                               config.RECONNECT_TRIES, Color.B_RED)
+
+    @staticmethod
+    def _backoff(attempt):
+        # no delay for the first attempt, then an
+        # exponential delay of which half is jitter
+        if attempt == 0:
+            return 0
+        delay = min(2 ** (attempt - 1), config.RECONNECT_MAX_DELAY)
+        return delay / 2.0 + random.uniform(0, delay / 2.0)
+
+    def _connect_token(self):
+        # use the prefetched connect token if it's still fresh
+        prefetched = self._prefetched
+        self._prefetched = None
+        if prefetched is not None:
+            ts, connect_args = prefetched
+            if time.time() - ts < CONNECT_TOKEN_TTL:
+                log.debug('using prefetched connect token')
+                return connect_args
+
+        return TinychatApi.connect_token(self.room)
+
+    def _prefetch_token(self):
+        try:
+            connect_args = TinychatApi.connect_token(self.room)
+            if connect_args is not None:
+                self._prefetched = (time.time(), connect_args)
+        finally:
+            self._is_prefetching = False
+
+    # Event Registry.
+    @classmethod
+    def event_registry(cls):
+        """
+        Returns the event registry of the client class.
+
+        The registry maps an event to it's processor and
+        the name of the `on_` method handling the event.
+        It is only build once for every (sub)class.
+
+        :return: A dictionary where the key is the event
+        and the value is a tuple(processor, method name).
+        :rtype: dict
+        """
+        registry = cls.__dict__.get('_event_registry')
+        if registry is None:
+            registry = {}
+            for name in dir(cls):
+                if name.startswith('on_'):
+                    event = name[3:]
+                    registry[event] = (ProcessEvent.processor(event), name)
+
+            cls._event_registry = registry
 
-        # maybe add a timeout here
-        self.login()
-        self.connect()
+        return registry
 
     # Event Dispatcher.
     def dispatch(self, event, event_data):
@@ -203,16 +522,18 @@ class Client:
         :param event_data: The event data.
         :type event_data: dict
         """
-        log.debug('dispatching event: %s' % event)
-        method = 'on_%s' % event
-
-        if hasattr(self, method):
-            ProcessEvent(self, event, method, event_data).process()
-        else:
+        log.debug('dispatching event: %s', event)
+        try:
+            processor, handler = self._handlers[event]
+        except KeyError:
             e = 'no event handler for `%s`' % event
             log.info(e)
             if config.DEBUG_MODE:
                 self.console.write(e, Color.B_RED)
+        else:
+            ts = time.time()
+            processor(self, handler, event, event_data)
+            self.timings.add('event.' + event, time.time() - ts)
 
     # Method Caller.
     def run_method(self, method, *args, **kwargs):
@@ -281,6 +602,8 @@ class Client:
         """
         log.info('websocket connection connected.')
         self._is_connected = True
+        self._is_opened = True
+        self._is_reconnecting = False
         self._join()
 
     def on_message(self, message):
@@ -291,16 +614,29 @@ class Client:
         :type message: str
         """
         if message:
+            ts = time.time()
+            self._received += 1
+            if self._recorder is not None:
+                self._recorder.record(message)
+
             json_data = json.loads(message)
 
-            log.debug('[RAW DATA] %s' % json_data)
+            log.debug('[RAW DATA] %s', json_data)
             event = json_data['tc']
 
+            # the server echoes the req id of the request it responds to
+            req = json_data.get('req')
+            if req is not None:
+                self._pending.resolve(req, json_data)
+            self._pending.expire()
+
             if event == 'ping':
                 self.on_ping()
             else:
                 self.dispatch(event, json_data)
 
+            self.timings.add('message', time.time() - ts)
+
     # Application Events.
     def on_ping(self):
         """
@@ -308,6 +644,14 @@ class Client:
         """
         self.send_pong()
 
+        # keep a fresh connect token around for a fast reconnect
+        if not self._is_prefetching:
+            prefetched = self._prefetched
+            if prefetched is None or \
+                    time.time() - prefetched[0] > CONNECT_TOKEN_TTL / 2:
+                self._is_prefetching = True
+                thread_task(self._prefetch_token)
+
     def on_closed(self, data):
         """
         Received when ever the connection gets closed
@@ -316,6 +660,9 @@ class Client:
         :param data: The close data.
         :type data: dict
         """
+        # is connected is False in any of these cases, set before
+        # a reconnect might have connected again in its thread
+        self._is_connected = False
         code = data.get('error')
         if code == 0:
             self.console.write('There is no internet connection.',
@@ -361,8 +708,6 @@ class Client:
         else:
             self.console.write('Connection was closed, code: %s' % code,
                                Color.B_RED)
-        # is connected is False in any of these cases
-        self._is_connected = False
 
     def on_joined(self, data):
         """
@@ -446,9 +791,10 @@ class Client:
         :type user: Users.User
         """
         if user.account:
-            tc_info = TinychatApi.user_info(user.account)
-            if tc_info is not None:
-                self.users.add_tc_info(user.handle, tc_info)
+            # not on the thread receiving the events
+            self.executors[worker.API].submit(
+                self._add_tc_info, args=(user,),
+                timeout=config.COMMAND_TIMEOUT)
 
             if user.is_owner:
                 self.console.write('Owner joined: %s:%s:%s' %
@@ -466,6 +812,11 @@ class Client:
             self.console.write('Guest joined: %s:%s' %
                                (user.nick, user.handle), Color.B_YELLOW)
 
+    def _add_tc_info(self, user):
+        tc_info = TinychatApi.user_info(user.account)
+        if tc_info is not None:
+            self.users.add_tc_info(user.handle, tc_info)
+
     def on_nick(self, user):   # P
         """
         Received when a user changes nick name.
@@ -519,18 +870,25 @@ class Client:
         """
         Received when a request for the ban list has been made.
 
+        When the banlist was loaded from the cache, or resumed
+        after a reconnect, only the new bans are in the list.
+
         :param banlist: A list of BannedUser objects.
         :type banlist: list
         """
-        for banned in banlist:
-            if banned.account is not None:
-                self.console.write('Nick: %s, Account: %s, Banned By: %s' %
-                                   (banned.nick, banned.account,
-                                    banned.banned_by), Color.B_RED)
-            else:
-                self.console.write('Nick: %s, Banned By: %s' %
-                                   (banned.nick, banned.banned_by),
-                                   Color.B_RED)
+        if len(banlist) <= BANLIST_CONSOLE_MAX:
+            for banned in banlist:
+                if banned.account is not None:
+                    self.console.write('Nick: %s, Account: %s, Banned By: %s' %
+                                       (banned.nick, banned.account,
+                                        banned.banned_by), Color.B_RED)
+                else:
+                    self.console.write('Nick: %s, Banned By: %s' %
+                                       (banned.nick, banned.banned_by),
+                                       Color.B_RED)
+
+        self.console.write('Banlist: %s new, %s banned in total.' %
+                           (len(banlist), len(self.users.banlist)), Color.B_RED)
 
     def on_msg(self, user, msg):  # P
         """
@@ -588,7 +946,8 @@ class Client:
         text = msg.get('text')
 
         if 'banned' in text and self.users.client.is_mod:
-            self.users.clear_banlist()
+            # reconcile the next banlist against the current
+            self.users.mark_banlist_stale()
             self.send_banlist()
         elif 'green room enabled' in text:
             self.state.set_greenroom(True)
@@ -795,23 +1154,29 @@ class Client:
     def send_pong(self):
         """
         Send a response to a ping.
+
+        :return: The Request of the payload.
+        :rtype: Request | None
         """
         payload = {
             'tc': 'pong',
             'req': self._req
         }
-        self.send(payload)
+        return self.send(payload)
 
     def set_nick(self):
         """
         Send a nick message.
+
+        :return: The Request of the payload.
+        :rtype: Request | None
         """
         payload = {
             'tc': 'nick',
             'req': self._req,
             'nick': self.nick
         }
-        self.send(payload)
+        return self.send(payload)
 
     def send_chat_msg(self, msg):
         """
@@ -819,13 +1184,15 @@ class Client:
 
         :param msg: The message to send.
         :type msg: str
+        :return: The Request of the payload.
+        :rtype: Request | None
         """
         payload = {
             'tc': 'msg',
             'req': self._req,
             'text': msg
         }
-        self.send(payload)
+        return self.send(payload)
 
     def send_private_msg(self, handle, msg):
         """
@@ -835,6 +1202,8 @@ class Client:
         :type handle: int
         :param msg: The private message to send.
         :type msg: str
+        :return: The Request of the payload.
+        :rtype: Request | None
         """
         payload = {
             'tc': 'pvtmsg',
@@ -842,7 +1211,7 @@ class Client:
             'text': msg,
             'handle': handle
         }
-        self.send(payload)
+        return self.send(payload)
 
     def send_kick_msg(self, handle):
         """
@@ -850,13 +1219,15 @@ class Client:
 
         :param handle: The handle of the user to kick.
         :type handle: int
+        :return: The Request of the payload.
+        :rtype: Request | None
         """
         payload = {
             'tc': 'kick',
             'req': self._req,
             'handle': handle
         }
-        self.send(payload)
+        return self.send(payload)
 
     def send_ban_msg(self, handle):
         """
@@ -864,13 +1235,15 @@ class Client:
 
         :param handle: The handle of the user to ban.
         :type handle: int
+        :return: The Request of the payload.
+        :rtype: Request | None
         """
         payload = {
             'tc': 'ban',
             'req': self._req,
             'handle': handle
         }
-        self.send(payload)
+        return self.send(payload)
 
     def send_unban_msg(self, ban_id):
         """
@@ -878,23 +1251,54 @@ class Client:
 
         :param ban_id: The ban ID of the user to un-ban.
         :type ban_id: int
+        :return: The Request of the payload.
+        :rtype: Request | None
         """
         payload = {
             'tc': 'unban',
             'req': self._req,
             'id': ban_id
         }
-        self.send(payload)
+        return self.send(payload)
+
+    def schedule_banlist_save(self):
+        """
+        Save the banlist to the banlist cache, after a delay.
+
+        Changes made while waiting are saved together.
+        """
+        if self._banlist_cache is not None:
+            if self._banlist_save is None or not self._banlist_save.active:
+                self._banlist_save = get_scheduler().call_later(
+                    BANLIST_SAVE_DELAY, thread_task, self._save_banlist)
+
+    def _save_banlist(self):
+        ban_list = [banned.ban_info for banned in self.users.banned_users]
+        self._banlist_cache.save(ban_list)
 
     def send_banlist(self):
         """
         Send a banlist request message.
+
+        If the banlist is empty, the cached banlist
+        is loaded first, so the banlist of the server
+        only has to be reconciled against it.
+
+        :return: The Request of the payload.
+        :rtype: Request | None
         """
+        if self._banlist_cache is not None and len(self.users.banlist) == 0:
+            ban_list = self._banlist_cache.load()
+            if len(ban_list) > 0:
+                self.users.load_banlist(ban_list)
+                self.console.write('Loaded %s cached bans.' % len(ban_list),
+                                   Color.B_RED)
+
         payload = {
             'tc': 'banlist',
             'req': self._req
         }
-        self.send(payload)
+        return self.send(payload)
 
     def send_room_password_msg(self, password):
         """
@@ -902,13 +1306,15 @@ class Client:
 
         :param password: The room password.
         :type password: str
+        :return: The Request of the payload.
+        :rtype: Request | None
         """
         payload = {
             'tc': 'password',
             'req': self._req,
             'password': password
         }
-        self.send(payload)
+        return self.send(payload)
 
     def send_cam_approve_msg(self, handle):
         """
@@ -916,13 +1322,15 @@ class Client:
 
         :param handle: The handle of the user.
         :type handle: int
+        :return: The Request of the payload.
+        :rtype: Request | None
         """
         payload = {
             'tc': 'stream_moder_allow',
             'req': self._req,
             'handle': handle
         }
-        self.send(payload)
+        return self.send(payload)
 
     def send_close_user_msg(self, handle):
         """
@@ -930,13 +1338,15 @@ class Client:
 
         :param handle: The handle of the user.
         :type handle: int
+        :return: The Request of the payload.
+        :rtype: Request | None
         """
         payload = {
             'tc': 'stream_moder_close',
             'req': self._req,
             'handle': handle
         }
-        self.send(payload)
+        return self.send(payload)
 
     def send_captcha(self, token):
         """
@@ -944,24 +1354,29 @@ class Client:
 
         :param token: The captcha response token.
         :type token: str
+        :return: The Request of the payload.
+        :rtype: Request | None
         """
         payload = {
             'tc': 'captcha',
             'req': self._req,
             'token': token
         }
-        self.send(payload)
+        return self.send(payload)
 
     # Media.
     def send_yut_playlist(self):
         """
         Send a youtube playlist request.
+
+        :return: The Request of the payload.
+        :rtype: Request | None
         """
         payload = {
             'tc': 'yut_playlist',
             'req': self._req
         }
-        self.send(payload)
+        return self.send(payload)
 
     def send_yut_playlist_add(self, video_id, duration, title, image):
         """
@@ -977,6 +1392,8 @@ class Client:
         :type title: str
         :param image: The thumbnail image url of the video.
         :type image: str
+        :return: The Request of the payload.
+        :rtype: Request | None
         """
         payload = {
             'tc': 'yut_playlist_add',
@@ -988,7 +1405,7 @@ class Client:
                 'image': image
             }
         }
-        self.send(payload)
+        return self.send(payload)
 
     def send_yut_playlist_remove(self, video_id, duration, title, image):
         """
@@ -1004,6 +1421,8 @@ class Client:
         :type title: str
         :param image: The thumbnail image url of the youtube video to remove.
         :type image: str
+        :return: The Request of the payload.
+        :rtype: Request | None
         """
         payload = {
             'tc': 'yut_playlist_remove',
@@ -1015,7 +1434,7 @@ class Client:
                 'image': image
             }
         }
-        self.send(payload)
+        return self.send(payload)
 
     def send_yut_playlist_mode(self, random_=False, repeat=False):
         """
@@ -1027,6 +1446,8 @@ class Client:
         :type random_: bool
         :param repeat: Setting this to True will make the playlist repeat itself i assume.
         :type repeat: bool
+        :return: The Request of the payload.
+        :rtype: Request | None
         """
         payload = {
             'tc': 'yut_playlist_mode',
@@ -1036,7 +1457,7 @@ class Client:
                 'repeat': repeat
             }
         }
-        self.send(payload)
+        return self.send(payload)
 
     def send_yut_play(self, video_id, duration, title, offset=0):
         """
@@ -1050,6 +1471,8 @@ class Client:
         :type title: str
         :param offset: The offset seconds to start the video at in the case of doing a search.
         :type offset: int | float
+        :return: The Request of the payload.
+        :rtype: Request | None
         """
         payload = {
             'tc': 'yut_play',
@@ -1067,7 +1490,7 @@ class Client:
             payload['item']['playlist'] = False
             payload['item']['seek'] = True
 
-        self.send(payload)
+        return self.send(payload)
 
     def send_yut_pause(self, video_id, duration, offset=0):
         """
@@ -1079,6 +1502,8 @@ class Client:
         :type duration: int |float
         :param offset: The offset seconds to pause the video at in case of doing seach while in pause.
         :type offset: int |float
+        :return: The Request of the payload.
+        :rtype: Request | None
         """
         payload = {
             'tc': 'yut_pause',
@@ -1089,7 +1514,7 @@ class Client:
                 'offset': offset
             }
         }
-        self.send(payload)
+        return self.send(payload)
 
     def send_yut_stop(self, video_id, duration, offset=0):
         """
@@ -1101,6 +1526,8 @@ class Client:
         :type duration: int | float
         :param offset: The offset seconds when the youtube gets stopped.
         :type offset: int |float
+        :return: The Request of the payload.
+        :rtype: Request | None
         """
         payload = {
             'tc': 'yut_stop',
@@ -1111,19 +1538,73 @@ class Client:
                 'offset': offset
             }
         }
-        self.send(payload)
+        return self.send(payload)
 
     # Message Sender Wrap.
-    def send(self, payload):
+    def send(self, payload, priority=None, callback=None,
+             timeout=REQUEST_TIMEOUT, wait=False):
         """
         Message sender wrapper used by all methods that sends.
 
+        The payload is queued and sent by the sender thread,
+        paced and ordered by priority class.
+
+        The returned Request is resolved when the server responds
+        with the req id of the payload, it can be waited for, or a
+        callback can be used. A Request is only made for the events
+        in ACKED_EVENTS, or if a callback or wait is given, since
+        the requests of other events can only time out.
+
         :param payload: The object to send.
-        This should be an object that can be serialized to json.
-        :type payload: dict | object
+        This should be a dictionary that can be serialized to json.
+        :type payload: dict
+        :param priority: The priority class of the payload,
+        see util.sender. If None, the class is based on the event.
+        :type priority: int | None
+        :param callback: Called with the Request once it is done.
+        :type callback: function | None
+        :param timeout: Seconds to wait for the acknowledgement.
+        :type timeout: int | float
+        :param wait: Make a Request to wait for, even if
+        the event is not in ACKED_EVENTS.
+        :type wait: bool
+        :return: The Request of the payload, or None if not
+        connected, or no Request was made for the payload.
+        :rtype: Request | None
         """
         if self.connected:
+            request = None
+            if callback is not None or wait or \
+                    payload.get('tc') in ACKED_EVENTS:
+                request = Request(payload, callback=callback, timeout=timeout)
+            self._sender.put(payload, priority, request)
+            return request
+
+        return None
+
+    def _write(self, payload, request=None):
+        """
+        Write a payload to the websocket.
+
+        NOTE: This is only called from the sender thread,
+        so the req counter does not need a lock.
+
+        :param payload: The payload to write.
+        :type payload: dict
+        :param request: The request of the payload.
+        :type request: Request | None
+        """
+        if self.connected and self._ws is not None:
+            if 'req' in payload:
+                payload['req'] = self._req
+                if request is not None:
+                    self._pending.add(self._req, request)
+
             _payload = json.dumps(payload)
             self._ws.send(_payload)
             self._req += 1
-            log.debug('%s connected: %s' % (_payload, self.connected))
+            log.debug('%s connected: %s', _payload, self.connected)
+
+        elif request is not None:
+            log.debug('not connected, discarding: %s', payload)
+            request.finish('disconnected')
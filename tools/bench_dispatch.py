@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+"""
+The MIT License (MIT)
+
+Copyright (c) 2019 Nortxort
+
+Permission is hereby granted, free of charge, to any person obtaining a
+copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the
+Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+"""
+
+# Benchmark of the event dispatch of tinychat.Client.
+#
+# A mix of join/msg/nick/publish/unpublish/quit events, and some
+# events without a handler, are dispatched to a client without
+# a connection. The console output is disabled.
+#
+# Usage: python tools/bench_dispatch.py [--users 1000] [--rounds 20]
+# Use --root to run it against another checkout of the bot, to compare.
+
+import os
+import sys
+import time
+import argparse
+
+
+def frames(users):
+    """
+    The events of a round, each user joins, chats and quits.
+
+    :param users: The amount of users.
+    :type users: int
+    :return: A list of (event, event data).
+    :rtype: list
+    """
+    handles = range(2, users + 2)
+    _frames = []
+    for handle in handles:
+        _frames.append(('join', {'tc': 'join', 'handle': handle,
+                                 'nick': 'u%d' % handle, 'username': ''}))
+    for handle in handles:
+        _frames.append(('msg', {'tc': 'msg', 'handle': handle,
+                                'text': 'hello there'}))
+        _frames.append(('nick', {'tc': 'nick', 'handle': handle,
+                                 'nick': 'n%d' % handle}))
+        _frames.append(('publish', {'tc': 'publish', 'handle': handle}))
+        _frames.append(('unpublish', {'tc': 'unpublish', 'handle': handle}))
+        _frames.append(('unknown', {'tc': 'unknown'}))
+    for handle in handles:
+        _frames.append(('quit', {'tc': 'quit', 'handle': handle}))
+    return _frames
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark of the event dispatch.')
+    parser.add_argument('--root', default=os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), '..'),
+                        help='the checkout of the bot to benchmark.')
+    parser.add_argument('--users', type=int, default=1000,
+                        help='users joining, chatting and quitting per round.')
+    parser.add_argument('--rounds', type=int, default=20)
+    args = parser.parse_args()
+
+    os.chdir(args.root)
+    sys.path.insert(0, os.path.abspath(args.root))
+    import tinychat
+
+    client = tinychat.Client('benchroom', nick='bench')
+    client.console.write = lambda *a, **k: None
+    client.dispatch('joined', {'tc': 'joined', 'room': {},
+                               'self': {'handle': 1, 'nick': 'bench'}})
+
+    _frames = frames(args.users)
+    ts = time.time()
+    for _ in range(args.rounds):
+        for event, event_data in _frames:
+            client.dispatch(event, event_data)
+    elapsed = time.time() - ts
+
+    count = args.rounds * len(_frames)
+    print('%d events in %.2fs: %.0f events/sec' %
+          (count, elapsed, count / elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+
+"""
+The MIT License (MIT)
+
+Copyright (c) 2019 Nortxort
+
+Permission is hereby granted, free of charge, to any person obtaining a
+copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the
+Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+"""
+
+# Benchmark of the nick ban check on join and nick change, the
+# compiled NickBans against the loop over every nick ban it replaced.
+#
+# Half of the nick bans are exact and half are `*` bans. The nicks
+# are random, with some banned ones. Both must give the same hits.
+#
+# Usage: python tools/bench_nick_bans.py [--nicks 20000]
+# Use --root to run it against another checkout of the bot.
+
+import os
+import sys
+import time
+import random
+import argparse
+
+LETTERS = 'abcdefghijklmnopqrstuvwxyz0123456789_'
+
+
+def word(shortest, longest):
+    """
+    A random nick like word.
+
+    :rtype: str
+    """
+    return ''.join(random.choice(LETTERS)
+                   for _ in range(random.randint(shortest, longest)))
+
+
+def loop_match(nick_bans, nick):
+    """
+    The nick ban check before NickBans, from Check._nick.
+
+    :param nick_bans: The nick bans.
+    :type nick_bans: list
+    :param nick: The nick to check.
+    :type nick: str
+    :rtype: bool
+    """
+    for bad in nick_bans:
+        if bad.startswith('*'):
+            _ = bad.lstrip('*')
+            if _ in nick:
+                return True
+
+        elif bad == nick:
+            return True
+
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark of the nick ban check.')
+    parser.add_argument('--root', default=os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), '..'),
+                        help='the checkout of the bot to benchmark.')
+    parser.add_argument('--nicks', type=int, default=20000,
+                        help='random nicks to check.')
+    parser.add_argument('--bans', type=int, action='append',
+                        help='amount of nick bans, can be repeated. '
+                             'Default 100, 1000 and 10000.')
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.abspath(args.root))
+    from util.ban_matcher import NickBans
+
+    random.seed(12)
+    print('%9s %12s %12s %6s' % ('nick bans', 'loop', 'NickBans', 'hits'))
+    for count in args.bans or [100, 1000, 10000]:
+        nick_bans = list(set([word(4, 12) for _ in range(count // 2)] +
+                             ['*' + word(5, 8) for _ in range(count // 2)]))
+        nicks = [word(3, 20) for _ in range(args.nicks)]
+        nicks += [ban for ban in nick_bans if not ban.startswith('*')][:50]
+        nicks += ['xx%syy' % ban.lstrip('*')
+                  for ban in nick_bans if ban.startswith('*')][:50]
+        compiled = NickBans(nick_bans)
+
+        ts = time.time()
+        loop_hits = [loop_match(nick_bans, nick) for nick in nicks]
+        looped = (time.time() - ts) / len(nicks)
+
+        ts = time.time()
+        hits = [compiled.match(nick) is not None for nick in nicks]
+        matched = (time.time() - ts) / len(nicks)
+
+        assert hits == loop_hits
+        print('%9d %9.1f us %9.1f us %6d' %
+              (len(nick_bans), looped * 1e6, matched * 1e6, sum(hits)))
+
+
+if __name__ == '__main__':
+    main()
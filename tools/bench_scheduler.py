@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+
+"""
+The MIT License (MIT)
+
+Copyright (c) 2019 Nortxort
+
+Permission is hereby granted, free of charge, to any person obtaining a
+copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the
+Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+"""
+
+# Benchmark of util.scheduler against a threading.Timer per call.
+#
+# The cost of adding and cancelling a call, and how late the calls
+# fire, with the amount of extra threads needed for them.
+#
+# Usage: python tools/bench_scheduler.py [--timers 100000] [--fire 2000]
+# Use --root to run it against another checkout of the bot.
+
+import os
+import sys
+import random
+import argparse
+import threading
+
+
+def noop():
+    pass
+
+
+def accuracy(label, start, count, clock, histogram):
+    """
+    Start timers of 0.1-2 seconds and measure how late they fire.
+
+    :param label: The label of the report line.
+    :type label: str
+    :param start: Function starting a timer, called with
+    (delay, function, deadline).
+    :param count: The amount of timers.
+    :type count: int
+    :param clock: The clock the deadlines are on.
+    :param histogram: The histogram class to use.
+    """
+    late = histogram()
+    lock = threading.Lock()
+    done = threading.Event()
+    fired = [0]
+
+    def fire(deadline):
+        late.add(max(clock() - deadline, 1e-6))
+        with lock:
+            fired[0] += 1
+            if fired[0] == count:
+                done.set()
+
+    threads = threading.active_count()
+    peak = threads
+    for _ in range(count):
+        delay = random.uniform(0.1, 2.0)
+        start(delay, fire, clock() + delay)
+        peak = max(peak, threading.active_count())
+    done.wait(10)
+
+    summary = late.summary()
+    print('%-16s %5d timers: late p50 %.2fms p99 %.2fms max %.2fms, '
+          'threads +%d' % (label, count, summary['p50'] * 1000,
+                           summary['p99'] * 1000, summary['max'] * 1000,
+                           peak - threads))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark of the scheduler against threading.Timer.')
+    parser.add_argument('--root', default=os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), '..'),
+                        help='the checkout of the bot to benchmark.')
+    parser.add_argument('--timers', type=int, default=100000,
+                        help='scheduler calls to add and cancel.')
+    parser.add_argument('--threads', type=int, default=2000,
+                        help='threading.Timer timers to start and cancel.')
+    parser.add_argument('--fire', type=int, default=2000,
+                        help='timers to fire, for the lateness.')
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.abspath(args.root))
+    from util import scheduler
+    from util.histogram import Histogram
+
+    sched = scheduler.get_scheduler()
+    clock = scheduler.monotonic
+
+    ts = clock()
+    handles = [sched.call_later(60 + i * 1e-4, noop)
+               for i in range(args.timers)]
+    added = clock() - ts
+    ts = clock()
+    for handle in handles:
+        handle.cancel()
+    cancelled = clock() - ts
+    print('scheduler: call_later %.1fus, cancel %.1fus per timer (%d timers)' %
+          (added / args.timers * 1e6, cancelled / args.timers * 1e6,
+           args.timers))
+
+    timers = [threading.Timer(60, noop) for _ in range(args.threads)]
+    ts = clock()
+    for timer in timers:
+        timer.start()
+    started = clock() - ts
+    ts = clock()
+    for timer in timers:
+        timer.cancel()
+    for timer in timers:
+        timer.join()
+    joined = clock() - ts
+    print('threading.Timer: start %.1fus, cancel+join %.1fus per timer '
+          '(%d timers)' % (started / args.threads * 1e6,
+                           joined / args.threads * 1e6, args.threads))
+
+    def start_timer(delay, func, deadline):
+        threading.Timer(delay, func, (deadline,)).start()
+
+    accuracy('scheduler', lambda delay, func, deadline:
+             sched.call_later(delay, func, deadline),
+             args.fire, clock, Histogram)
+    accuracy('threading.Timer', start_timer, args.fire, clock, Histogram)
+    # do not wait for the timers still running
+    os._exit(0)
+
+
+if __name__ == '__main__':
+    main()
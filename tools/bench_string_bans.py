@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+"""
+The MIT License (MIT)
+
+Copyright (c) 2019 Nortxort
+
+Permission is hereby granted, free of charge, to any person obtaining a
+copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the
+Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+"""
+
+# Benchmark of the string ban check of chat messages, the compiled
+# StringBans against the loop over every string ban it replaced.
+#
+# Random word and `*` bans are checked against random messages,
+# and a few messages containing a ban. Both must give the same hits.
+#
+# Usage: python tools/bench_string_bans.py [--bans 10000] [--messages 2000]
+# Use --root to run it against another checkout of the bot.
+
+import os
+import sys
+import time
+import random
+import argparse
+
+LETTERS = 'abcdefghijklmnopqrstuvwxyz'
+
+
+def word(shortest, longest):
+    """
+    A random lower case word.
+
+    :rtype: str
+    """
+    return ''.join(random.choice(LETTERS)
+                   for _ in range(random.randint(shortest, longest)))
+
+
+def loop_match(string_bans, text):
+    """
+    The string ban check before StringBans, from Check._message.
+
+    :param string_bans: The string bans.
+    :type string_bans: list
+    :param text: The message text.
+    :type text: str
+    :rtype: bool
+    """
+    chat_words = text.split(' ')
+    for bad in string_bans:
+        if bad.startswith('*'):
+            _ = bad.replace('*', '')
+            if _ in repr(text):
+                return True
+
+        elif bad in chat_words:
+            return True
+
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark of the string ban check.')
+    parser.add_argument('--root', default=os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), '..'),
+                        help='the checkout of the bot to benchmark.')
+    parser.add_argument('--bans', type=int, default=10000,
+                        help='string bans, a fifth of them `*` bans.')
+    parser.add_argument('--messages', type=int, default=2000)
+    parser.add_argument('--hits', type=int, default=20,
+                        help='extra messages containing a ban.')
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.abspath(args.root))
+    from util.ban_matcher import StringBans
+
+    random.seed(11)
+    words = args.bans * 4 // 5
+    string_bans = list(set([word(5, 10) for _ in range(words)] +
+                           ['*' + word(5, 9) for _ in range(args.bans - words)]))
+    vocabulary = [word(2, 8) for _ in range(3000)]
+    # the messages are unicode, as parsed from the websocket json
+    messages = [u' '.join(random.choice(vocabulary)
+                         for _ in range(random.randint(3, 15)))
+                for _ in range(args.messages)]
+    messages += [u'hello %s there' % ban.replace('*', '')
+                 for ban in string_bans[:args.hits]]
+
+    ts = time.time()
+    compiled = StringBans(string_bans)
+    build = time.time() - ts
+
+    ts = time.time()
+    loop_hits = [loop_match(string_bans, text) for text in messages]
+    looped = (time.time() - ts) / len(messages)
+
+    ts = time.time()
+    hits = [compiled.match(text) is not None for text in messages]
+    matched = (time.time() - ts) / len(messages)
+
+    assert hits == loop_hits
+    print('%d string bans, %d messages, %d hits' %
+          (len(string_bans), len(messages), sum(hits)))
+    print('loop        %8.3f ms per message' % (looped * 1000))
+    print('StringBans  %8.3f ms per message, %.0f ms to compile' %
+          (matched * 1000, build * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+
+"""
+The MIT License (MIT)
+
+Copyright (c) 2019 Nortxort
+
+Permission is hereby granted, free of charge, to any person obtaining a
+copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the
+Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+"""
+
+# Benchmark of the banlist substring search, used by !kick, !ban
+# and !sbl, against a scan of every ban.
+#
+# Synthetic bans get nicks made of common words and digits. Every
+# query is checked to give the same bans as the scan.
+#
+# Usage: python tools/bench_trigram.py [--bans 50000] [--searches 200]
+# Use --root to run it against another checkout of the bot.
+
+import os
+import sys
+import time
+import random
+import argparse
+import resource
+
+WORDS = ['dark', 'angel', 'kitty', 'boss', 'lol', 'xx', 'guest', 'king',
+         'queen', 'shadow', 'wolf', 'luna', 'mike', 'sam', 'rose', 'tiny',
+         'chat', 'cool', 'baby', 'star']
+
+QUERIES = ['angel', 'kitty9', 'wolfluna', 'xx1', 'darkangel12', 'zzz',
+           'ro', 'lo', 'shadowstar', '123']
+
+
+def nick():
+    """
+    A random nick of one to three words, often with digits.
+
+    :rtype: str
+    """
+    _nick = ''.join(random.choice(WORDS)
+                    for _ in range(random.randint(1, 3)))
+    if random.random() < 0.6:
+        _nick += str(random.randint(0, 999))
+    return _nick
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark of the banlist substring search.')
+    parser.add_argument('--root', default=os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), '..'),
+                        help='the checkout of the bot to benchmark.')
+    parser.add_argument('--bans', type=int, default=50000)
+    parser.add_argument('--searches', type=int, default=200,
+                        help='searches per query.')
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.abspath(args.root))
+    from users import Users
+
+    random.seed(7)
+    users = Users()
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    ts = time.time()
+    for ban_id in range(1, args.bans + 1):
+        users.add_banned_user({'id': ban_id, 'nick': nick(),
+                               'username': None, 'moderator': 'mod'})
+    print('%d bans added in %.2fs, rss +%d MB' %
+          (args.bans, time.time() - ts,
+           (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss) // 1024))
+
+    def scan(contains):
+        return [ban for ban in users.banlist.values() if contains in ban.nick]
+
+    print('%-12s %7s %10s %10s' % ('query', 'matches', 'scan', 'search'))
+    for query in QUERIES:
+        expected = sorted(ban.ban_id for ban in scan(query))
+        found = users.search_banlist_containing(query)
+        assert sorted(ban.ban_id for ban in found) == expected, query
+
+        ts = time.time()
+        for _ in range(args.searches):
+            scan(query)
+        scanned = (time.time() - ts) / args.searches
+
+        ts = time.time()
+        for _ in range(args.searches):
+            users.search_banlist_containing(query)
+        searched = (time.time() - ts) / args.searches
+
+        print('%-12s %7d %8.3fms %8.3fms' %
+              (query, len(expected), scanned * 1000, searched * 1000))
+
+
+if __name__ == '__main__':
+    main()
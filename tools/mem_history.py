@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+"""
+The MIT License (MIT)
+
+Copyright (c) 2019 Nortxort
+
+Permission is hereby granted, free of charge, to any person obtaining a
+copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the
+Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+"""
+
+# Memory check of the message and nick history kept per user.
+#
+# Simulates a long running room: the users stay, one of them sends a
+# message every second and changes nick every minute. The max RSS is
+# reported every 12 simulated hours.
+#
+# Usage: python tools/mem_history.py [--hours 72] [--users 200]
+# Use --root to run it against another checkout of the bot.
+
+import os
+import sys
+import random
+import argparse
+import resource
+
+
+def rss():
+    """
+    The max RSS of the process in MB.
+
+    :rtype: int
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Memory check of the per user history.')
+    parser.add_argument('--root', default=os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), '..'),
+                        help='the checkout of the bot to check.')
+    parser.add_argument('--hours', type=int, default=72,
+                        help='simulated hours.')
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--max-messages', type=int,
+                        help='messages kept per user, the default of Users if not set.')
+    parser.add_argument('--max-nicks', type=int,
+                        help='nicks kept per user, the default of Users if not set.')
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.abspath(args.root))
+    from users import Users
+    from message import TextMessage
+
+    kwargs = {}
+    if args.max_messages is not None:
+        kwargs['max_messages'] = args.max_messages
+    if args.max_nicks is not None:
+        kwargs['max_nicks'] = args.max_nicks
+
+    random.seed(3)
+    users = Users(**kwargs)
+    for handle in range(args.users):
+        account = 'acc%d' % handle if handle % 3 == 0 else ''
+        users.add({'handle': handle, 'nick': 'user%d' % handle,
+                   'username': account})
+
+    # 1 message per second and 1 nick change per minute
+    for second in range(1, args.hours * 3600 + 1):
+        handle = random.randrange(args.users)
+        text = 'some chat message number %d from user %d' % (second, handle)
+        users.search(handle).messages.append(
+            TextMessage({'tc': 'msg', 'handle': handle, 'text': text}))
+        if second % 60 == 0:
+            users.change_nick({'handle': handle,
+                               'nick': 'nick%d_%d' % (handle, second)})
+        if second % (12 * 3600) == 0:
+            print('%3dh max rss %4d MB' % (second // 3600, rss()))
+
+    user = users.search(0)
+    print('messages/user %d, nicks/user %d' %
+          (len(user.messages), len(user.old_nicks)))
+
+
+if __name__ == '__main__':
+    main()
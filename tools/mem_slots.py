@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+"""
+The MIT License (MIT)
+
+Copyright (c) 2019 Nortxort
+
+Permission is hereby granted, free of charge, to any person obtaining a
+copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the
+Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+"""
+
+# Memory check of the objects kept in large numbers: users with
+# their messages, banned users, tracks and youtube messages.
+#
+# Each group is created in turn, and the growth of the max RSS is
+# reported for it, with the size of a single user and text message.
+#
+# Usage: python tools/mem_slots.py [--users 10000] [--bans 100000]
+# Use --root to run it against another checkout of the bot.
+
+import os
+import sys
+import gc
+import argparse
+import resource
+
+
+def rss():
+    """
+    The max RSS of the process in KB.
+
+    :rtype: int
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def sizeof(obj):
+    """
+    The size of an object, with it's __dict__ if it has one.
+
+    :rtype: int
+    """
+    size = sys.getsizeof(obj)
+    if hasattr(obj, '__dict__'):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Memory check of users, bans, tracks and messages.')
+    parser.add_argument('--root', default=os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), '..'),
+                        help='the checkout of the bot to check.')
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--messages', type=int, default=100,
+                        help='text messages per user.')
+    parser.add_argument('--bans', type=int, default=100000)
+    parser.add_argument('--tracks', type=int, default=100000,
+                        help='tracks, and youtube messages.')
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.abspath(args.root))
+    from users.user import User
+    from users.banned import BannedUser
+    from message import TextMessage, YoutubeMessage
+    from apis.youtube import Track
+
+    texts = ['chat message %d' % i for i in range(args.messages)]
+    start = rss()
+    users = []
+    for handle in range(args.users):
+        user = User(handle=handle, nick='user%d' % handle,
+                    username='acc%d' % handle, giftpoints=0,
+                    avatar='https://avatars/x.png',
+                    max_messages=args.messages)
+        for text in texts:
+            user.messages.append(TextMessage({'tc': 'msg', 'text': text}))
+        users.append(user)
+    gc.collect()
+    print('%d users x %d text messages: %d MB' %
+          (args.users, args.messages, (rss() - start) // 1024))
+
+    start = rss()
+    bans = [BannedUser(id=ban_id, nick='nick%d' % ban_id, username=None,
+                       moderator='mod') for ban_id in range(args.bans)]
+    print('%d banned users: %d MB' % (len(bans), (rss() - start) // 1024))
+
+    start = rss()
+    tracks = [Track(video_id='vid%08d' % i, video_time=200,
+                    video_title='title') for i in range(args.tracks)]
+    youtubes = [YoutubeMessage({'item': {'id': 'x'}})
+                for _ in range(args.tracks)]
+    print('%d tracks + %d youtube messages: %d MB' %
+          (len(tracks), len(youtubes), (rss() - start) // 1024))
+
+    print('sizeof user %d bytes, text message %d bytes' %
+          (sizeof(users[0]), sizeof(users[0].messages[0])))
+
+
+if __name__ == '__main__':
+    main()
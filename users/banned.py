@@ -29,6 +29,7 @@ class BannedUser(object):
     """
     Class representing a banned user.
     """
+    __slots__ = ('_ban_id', '_nick', '_account', '_banned_by', '_reason')
 
     def __init__(self, **kwargs):
         self._ban_id = kwargs.get('id', 0)
@@ -91,3 +92,19 @@ class BannedUser(object):
         :rtype: str
         """
         return self._reason
+
+    @property
+    def ban_info(self):
+        """
+        The ban information, as received from the server.
+
+        :return: A ban info dictionary.
+        :rtype: dict
+        """
+        return {
+            'id': self._ban_id,
+            'nick': self._nick,
+            'username': self._account,
+            'moderator': self._banned_by,
+            'reason': self._reason
+        }
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+
+"""
+The MIT License (MIT)
+
+Copyright (c) 2019 Nortxort
+
+Permission is hereby granted, free of charge, to any person obtaining a
+copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the
+Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+"""
+
+import threading
+
+# the length of the grams
+N = 3
+
+
+def grams(text):
+    """
+    The distinct n-grams of a text.
+
+    :param text: The text to split in n-grams.
+    :type text: str
+    :return: A set of n-grams.
+    :rtype: set
+    """
+    return set(text[i:i + N] for i in range(len(text) - N + 1))
+
+
+class TrigramIndex(object):
+    """
+    A trigram inverted index for substring searches.
+
+    Each key is stored with it's text, and every trigram of the
+    text maps to the keys having it. A search intersects the keys
+    of the search string trigrams, starting with the rarest, and
+    verifies the few candidates left with a plain substring test.
+
+    Search strings shorter than a trigram can not use the
+    index, those are matched against every text instead.
+    """
+
+    def __init__(self):
+        self._texts = {}
+        self._grams = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._texts)
+
+    def add(self, key, text):
+        """
+        Add a key, or replace the text of a key already in the index.
+
+        :param key: The key, e.g a user handle or a ban id.
+        :type key: int | str
+        :param text: The text to index the key by.
+        :type text: str
+        """
+        text = text or ''
+        with self._lock:
+            if key in self._texts:
+                self._remove(key)
+
+            self._texts[key] = text
+            for gram in grams(text):
+                keys = self._grams.get(gram)
+                if keys is None:
+                    keys = self._grams[gram] = set()
+                keys.add(key)
+
+    def update(self, items):
+        """
+        Add many keys at once, e.g when building the index.
+
+        :param items: Tuples of (key, text).
+        :type items: list | iterator
+        """
+        with self._lock:
+            texts = self._texts
+            index = self._grams
+            for key, text in items:
+                text = text or ''
+                if key in texts:
+                    self._remove(key)
+
+                texts[key] = text
+                for i in range(len(text) - N + 1):
+                    gram = text[i:i + N]
+                    keys = index.get(gram)
+                    if keys is None:
+                        keys = index[gram] = set()
+                    keys.add(key)
+
+    def remove(self, key):
+        """
+        Remove a key from the index.
+
+        :param key: The key to remove.
+        :type key: int | str
+        """
+        with self._lock:
+            if key in self._texts:
+                self._remove(key)
+
+    def clear(self):
+        """
+        Clear the index.
+        """
+        with self._lock:
+            self._texts.clear()
+            self._grams.clear()
+
+    def search(self, contains):
+        """
+        Find the keys having a text containing the search string.
+
+        :param contains: The search string.
+        :type contains: str
+        :return: A list of keys.
+        :rtype: list
+        """
+        with self._lock:
+            if len(contains) < N:
+                return [key for key, text in self._texts.iteritems()
+                        if contains in text]
+
+            postings = []
+            for gram in grams(contains):
+                keys = self._grams.get(gram)
+                if keys is None:
+                    return []
+                postings.append(keys)
+
+            postings.sort(key=len)
+            candidates = postings[0].intersection(*postings[1:])
+
+            return [key for key in candidates
+                    if contains in self._texts[key]]
+
+    def _remove(self, key):
+        # call with the lock acquired
+        for gram in grams(self._texts.pop(key)):
+            keys = self._grams.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if len(keys) == 0:
+                    del self._grams[gram]
@@ -24,14 +24,26 @@ FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 DEALINGS IN THE SOFTWARE.
 """
 
+from collections import deque
 from datetime import datetime
 from user_level import UserLevel
 
+# the default number of messages and nicks kept per user
+MAX_MESSAGES = 50
+MAX_NICKS = 10
+
 
 class User(object):
     """
     Class representing a tinychat room user.
     """
+    __slots__ = ('location', 'nick', 'age', 'gender', 'role', 'biography',
+                 'gift_points', 'featured', 'subscription', 'achievement_url',
+                 'avatar', 'is_broadcasting', 'can_broadcast', 'is_waiting',
+                 'old_nicks', 'nick_time', 'messages', 'level', '_handle',
+                 '_account', '_session_id', '_is_lurker', '_is_mod',
+                 '_is_owner', '_join_time')
+
     def __init__(self, **kwargs):
         self.location = None
         self.nick = kwargs.get('nick', '')
@@ -47,11 +59,15 @@ class User(object):
         self.is_broadcasting = False
         self.can_broadcast = True
         self.is_waiting = False
-        self.old_nicks = [self.nick]
+        # the most recent nicks and messages, the checks
+        # need at least the last two of each.
+        self.old_nicks = deque(
+            [self.nick], maxlen=max(kwargs.get('max_nicks', MAX_NICKS), 2))
 
         self.nick_time = 0  # not implemented
 
-        self.messages = []
+        self.messages = deque(
+            maxlen=max(kwargs.get('max_messages', MAX_MESSAGES), 2))
 
         self._handle = kwargs.get('handle')                 # readonly
         self._account = kwargs.get('username', None)        # readonly
@@ -79,6 +95,30 @@ class User(object):
                                  self.account, self.is_owner,
                                  self.is_mod, self.level, self.join_time)
 
+    def resume(self, previous):
+        """
+        Take over the session state of a previous user
+        object of the same account, e.g after a reconnect.
+
+        :param previous: The previous User of the same account.
+        :type previous: User
+        """
+        self.location = previous.location
+        self.age = previous.age
+        self.gender = previous.gender
+        self.role = previous.role
+        self.biography = previous.biography
+        self.can_broadcast = previous.can_broadcast
+        self.messages = previous.messages
+        self.old_nicks = previous.old_nicks
+        if self.nick != previous.nick:
+            self.old_nicks.append(self.nick)
+
+        # a lower level is a higher privilege
+        if previous.level < self.level:
+            self.level = previous.level
+        self._join_time = previous.join_time
+
     @property
     def handle(self):
         """
@@ -24,25 +24,105 @@ FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 DEALINGS IN THE SOFTWARE.
 """
 
+import heapq
+import threading
+
 from .banned import BannedUser
+from .trigram import TrigramIndex
 from .user import User, UserLevel
 
 
+def _add_to_index(index, key, handle):
+    handles = index.get(key)
+    if handles is None:
+        handles = index[key] = set()
+    handles.add(handle)
+
+
+def _remove_from_index(index, key, handle):
+    handles = index.get(key)
+    if handles is not None:
+        handles.discard(handle)
+        if len(handles) == 0:
+            del index[key]
+
+
+def _ban_indexes(banned_users):
+    # build the banlist indexes of a list of banned users
+    by_nick = {}
+    by_account = {}
+    by_moderator = {}
+    for banned_user in banned_users:
+        ban_id = banned_user.ban_id
+        _add_to_index(by_nick, banned_user.nick, ban_id)
+        if banned_user.account is not None:
+            _add_to_index(by_account, banned_user.account, ban_id)
+        _add_to_index(by_moderator, banned_user.banned_by, ban_id)
+
+    ban_grams = TrigramIndex()
+    ban_grams.update((banned_user.ban_id, banned_user.nick)
+                     for banned_user in banned_users)
+    ban_ids = [-banned_user.ban_id for banned_user in banned_users]
+    heapq.heapify(ban_ids)
+
+    return ban_grams, ban_ids, by_nick, by_account, by_moderator
+
+
 class Users(object):
     """
     Class for doing various user related operations.
     """
 
-    def __init__(self):
+    def __init__(self, max_messages=None, max_nicks=None):
         """
         Initialize the Users class.
 
         Creating a dictionary for users and one for banned users.
+
+        :param max_messages: The number of messages kept per user.
+        :type max_messages: int | None
+        :param max_nicks: The number of nicks kept per user.
+        :type max_nicks: int | None
         """
         # supposedly it is faster to use {}
         self._users = {}
         self._banned_users = {}
         self._client = None
+        # user history sizes, passed on to User
+        self._history = {}
+        if max_messages is not None:
+            self._history['max_messages'] = max_messages
+        if max_nicks is not None:
+            self._history['max_nicks'] = max_nicks
+        # indexes of the users, by handle. The nick and
+        # account indexes map to a set of handles, since
+        # they are not guaranteed to be unique.
+        self._by_nick = {}
+        self._by_account = {}
+        self._mods = set()
+        self._signed_in = set()
+        self._lurkers = set()
+        self._norms = set()
+        self._broadcasters = set()
+        # substring search indexes of the
+        # user nicks and the banned nicks
+        self._nick_grams = TrigramIndex()
+        self._ban_grams = TrigramIndex()
+        # indexes of the banlist, by ban id. The heap holds the
+        # negated ban ids, so the most recent ban is on top.
+        # Deleted bans are popped once they reach the top,
+        # or when the heap is rebuilt.
+        self._ban_ids = []
+        self._bans_by_nick = {}
+        self._bans_by_account = {}
+        self._bans_by_moderator = {}
+        # the banlist is changed by the thread receiving the ban
+        # events, and loaded from the cache by a housekeeping thread
+        self._ban_lock = threading.RLock()
+        # set on a resuming reconnect, until the
+        # new userlist and banlist have been reconciled
+        self._is_stale = False
+        self._is_banlist_stale = False
 
     @property
     def client(self):
@@ -73,12 +153,7 @@ class Users(object):
         :return: A list of moderator User.
         :rtype: list
         """
-        mods = []
-        for user in self.all:
-            if self.all[user].is_mod:
-                mods.append(self.all[user])
-
-        return mods
+        return self._from_handles(self._mods)
 
     @property
     def signed_in(self):
@@ -88,12 +163,7 @@ class Users(object):
         :return: A list of all the signed in User
         :rtype: list
         """
-        signed_ins = []
-        for user in self.all:
-            if self.all[user].account:
-                signed_ins.append(self.all[user])
-
-        return signed_ins
+        return self._from_handles(self._signed_in)
 
     @property
     def lurkers(self):
@@ -103,12 +173,7 @@ class Users(object):
         :return: A list of lurkers User.
         :rtype: list
         """
-        lurkers = []
-        for user in self.all:
-            if self.all[user].is_lurker:
-                lurkers.append(self.all[user])
-
-        return lurkers
+        return self._from_handles(self._lurkers)
 
     @property
     def norms(self):
@@ -119,12 +184,7 @@ class Users(object):
         :return: A list of all normal User.
         :rtype: list
         """
-        regulars = []
-        for user in self.all:
-            if not self.all[user].is_mod and not self.all[user].is_lurker:
-                regulars.append(self.all[user])
-
-        return regulars
+        return self._from_handles(self._norms)
 
     @property
     def broadcasters(self):
@@ -134,18 +194,134 @@ class Users(object):
         :return: A list of all the broadcasting User.
         :rtype: list
         """
-        broadcasters = []
-        for user in self.all:
-            if self.all[user].is_broadcasting:
-                broadcasters.append(self.all[user])
+        return self._from_handles(self._broadcasters)
+
+    def role_counts(self):
+        """
+        Returns the amount of users of each role.
 
-        return broadcasters
+        :return: A dictionary with the amount of mods, signed_in,
+        lurkers, norms and broadcasters.
+        :rtype: dict
+        """
+        return {
+            'mods': len(self._mods),
+            'signed_in': len(self._signed_in),
+            'lurkers': len(self._lurkers),
+            'norms': len(self._norms),
+            'broadcasters': len(self._broadcasters)
+        }
+
+    @property
+    def is_stale(self):
+        """
+        Indicates that the users are from a previous connection.
+
+        :return: True if the userlist should be reconciled.
+        :rtype: bool
+        """
+        return self._is_stale
+
+    @property
+    def is_banlist_stale(self):
+        """
+        Indicates that the banlist is from a previous connection.
+
+        :return: True if the banlist should be reconciled.
+        :rtype: bool
+        """
+        return self._is_banlist_stale
+
+    def mark_stale(self):
+        """
+        Keep the users and the banlist, but mark them as stale.
+
+        This is used when resuming a connection, the next
+        userlist and banlist will be reconciled against
+        the stale state, instead of rebuilding it.
+        """
+        self._is_stale = True
+        self._is_banlist_stale = True
+
+    def mark_banlist_stale(self):
+        """
+        Keep the banlist, but mark it as stale.
+
+        The next banlist will be reconciled against it.
+        """
+        self._is_banlist_stale = True
 
     def clear(self):
         """
         Clear the user dictionary.
         """
         self._users.clear()
+        self._reindex()
+        self._is_stale = False
+
+    def reconcile(self, user_list):
+        """
+        Reconcile the users against a new userlist.
+
+        Users are matched by handle and account. A user still
+        having the same handle and account is kept as is, a user
+        with a new handle but a known account gets the state of
+        the previous user. Users not in the userlist are removed.
+
+        :param user_list: The user info items of the userlist event.
+        :type user_list: list
+        :return: A tuple of (new users, kept users, removed users)
+        :rtype: tuple
+        """
+        previous = self._users
+        by_account = {}
+        for user in previous.values():
+            if user.account is not None and user is not self._client:
+                by_account[user.account] = user
+
+        self._users = {}
+        if self._client is not None:
+            self._users[self._client.handle] = self._client
+
+        joined = []
+        kept = []
+        # handles of previous users resumed under a new handle
+        resumed = set()
+        for user_info in user_list:
+            handle = user_info['handle']
+            if handle in self._users:
+                continue
+
+            account = user_info.get('username') or None
+            old = previous.get(handle)
+            if old is not None and old.account == account:
+                if old.nick != user_info.get('nick', old.nick):
+                    old.nick = user_info['nick']
+                    old.old_nicks.append(old.nick)
+
+                self._users[handle] = old
+                if by_account.get(account) is old:
+                    del by_account[account]
+                kept.append(old)
+
+            elif account is not None and account in by_account:
+                old = by_account.pop(account)
+                user = self._users[handle] = self._new_user(user_info)
+                user.resume(old)
+                resumed.add(old.handle)
+                kept.append(user)
+
+            else:
+                user = self._users[handle] = self._new_user(user_info)
+                joined.append(user)
+
+        removed = [user for handle, user in previous.items()
+                   if handle not in self._users and handle not in resumed
+                   and user is not self._client]
+
+        self._reindex()
+        self._is_stale = False
+        return joined, kept, removed
 
     def add(self, user_info, is_client=False):
         """
@@ -161,10 +337,11 @@ class Users(object):
         """
         handle = user_info['handle']
         if handle not in self.all:
-            user = self._users[handle] = User(**user_info)
+            user = self._users[handle] = self._new_user(user_info)
+            self._index(user)
             if is_client:
                 self._client = user
-                self._client.user_level = UserLevel.CLIENT
+                self._client.level = UserLevel.CLIENT
 
         return self.all[handle]
 
@@ -178,11 +355,29 @@ class Users(object):
         :rtype: User
         """
         user = self.all[nick_data['handle']]
+        _remove_from_index(self._by_nick, user.nick, user.handle)
         user.nick = nick_data['nick']
         user.old_nicks.append(nick_data['nick'])
+        _add_to_index(self._by_nick, user.nick, user.handle)
+        self._nick_grams.add(user.handle, user.nick)
 
         return user
 
+    def set_broadcasting(self, user, is_broadcasting):
+        """
+        Set the broadcasting state of a user.
+
+        :param user: The user.
+        :type user: User
+        :param is_broadcasting: True if the user started broadcasting.
+        :type is_broadcasting: bool
+        """
+        user.is_broadcasting = is_broadcasting
+        if is_broadcasting:
+            self._broadcasters.add(user.handle)
+        else:
+            self._broadcasters.discard(user.handle)
+
     def add_tc_info(self, handle, account_info):
         """
         Add tinychat information from tinychat's API.
@@ -227,6 +422,7 @@ class Users(object):
         if handle in self.all:
             user = self._users[handle]
             del self._users[handle]
+            self._unindex(user)
             return user
 
         return None
@@ -257,11 +453,7 @@ class Users(object):
         :return: The User or None if not found.
         :rtype: User | None
         """
-        for user in self.all:
-            if self.all[user].nick == nick:
-                return self.all[user]
-
-        return None
+        return self._first(self._by_nick.get(nick))
 
     def search_by_account(self, account):
         """
@@ -272,11 +464,7 @@ class Users(object):
         :return: The User or None if not forund.
         :rtype: User | None
         """
-        for user in self.all:
-            if self.all[user].account == account:
-                return self.all[user]
-
-        return None
+        return self._first(self._by_account.get(account))
 
     def search_containing(self, contains):
         """
@@ -288,12 +476,69 @@ class Users(object):
         :return: A list of User matching the search string.
         :rtype: list
         """
-        users_containing = []
-        for user in self.all:
-            if str(contains) in self.all[user].nick:
-                users_containing.append(self.all[user])
+        return self._from_handles(self._nick_grams.search(str(contains)))
+
+    def _new_user(self, user_info):
+        kwargs = dict(user_info)
+        kwargs.update(self._history)
+        return User(**kwargs)
+
+    def _from_handles(self, handles):
+        # the users of a set of handles. list() copies the
+        # set at once, while the set may change in another thread
+        users = []
+        for handle in list(handles):
+            user = self._users.get(handle)
+            if user is not None:
+                users.append(user)
+        return users
+
+    def _first(self, handles):
+        if handles:
+            for handle in list(handles):
+                user = self._users.get(handle)
+                if user is not None:
+                    return user
+        return None
 
-        return users_containing
+    def _index(self, user):
+        handle = user.handle
+        _add_to_index(self._by_nick, user.nick, handle)
+        self._nick_grams.add(handle, user.nick)
+        if user.account is not None:
+            _add_to_index(self._by_account, user.account, handle)
+            self._signed_in.add(handle)
+        if user.is_mod:
+            self._mods.add(handle)
+        if user.is_lurker:
+            self._lurkers.add(handle)
+        if not user.is_mod and not user.is_lurker:
+            self._norms.add(handle)
+        if user.is_broadcasting:
+            self._broadcasters.add(handle)
+
+    def _unindex(self, user):
+        handle = user.handle
+        _remove_from_index(self._by_nick, user.nick, handle)
+        self._nick_grams.remove(handle)
+        if user.account is not None:
+            _remove_from_index(self._by_account, user.account, handle)
+        for role in (self._signed_in, self._mods, self._lurkers,
+                     self._norms, self._broadcasters):
+            role.discard(handle)
+
+    def _reindex(self):
+        # rebuild the indexes from the users
+        self._by_nick = {}
+        self._by_account = {}
+        self._mods = set()
+        self._signed_in = set()
+        self._lurkers = set()
+        self._norms = set()
+        self._broadcasters = set()
+        self._nick_grams = TrigramIndex()
+        for user in self._users.values():
+            self._index(user)
 
     # Banlist related.
     @classmethod
@@ -335,11 +580,7 @@ class Users(object):
         :return: A list containing BannedUser objects.
         :rtype: list
         """
-        banned_users = []
-        for banned_user in self.banlist:
-            banned_users.append(self.banlist[banned_user])
-
-        return banned_users
+        return self._banned_users.values()
 
     @property
     def banned_accounts(self):
@@ -350,9 +591,9 @@ class Users(object):
         :rtype: list
         """
         accounts = []
-        for ban_id in self.banlist:
-            if self.banlist[ban_id].account:
-                accounts.append(self.banlist[ban_id])
+        for account, ban_ids in self._bans_by_account.items():
+            if account:
+                accounts.extend(self._from_ban_ids(ban_ids))
 
         return accounts
 
@@ -364,7 +605,16 @@ class Users(object):
         :return: The last BannedUser object from the banlist.
         :rtype: BannedUser | None
         """
-        return self._find_most_recent(self.banned_users)
+        try:
+            banned_user = self._banned_users.get(-self._ban_ids[0])
+        except IndexError:
+            banned_user = None
+
+        if banned_user is None and len(self._banned_users) > 0:
+            # deleted in another thread, but not popped yet
+            banned_user = self._find_most_recent(self.banned_users)
+
+        return banned_user
 
     def add_banned_user(self, ban_info):
         """
@@ -376,10 +626,12 @@ class Users(object):
         :rtype: BannedUser
         """
         ban_id = ban_info['id']
-        if ban_id not in self.banlist:
-            self._banned_users[ban_id] = BannedUser(**ban_info)
+        with self._ban_lock:
+            if ban_id not in self.banlist:
+                banned_user = self._banned_users[ban_id] = BannedUser(**ban_info)
+                self._index_ban(banned_user)
 
-        return self.banlist[ban_id]
+            return self.banlist[ban_id]
 
     def delete_banned_user(self, ban_info):
         """
@@ -393,11 +645,13 @@ class Users(object):
         :rtype: BannedUser | None
         """
         ban_id = ban_info['id']
-        if ban_id in self.banlist:
-            banned_user = self.banlist[ban_id]
-            del self._banned_users[ban_id]
+        with self._ban_lock:
+            if ban_id in self.banlist:
+                banned_user = self.banlist[ban_id]
+                del self._banned_users[ban_id]
+                self._unindex_ban(banned_user)
 
-            return banned_user
+                return banned_user
 
         return None
 
@@ -405,7 +659,85 @@ class Users(object):
         """
         Clear the ban list.
         """
-        self._banned_users.clear()
+        with self._ban_lock:
+            self._banned_users.clear()
+            self._ban_grams.clear()
+            self._ban_ids = []
+            self._bans_by_nick = {}
+            self._bans_by_account = {}
+            self._bans_by_moderator = {}
+            self._is_banlist_stale = False
+
+    def load_banlist(self, ban_list):
+        """
+        Load a banlist, e.g from the banlist cache.
+
+        The loaded banlist is stale, until
+        reconciled against the banlist of the server.
+
+        The banlist and it's indexes are built aside, and swapped
+        in at once. Bans added by ban events in the meantime are kept.
+
+        :param ban_list: A list of ban info dictionaries.
+        :type ban_list: list
+        """
+        banned_users = {}
+        for ban_info in ban_list:
+            banned_user = BannedUser(**ban_info)
+            banned_users[banned_user.ban_id] = banned_user
+        indexes = _ban_indexes(banned_users.values())
+
+        with self._ban_lock:
+            added = [banned_user for ban_id, banned_user
+                     in self._banned_users.items()
+                     if ban_id not in banned_users]
+
+            self._banned_users = banned_users
+            self._ban_grams, self._ban_ids, self._bans_by_nick, \
+                self._bans_by_account, self._bans_by_moderator = indexes
+            for banned_user in added:
+                self._banned_users[banned_user.ban_id] = banned_user
+                self._index_ban(banned_user)
+
+            self._is_banlist_stale = True
+
+    def reconcile_banlist(self, ban_list):
+        """
+        Reconcile the banlist against a new banlist by ban id.
+
+        :param ban_list: The ban info items of the banlist event.
+        :type ban_list: list
+        :return: A tuple of (new bans, removed bans)
+        :rtype: tuple
+        """
+        with self._ban_lock:
+            return self._reconcile_banlist(ban_list)
+
+    def _reconcile_banlist(self, ban_list):
+        previous = self._banned_users
+        self._banned_users = {}
+
+        added = []
+        for ban_info in ban_list:
+            ban_id = ban_info['id']
+            if ban_id in previous:
+                self._banned_users[ban_id] = previous[ban_id]
+            else:
+                banned_user = self._banned_users[ban_id] = BannedUser(**ban_info)
+                added.append(banned_user)
+
+        removed = [banned_user for ban_id, banned_user in previous.items()
+                   if ban_id not in self._banned_users]
+
+        # update the indexes with the difference only
+        for banned_user in removed:
+            self._unindex_ban(banned_user)
+        for banned_user in added:
+            self._index_ban(banned_user)
+        self._prune_ban_ids()
+
+        self._is_banlist_stale = False
+        return added, removed
 
     def search_banlist(self, ban_id):
         """
@@ -435,32 +767,23 @@ class Users(object):
         :return: A BannedUser object or None if no match was found in the banlist.
         :rtype: BannedUser | None
         """
-        candidates = []
-        for ban_id in self.banlist:
-            if self.banlist[ban_id].nick == user_name:
-                candidates.append(self.banlist[ban_id])
-
-        if len(candidates) == 0:
-            return None
-
-        return self._find_most_recent(candidates)
+        return self._find_most_recent(
+            self._from_ban_ids(self._bans_by_nick.get(user_name)))
 
     def search_banlist_by_account(self, account):
         """
         Search the banlist by account.
 
-        NOTE: Test this.
+        If the account is banned more than once,
+        then the most recent BannedUser object will be returned.
 
         :param account: The account to search for.
         :type account: str
         :return: A banned user matching the account.
-        :rtype: BannedUser
+        :rtype: BannedUser | None
         """
-        for ban_id in self.banlist:
-            if self.banlist[ban_id].account == account:
-                return self.banlist[ban_id]
-
-        return None
+        return self._find_most_recent(
+            self._from_ban_ids(self._bans_by_account.get(account)))
 
     def search_banlist_containing(self, contains):
         """
@@ -472,9 +795,10 @@ class Users(object):
         :rtype: list
         """
         banned_containing = []
-        for user in self.banlist:
-            if str(contains) in self.banlist[user].nick:
-                banned_containing.append(self.banlist[user])
+        for ban_id in self._ban_grams.search(str(contains)):
+            banned_user = self._banned_users.get(ban_id)
+            if banned_user is not None:
+                banned_containing.append(banned_user)
 
         return banned_containing
 
@@ -487,9 +811,44 @@ class Users(object):
         :return: A list of BannedUser objects.
         :rtype: list
         """
-        banned_by_mod = []
-        for ban_id in self.banlist:
-            if self.banlist[ban_id].banned_by == moderator:
-                banned_by_mod.append(self.banlist[ban_id])
+        return self._from_ban_ids(self._bans_by_moderator.get(moderator))
+
+    def _from_ban_ids(self, ban_ids):
+        # the banned users of a set of ban ids,
+        # like _from_handles for the users
+        banned_users = []
+        if ban_ids:
+            for ban_id in list(ban_ids):
+                banned_user = self._banned_users.get(ban_id)
+                if banned_user is not None:
+                    banned_users.append(banned_user)
+        return banned_users
 
-        return banned_by_mod
+    def _index_ban(self, banned_user):
+        ban_id = banned_user.ban_id
+        self._ban_grams.add(ban_id, banned_user.nick)
+        heapq.heappush(self._ban_ids, -ban_id)
+        _add_to_index(self._bans_by_nick, banned_user.nick, ban_id)
+        if banned_user.account is not None:
+            _add_to_index(self._bans_by_account, banned_user.account, ban_id)
+        _add_to_index(self._bans_by_moderator, banned_user.banned_by, ban_id)
+
+    def _unindex_ban(self, banned_user):
+        ban_id = banned_user.ban_id
+        self._ban_grams.remove(ban_id)
+        _remove_from_index(self._bans_by_nick, banned_user.nick, ban_id)
+        if banned_user.account is not None:
+            _remove_from_index(self._bans_by_account, banned_user.account, ban_id)
+        _remove_from_index(self._bans_by_moderator, banned_user.banned_by, ban_id)
+        self._prune_ban_ids()
+
+    def _prune_ban_ids(self):
+        # pop the deleted ban ids on top, and rebuild the heap
+        # if it is mostly deleted ban ids
+        if len(self._ban_ids) > 2 * len(self._banned_users) + 64:
+            ban_ids = [-ban_id for ban_id in self._banned_users]
+            heapq.heapify(ban_ids)
+            self._ban_ids = ban_ids
+        else:
+            while self._ban_ids and -self._ban_ids[0] not in self._banned_users:
+                heapq.heappop(self._ban_ids)
@@ -23,8 +23,17 @@ DEALINGS IN THE SOFTWARE.
 """
 
 from console import Console, Color, ChatLogger
-from worker import Timer, ThreadPool, thread_task
+from worker import Timer, ThreadPool, Future, thread_task
 from tracklist import PlayList
+from recorder import FrameRecorder
+from banlist_cache import BanlistCache
+from ban_matcher import StringBans, NickBans
+from sender import Sender
+from request import Request, PendingRequests
+from histogram import Histogram, Histograms
+from profiler import TaskProfiler
+from reactor import Reactor
+from scheduler import Scheduler, get_scheduler
 import captcha
 import string_util
 import file_handler
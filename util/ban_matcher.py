@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+
+"""
+The MIT License (MIT)
+
+Copyright (c) 2019 Nortxort
+
+Permission is hereby granted, free of charge, to any person obtaining a
+copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the
+Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+"""
+
+from collections import deque
+
+
+class Automaton(object):
+    """
+    A Aho-Corasick automaton, matching many patterns in one scan.
+
+    The patterns are built into a trie, where each state has a
+    fail link to the state of the longest suffix also in the trie.
+    Scanning a text follows the trie, and the fail links on a
+    mismatch, so each character of the text is looked at once,
+    no matter how many patterns there are.
+    """
+
+    def __init__(self, patterns):
+        """
+        Build the automaton.
+
+        :param patterns: Tuples of (pattern, value), the value
+        is returned along with the end position of a match.
+        :type patterns: list | iterator
+        """
+        # the transitions, fail link and outputs of each state
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+        self._size = 0
+
+        for pattern, value in patterns:
+            if pattern:
+                self._add(pattern, value)
+
+        self._link()
+
+    def __len__(self):
+        return self._size
+
+    def _add(self, pattern, value):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = next_state
+
+        self._out[state] += ((len(pattern), value),)
+        self._size += 1
+
+    def _link(self):
+        # breadth first, so the fail state of a
+        # state is always linked before the state
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(char, 0)
+                if fail == next_state:
+                    fail = 0
+                self._fail[next_state] = fail
+                # the outputs of the suffixes are outputs too
+                self._out[next_state] += self._out[fail]
+
+    def matches(self, text):
+        """
+        Find the patterns in a text.
+
+        :param text: The text to scan.
+        :type text: str
+        :return: A generator of (start, end, value) for each match.
+        """
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        state = 0
+        for i, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                end = i + 1
+                for length, value in out[state]:
+                    yield end - length, end, value
+
+
+class StringBans(frozenset):
+    """
+    The string bans, compiled for matching chat messages.
+
+    A string ban starting with `*` bans messages containing
+    it anywhere (all `*` are removed), other string bans ban
+    messages containing them as a space separated word. A word
+    ban containing a space can not be such a word, so it never
+    matches. A string ban of only `*` bans every message.
+
+    Both kinds are matched in a single scan of the message.
+    Like a frozenset it can not be changed, a changed string
+    bans list is compiled to a new StringBans.
+    """
+
+    def __new__(cls, patterns=()):
+        return frozenset.__new__(cls, patterns)
+
+    def __init__(self, patterns=()):
+        frozenset.__init__(self)
+        compiled = []
+        self._match_all = None
+        for pattern in self:
+            if pattern.startswith('*'):
+                contains = pattern.replace('*', '')
+                if contains:
+                    compiled.append((contains, (pattern, False)))
+                else:
+                    self._match_all = pattern
+            elif ' ' not in pattern:
+                compiled.append((pattern, (pattern, True)))
+
+        self._automaton = Automaton(compiled)
+
+    def match(self, text):
+        """
+        Match a text against the string bans.
+
+        :param text: The text, e.g a chat message.
+        :type text: str
+        :return: The first string ban matching the text, or None.
+        :rtype: str | None
+        """
+        if self._match_all is not None:
+            return self._match_all
+
+        if not text:
+            return None
+
+        size = len(text)
+        for start, end, (pattern, is_word) in self._automaton.matches(text):
+            if not is_word:
+                return pattern
+
+            if (start == 0 or text[start - 1] == ' ') and \
+                    (end == size or text[end] == ' '):
+                return pattern
+
+        return None
+
+
+class NickBans(frozenset):
+    """
+    The nick bans, compiled for matching nicks.
+
+    A nick ban starting with `*` bans nicks containing it
+    (the leading `*` removed), other nick bans ban that exact
+    nick. The exact nick bans are looked up in a set, and the
+    others are matched in a single scan of the nick.
+
+    Like a frozenset it can not be changed, a changed nick
+    bans list is compiled to a new NickBans.
+    """
+
+    def __new__(cls, patterns=()):
+        return frozenset.__new__(cls, patterns)
+
+    def __init__(self, patterns=()):
+        frozenset.__init__(self)
+        exact = set()
+        compiled = []
+        # a nick ban of only `*` bans every nick
+        self._match_all = None
+        for pattern in self:
+            if pattern.startswith('*'):
+                contains = pattern.lstrip('*')
+                if contains:
+                    compiled.append((contains, pattern))
+                else:
+                    self._match_all = pattern
+            elif pattern:
+                exact.add(pattern)
+
+        self._exact = frozenset(exact)
+        self._automaton = Automaton(compiled)
+
+    def match(self, nick):
+        """
+        Match a nick against the nick bans.
+
+        :param nick: The nick of a user.
+        :type nick: str
+        :return: The first nick ban matching the nick, or None.
+        :rtype: str | None
+        """
+        if not nick:
+            return None
+
+        if nick in self._exact:
+            return nick
+
+        if self._match_all is not None:
+            return self._match_all
+
+        for start, end, pattern in self._automaton.matches(nick):
+            return pattern
+
+        return None
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+"""
+The MIT License (MIT)
+
+Copyright (c) 2019 Nortxort
+
+Permission is hereby granted, free of charge, to any person obtaining a
+copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the
+Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+"""
+
+import io
+import os
+import json
+import errno
+import logging
+
+
+log = logging.getLogger(__name__)
+
+
+class BanlistCache:
+    """
+    Keeps the last banlist of a room on disk.
+
+    The banlist is saved as a JSON lines file, with
+    the ban info of a banned user on each line.
+    """
+
+    def __init__(self, file_path, file_name):
+        """
+        Initialize the banlist cache.
+
+        :param file_path: The directory of the cache file.
+        :type file_path: str
+        :param file_name: The name of the cache file.
+        :type file_name: str
+        """
+        self._file_path = file_path
+        self._file_name = file_name
+
+    def load(self):
+        """
+        Load the cached banlist.
+
+        :return: A list of ban info dictionaries,
+        or a empty list if there is no cache or on error.
+        :rtype: list
+        """
+        ban_list = []
+        file_name = self._file_path + self._file_name
+        if os.path.isfile(file_name):
+            try:
+                with io.open(file_name, encoding='utf-8') as f:
+                    for line in f:
+                        if line.strip():
+                            ban_list.append(json.loads(line))
+            except (IOError, ValueError) as e:
+                log.error('failed to load banlist cache %s: %s' % (file_name, e))
+                return []
+
+        return ban_list
+
+    def save(self, ban_list):
+        """
+        Save a banlist, replacing the previous cache.
+
+        The banlist is written to a temporary file first, so
+        a failed save does not leave a half written cache.
+
+        :param ban_list: A list of ban info dictionaries.
+        :type ban_list: list
+        :return: True if saved.
+        :rtype: bool
+        """
+        file_name = self._file_path + self._file_name
+        tmp_name = file_name + '.tmp'
+        try:
+            try:
+                os.makedirs(self._file_path)
+            except OSError as e:
+                # another bot may have made it in the meantime
+                if e.errno != errno.EEXIST:
+                    raise
+
+            with io.open(tmp_name, mode='w', encoding='utf-8') as f:
+                for ban_info in ban_list:
+                    # non ascii nicks are escaped, this is
+                    # a lot faster than ensure_ascii=False
+                    f.write(u'%s\n' % json.dumps(ban_info))
+
+            if os.path.exists(file_name):
+                # windows will not rename on top of a existing file
+                os.remove(file_name)
+            os.rename(tmp_name, file_name)
+        except (IOError, OSError) as e:
+            log.error('failed to save banlist cache %s: %s' % (file_name, e))
+            return False
+
+        log.debug('saved %s bans to %s' % (len(ban_list), file_name))
+        return True
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+
+"""
+The MIT License (MIT)
+
+Copyright (c) 2019 Nortxort
+
+Permission is hereby granted, free of charge, to any person obtaining a
+copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the
+Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+"""
+
+import math
+import threading
+
+
+class Histogram(object):
+    """
+    A log bucketed histogram for latencies.
+
+    Values are counted in buckets growing by a fixed factor,
+    so the memory use is bounded no matter the amount of values,
+    and percentiles have a relative error of at most the factor.
+    """
+
+    def __init__(self, min_value=0.000001, factor=1.2):
+        """
+        Initialize the histogram.
+
+        :param min_value: Values below this goes in the first bucket.
+        :type min_value: float
+        :param factor: The growth factor of the buckets.
+        :type factor: float
+        """
+        self._min_value = min_value
+        self._log_factor = math.log(factor)
+        self._factor = factor
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        """
+        Add a value.
+
+        :param value: The value, e.g seconds.
+        :type value: int | float
+        """
+        if value <= self._min_value:
+            index = 0
+        else:
+            index = int(math.log(value / self._min_value) / self._log_factor) + 1
+
+        with self._lock:
+            self._buckets[index] = self._buckets.get(index, 0) + 1
+            self.count += 1
+            self.total += value
+            if value > self.max:
+                self.max = value
+
+    @property
+    def mean(self):
+        """
+        The mean of the values.
+
+        :rtype: float
+        """
+        if self.count == 0:
+            return 0.0
+        return self.total / self.count
+
+    def percentile(self, percent):
+        """
+        Get a percentile.
+
+        :param percent: The percentile, e.g 99.
+        :type percent: int | float
+        :return: The upper bound of the bucket holding the percentile.
+        :rtype: float
+        """
+        with self._lock:
+            if self.count == 0:
+                return 0.0
+
+            rank = self.count * percent / 100.0
+            seen = 0
+            for index in sorted(self._buckets):
+                seen += self._buckets[index]
+                if seen >= rank:
+                    upper = self._min_value * self._factor ** index
+                    return min(upper, self.max)
+
+            return self.max
+
+    def summary(self):
+        """
+        A summary of the histogram.
+
+        :return: A dictionary with count, mean, p50, p95, p99 and max.
+        :rtype: dict
+        """
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'max': self.max
+        }
+
+
+class Histograms(object):
+    """
+    A collection of named histograms.
+
+    The amount of names is capped, values for names
+    beyond the cap are added to the `other` histogram,
+    so the memory use stays fixed.
+    """
+
+    def __init__(self, max_names=200):
+        """
+        Initialize the collection.
+
+        :param max_names: The max amount of histograms.
+        :type max_names: int
+        """
+        self._max_names = max_names
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, value):
+        """
+        Add a value to a named histogram.
+
+        :param name: The name of the histogram, e.g `event.join`
+        :type name: str
+        :param value: The value, e.g seconds.
+        :type value: int | float
+        """
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.get(name)
+                if histogram is None:
+                    if len(self._histograms) >= self._max_names:
+                        name = 'other'
+                    histogram = self._histograms.get(name)
+                    if histogram is None:
+                        histogram = self._histograms[name] = Histogram()
+
+        histogram.add(value)
+
+    def summary(self, prefix=''):
+        """
+        Summaries of the histograms.
+
+        :param prefix: Only include names starting with this.
+        :type prefix: str
+        :return: A dictionary where the key is the name
+        and the value is the histogram summary.
+        :rtype: dict
+        """
+        with self._lock:
+            items = self._histograms.items()
+
+        return dict((name, histogram.summary()) for name, histogram in items
+                    if name.startswith(prefix))
+
+    def clear(self):
+        """
+        Remove all histograms.
+        """
+        with self._lock:
+            self._histograms.clear()
@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+
+"""
+The MIT License (MIT)
+
+Copyright (c) 2019 Nortxort
+
+Permission is hereby granted, free of charge, to any person obtaining a
+copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the
+Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+"""
+
+import os
+import time
+import heapq
+import codecs
+import logging
+import threading
+
+
+log = logging.getLogger(__name__)
+
+
+class TaskStats(object):
+    """
+    The totals of a task function.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.run_total = 0.0
+        self.run_max = 0.0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.last_error = None
+
+    @property
+    def run_mean(self):
+        """
+        The mean run time in seconds.
+
+        :rtype: float
+        """
+        if self.count == 0:
+            return 0.0
+        return self.run_total / self.count
+
+    @property
+    def wait_mean(self):
+        """
+        The mean queue wait in seconds.
+
+        :rtype: float
+        """
+        if self.count == 0:
+            return 0.0
+        return self.wait_total / self.count
+
+
+class TaskProfiler(object):
+    """
+    Profiles the tasks run by the thread pools.
+
+    Keeps the totals of every task function, e.g `JoinHandler.handle`,
+    and a table of the slowest single runs, with their arguments.
+    The amount of task names is capped like Histograms, so the
+    memory use stays fixed.
+    """
+
+    def __init__(self, top=20, max_names=200):
+        """
+        Initialize the profiler.
+
+        :param top: The size of the slowest runs table.
+        :type top: int
+        :param max_names: The max amount of task names.
+        :type max_names: int
+        """
+        self.top = top
+        self._max_names = max_names
+        self._lock = threading.Lock()
+        self._tasks = {}
+        # min-heap of (run time, started at, name, wait, args)
+        self._slowest = []
+        self._since = time.time()
+
+    def _get(self, name):
+        # call with the lock acquired
+        stats = self._tasks.get(name)
+        if stats is None:
+            if len(self._tasks) >= self._max_names:
+                name = 'other'
+            stats = self._tasks.get(name)
+            if stats is None:
+                stats = self._tasks[name] = TaskStats(name)
+        return stats
+
+    def add(self, name, wait, run, error=None, args=None):
+        """
+        Add a finished task run.
+
+        :param name: The task name.
+        :type name: str
+        :param wait: Seconds the task waited in the queue.
+        :type wait: float
+        :param run: Seconds the task ran.
+        :type run: float
+        :param error: The exception raised by the task, if any.
+        :type error: Exception | None
+        :param args: The task arguments.
+        :type args: tuple | None
+        """
+        name = _unicode(name)
+        with self._lock:
+            stats = self._get(name)
+            stats.count += 1
+            stats.run_total += run
+            stats.wait_total += wait
+            if run > stats.run_max:
+                stats.run_max = run
+            if wait > stats.wait_max:
+                stats.wait_max = wait
+            if error is not None:
+                stats.errors += 1
+                stats.last_error = repr(error)
+
+            if len(self._slowest) < self.top or run > self._slowest[0][0]:
+                # the arguments are only formatted for the slow runs
+                item = (run, time.time() - run, name, wait, _format_args(args))
+                if len(self._slowest) < self.top:
+                    heapq.heappush(self._slowest, item)
+                else:
+                    heapq.heapreplace(self._slowest, item)
+
+    def add_timeout(self, name):
+        """
+        Count a task passing it's deadline.
+
+        :param name: The task name.
+        :type name: str
+        """
+        name = _unicode(name)
+        with self._lock:
+            self._get(name).timeouts += 1
+
+    def tasks(self):
+        """
+        The totals of the task functions, by total run time.
+
+        :return: A list of TaskStats copies, the most time consuming first.
+        :rtype: list
+        """
+        with self._lock:
+            tasks = [_copy(stats) for stats in self._tasks.values()]
+        return sorted(tasks, key=lambda s: s.run_total, reverse=True)
+
+    def slowest(self):
+        """
+        The slowest single task runs.
+
+        :return: A list of (run time, started at, name, wait, args)
+        tuples, the slowest first.
+        :rtype: list
+        """
+        with self._lock:
+            return sorted(self._slowest, reverse=True)
+
+    def clear(self):
+        """
+        Clear the profile.
+        """
+        with self._lock:
+            self._tasks.clear()
+            self._slowest[:] = []
+            self._since = time.time()
+
+    def report(self, limit=None):
+        """
+        Format the profile as text tables.
+
+        :param limit: The max amount of task functions to include.
+        :type limit: int | None
+        :return: The report lines.
+        :rtype: list
+        """
+        tasks = self.tasks()
+        total = sum(stats.run_total for stats in tasks) or 1.0
+        elapsed = time.time() - self._since
+
+        lines = ['Task profile of the last %.0f seconds.' % elapsed, '',
+                 '%-45s %7s %6s %6s %6s %9s %9s %9s %9s' %
+                 ('task', 'count', 'errors', 'tmout', 'share', 'run mean',
+                  'run max', 'wait mean', 'wait max')]
+        for stats in tasks[:limit]:
+            lines.append('%-45s %7s %6s %6s %5.1f%% %7.1fms %7.1fms %7.1fms %7.1fms' %
+                         (stats.name, stats.count, stats.errors, stats.timeouts,
+                          stats.run_total / total * 100, stats.run_mean * 1000,
+                          stats.run_max * 1000, stats.wait_mean * 1000,
+                          stats.wait_max * 1000))
+
+        lines.extend(['', 'Slowest runs.', '',
+                      '%-19s %9s %9s %-45s %s' % ('started', 'run', 'wait', 'task', 'args')])
+        for run, started_at, name, wait, args in self.slowest():
+            lines.append('%-19s %7.1fms %7.1fms %-45s %s' %
+                         (time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(started_at)),
+                          run * 1000, wait * 1000, name, args))
+
+        errors = [stats for stats in tasks if stats.last_error is not None]
+        if errors:
+            lines.extend(['', 'Last errors.', ''])
+            for stats in errors:
+                lines.append('%-45s %s' % (stats.name, stats.last_error))
+
+        return lines
+
+    def dump(self, file_path, file_name):
+        """
+        Write the profile report to a file, replacing the file.
+
+        :param file_path: The path to the file.
+        :type file_path: str
+        :param file_name: The name of the file.
+        :type file_name: str
+        :return: True if written.
+        :rtype: bool
+        """
+        try:
+            if not os.path.exists(file_path):
+                os.makedirs(file_path)
+            with codecs.open(file_path + file_name, mode='w', encoding='utf-8') as f:
+                f.write('\n'.join(self.report()) + '\n')
+        except (IOError, OSError) as e:
+            log.error('failed to write task profile %s%s: %s' %
+                      (file_path, file_name, e))
+            return False
+        return True
+
+
+def _copy(stats):
+    copy = TaskStats(stats.name)
+    copy.__dict__.update(stats.__dict__)
+    return copy
+
+
+def _unicode(name):
+    # a task name may be a utf-8 encoded byte string, which
+    # can not be joined with the unicode of a report or reply
+    if isinstance(name, str):
+        return name.decode('utf-8', 'replace')
+    return name
+
+
+def _format_args(args, max_length=60):
+    if not args:
+        return ''
+    text = ', '.join(repr(arg) for arg in args)
+    if len(text) > max_length:
+        text = text[:max_length - 3] + '...'
+    return text
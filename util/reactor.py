@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+
+"""
+The MIT License (MIT)
+
+Copyright (c) 2019 Nortxort
+
+Permission is hereby granted, free of charge, to any person obtaining a
+copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the
+Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+"""
+
+import time
+import errno
+import select
+import socket
+import logging
+import threading
+
+import websocket
+from worker import thread_task
+from scheduler import socket_pair
+
+
+log = logging.getLogger(__name__)
+
+
+class _Connection(object):
+    """
+    A websocket connection served by the reactor.
+    """
+
+    def __init__(self, ws, on_message, on_close, on_error):
+        self.ws = ws
+        self.sock = ws.sock
+        self.on_message = on_message
+        self.on_close = on_close
+        self.on_error = on_error
+        self.last_recv = time.time()
+        self.last_ping = 0
+
+
+class Reactor(threading.Thread):
+    """
+    A single thread serving many websocket connections.
+
+    Instead of one thread blocking in `run_forever` for every room,
+    the reactor waits for any of it's connections to become readable,
+    reads the frames and calls the message callback of that connection.
+    It also takes care of websocket pings, and pumps the senders of
+    the connections, so the amount of threads does not grow with
+    the amount of rooms.
+
+    NOTE: Callbacks are called from the reactor thread,
+    so they should not block for long.
+    """
+
+    def __init__(self, ping_interval=20, ping_timeout=5):
+        """
+        Initialize the reactor.
+
+        :param ping_interval: Seconds between websocket pings.
+        :type ping_interval: int | float
+        :param ping_timeout: Seconds to wait for data after a ping,
+        before the connection is considered timed out.
+        :type ping_timeout: int | float
+        """
+        threading.Thread.__init__(self)
+        self.daemon = True
+
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+
+        self._lock = threading.Lock()
+        # socket -> _Connection
+        self._connections = {}
+        self._senders = set()
+
+        self._wake_reader, self._wake_writer = socket_pair()
+        self._woken = False
+        self._wake_lock = threading.Lock()
+
+        self.start()
+
+    @property
+    def connections(self):
+        """
+        The amount of connections served by the reactor.
+
+        :rtype: int
+        """
+        return len(self._connections)
+
+    def add(self, ws, on_message, on_close, on_error):
+        """
+        Add a connected websocket to the reactor.
+
+        :param ws: A connected websocket.
+        :type ws: websocket.WebSocket
+        :param on_message: Called with the data of every text frame.
+        :type on_message: function
+        :param on_close: Called when the server closes the connection.
+        :type on_close: function
+        :param on_error: Called with the exception if the connection fails.
+        :type on_error: function
+        """
+        ws.settimeout(self.ping_timeout)
+        conn = _Connection(ws, on_message, on_close, on_error)
+        with self._lock:
+            self._connections[conn.sock] = conn
+        self.wakeup()
+
+    def remove(self, ws):
+        """
+        Remove a websocket from the reactor.
+
+        :param ws: A websocket previously added.
+        :type ws: websocket.WebSocket
+        """
+        with self._lock:
+            for sock, conn in self._connections.items():
+                if conn.ws is ws:
+                    del self._connections[sock]
+                    break
+        self.wakeup()
+
+    def add_sender(self, sender):
+        """
+        Let the reactor pump a (non threaded) sender.
+
+        :param sender: The sender.
+        :type sender: Sender
+        """
+        with self._lock:
+            self._senders.add(sender)
+
+    def remove_sender(self, sender):
+        """
+        Stop pumping a sender.
+
+        :param sender: The sender.
+        :type sender: Sender
+        """
+        with self._lock:
+            self._senders.discard(sender)
+
+    def wakeup(self):
+        """
+        Wake up the reactor loop.
+
+        This is called from other threads, e.g when a
+        payload was queued on the sender of a connection.
+        """
+        with self._wake_lock:
+            if self._woken:
+                return
+            self._woken = True
+            try:
+                self._wake_writer.send(b'x')
+            except socket.error as e:
+                if e.args[0] not in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    raise
+
+    def run(self):
+        """
+        Overrides Thread.run
+        """
+        while True:
+            try:
+                self._loop()
+            except Exception as e:
+                log.error('reactor loop error: %s' % e, exc_info=True)
+                time.sleep(0.1)
+
+    def _loop(self):
+        with self._lock:
+            connections = dict(self._connections)
+            senders = list(self._senders)
+
+        timeout = 1.0
+        for sender in senders:
+            wait = sender.pump()
+            if wait is not None:
+                timeout = min(timeout, wait)
+
+        socks = list(connections.keys())
+        socks.append(self._wake_reader)
+
+        for sock in self._wait(socks, timeout):
+            if sock is self._wake_reader:
+                self._drain()
+            elif sock in connections:
+                self._read(connections[sock])
+
+        self._ping(connections)
+
+    def _wait(self, socks, timeout):
+        # poll does not have the FD_SETSIZE limit select has,
+        # but it's not available on windows
+        if hasattr(select, 'poll'):
+            poller = select.poll()
+            by_fd = {}
+            for sock in socks:
+                fd = sock.fileno()
+                by_fd[fd] = sock
+                poller.register(fd, select.POLLIN)
+            try:
+                events = poller.poll(timeout * 1000)
+            except select.error as e:
+                if e.args[0] == errno.EINTR:
+                    return []
+                raise
+            return [by_fd[fd] for fd, _ in events if fd in by_fd]
+
+        try:
+            readable, _, _ = select.select(socks, [], [], timeout)
+        except (select.error, socket.error, ValueError) as e:
+            # a socket may have been closed by another thread
+            log.debug('select error: %s' % e)
+            return []
+        return readable
+
+    def _drain(self):
+        # the flag is cleared after the drain, under the lock of
+        # wakeup, so the byte of a wakeup can not be swallowed
+        # while the flag stays set. the senders are pumped again
+        # after a drain, so a skipped wakeup is not lost either
+        with self._wake_lock:
+            try:
+                while self._wake_reader.recv(4096):
+                    pass
+            except socket.error:
+                pass
+            self._woken = False
+
+    def _read(self, conn):
+        while True:
+            try:
+                opcode, data = conn.ws.recv_data(control_frame=True)
+            except Exception as e:
+                self._drop(conn, e)
+                return
+
+            conn.last_recv = time.time()
+
+            if opcode == websocket.ABNF.OPCODE_CLOSE:
+                self._drop(conn)
+                return
+
+            elif opcode in (websocket.ABNF.OPCODE_TEXT,
+                            websocket.ABNF.OPCODE_BINARY):
+                try:
+                    conn.on_message(data)
+                except Exception as e:
+                    log.error('error from callback %s: %s' %
+                              (conn.on_message, e), exc_info=True)
+
+            # ssl sockets may hold decrypted data the
+            # poller does not know about
+            sock = conn.ws.sock
+            if sock is None or not hasattr(sock, 'pending') or not sock.pending():
+                return
+
+    def _ping(self, connections):
+        now = time.time()
+        for conn in connections.values():
+            if conn.last_ping > conn.last_recv and \
+                    now - conn.last_ping > self.ping_timeout:
+                self._drop(conn, websocket.WebSocketTimeoutException(
+                    'ping/pong timed out'))
+
+            elif now - conn.last_ping >= self.ping_interval:
+                conn.last_ping = now
+                try:
+                    conn.ws.ping()
+                except Exception as e:
+                    self._drop(conn, e)
+
+    def _drop(self, conn, error=None):
+        with self._lock:
+            if self._connections.pop(conn.sock, None) is None:
+                # already dropped or removed
+                return
+
+        # the callbacks may reconnect, which
+        # should not block the other connections
+        if error is None:
+            log.info('connection closed by server')
+            thread_task(conn.on_close)
+        else:
+            log.info('connection error: %s' % error)
+            thread_task(conn.on_error, error)
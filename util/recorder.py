@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+
+"""
+The MIT License (MIT)
+
+Copyright (c) 2019 Nortxort
+
+Permission is hereby granted, free of charge, to any person obtaining a
+copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the
+Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+"""
+
+import os
+import io
+import json
+import time
+import logging
+from datetime import datetime
+
+
+log = logging.getLogger(__name__)
+
+
+class FrameRecorder:
+    """
+    Records raw websocket frames to a JSON lines file.
+
+    Each line is a json object containing the time
+    the frame was received and the raw frame itself.
+    """
+
+    def __init__(self, file_path, room):
+        """
+        Initialize the frame recorder.
+
+        :param file_path: The directory to save the recordings in.
+        :type file_path: str
+        :param room: The room the frames are recorded for.
+        :type room: str
+        """
+        self._file_path = file_path
+        self._room = room
+        self._file = None
+        self._frames = 0
+
+    @property
+    def is_recording(self):
+        """
+        Check if the recorder has an open recording file.
+
+        :return: True if recording.
+        :rtype: bool
+        """
+        return self._file is not None
+
+    @property
+    def frames(self):
+        """
+        The amount of frames in the current recording.
+
+        :return: The frame count.
+        :rtype: int
+        """
+        return self._frames
+
+    def start(self):
+        """
+        Start a new timestamped recording file.
+
+        :return: The name of the recording file.
+        :rtype: str
+        """
+        if self.is_recording:
+            self.stop()
+
+        if not os.path.exists(self._file_path):
+            os.makedirs(self._file_path)
+
+        file_name = '%s-%s.jsonl' % (self._room,
+                                     datetime.now().strftime('%Y%m%d-%H%M%S'))
+
+        log.info('recording frames to: %s%s' % (self._file_path, file_name))
+        self._file = io.open(self._file_path + file_name, mode='a',
+                             encoding='utf-8')
+        self._frames = 0
+
+        return file_name
+
+    def record(self, frame):
+        """
+        Write a raw frame to the recording file.
+
+        :param frame: The raw websocket frame.
+        :type frame: str
+        """
+        if self._file is not None:
+            if isinstance(frame, bytes):
+                frame = frame.decode('utf-8', 'replace')
+
+            line = json.dumps({'ts': time.time(), 'frame': frame},
+                              ensure_ascii=False)
+            self._file.write(u'%s\n' % line)
+            self._frames += 1
+
+    def stop(self):
+        """
+        Close the current recording file.
+        """
+        if self._file is not None:
+            log.info('recorded %s frames' % self._frames)
+            self._file.close()
+            self._file = None
+
+
+def read_recording(file_name):
+    """
+    Read a recording file.
+
+    :param file_name: The path and name of the recording file.
+    :type file_name: str
+    :return: A list of tuple(time stamp, frame).
+    :rtype: list
+    """
+    frames = []
+    with io.open(file_name, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                data = json.loads(line)
+                frames.append((data['ts'], data['frame']))
+
+    return frames
+
+
+def replay(client, frames, realtime=False):
+    """
+    Feed recorded frames to a client, without a network connection.
+
+    The frames are passed to the client's on_message, exactly as if
+    they had been received from the websocket endpoint.
+
+    :param client: An instance of tinychat.Client (or a subclass).
+    :param frames: A list of tuple(time stamp, frame) from read_recording.
+    :type frames: list
+    :param realtime: If True, the frames will be replayed at the pace
+    they were recorded at, else as fast as possible.
+    :type realtime: bool
+    :return: A dictionary with the frame count, elapsed seconds
+    and the frames per second.
+    :rtype: dict
+    """
+    start = time.time()
+    first_ts = None
+
+    for ts, frame in frames:
+        if realtime:
+            if first_ts is None:
+                first_ts = ts
+            delay = (ts - first_ts) - (time.time() - start)
+            if delay > 0:
+                time.sleep(delay)
+
+        client.on_message(frame)
+
+    elapsed = time.time() - start
+    fps = 0
+    if elapsed > 0:
+        fps = len(frames) / elapsed
+
+    return {
+        'frames': len(frames),
+        'elapsed': elapsed,
+        'fps': fps
+    }
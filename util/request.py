@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+
+"""
+The MIT License (MIT)
+
+Copyright (c) 2019 Nortxort
+
+Permission is hereby granted, free of charge, to any person obtaining a
+copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the
+Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+"""
+
+import time
+import heapq
+import logging
+import threading
+
+from histogram import Histogram
+
+
+log = logging.getLogger(__name__)
+
+
+class Request(object):
+    """
+    A sent payload waiting for the server acknowledgement.
+
+    The server echoes the `req` id of a payload in it's response,
+    a Request is resolved with that response. It can be waited
+    for, or a callback can be used.
+    """
+
+    def __init__(self, payload, callback=None, timeout=10):
+        """
+        Initialize the request.
+
+        :param payload: The payload sent.
+        :type payload: dict
+        :param callback: Called with the Request once it is done.
+        This is called from the receiving thread and should not block.
+        :type callback: function | None
+        :param timeout: Seconds to wait for the acknowledgement.
+        :type timeout: int | float
+        """
+        self.payload = payload
+        self.callback = callback
+        self.timeout = timeout
+
+        self.req = None
+        self.sent_at = None
+        self.response = None
+        # None while pending, else `ok`, `timeout`,
+        # `dropped` or `disconnected`
+        self.status = None
+
+        self._event = threading.Event()
+
+    def __repr__(self):
+        return '<%s event=%s, req=%s, status=%s>' % \
+               (self.__class__.__name__, self.event, self.req, self.status)
+
+    @property
+    def event(self):
+        """
+        The event (tc) of the payload.
+
+        :rtype: str
+        """
+        return self.payload.get('tc')
+
+    @property
+    def done(self):
+        """
+        True if the request is no longer pending.
+
+        :rtype: bool
+        """
+        return self._event.is_set()
+
+    @property
+    def ok(self):
+        """
+        True if the server acknowledged the request.
+
+        :rtype: bool
+        """
+        return self.status == 'ok'
+
+    def wait(self, timeout=None):
+        """
+        Wait for the server acknowledgement.
+
+        :param timeout: Seconds to wait, if None
+        the timeout of the request applies.
+        :type timeout: int | float | None
+        :return: The response or None if not acknowledged.
+        :rtype: dict | None
+        """
+        if timeout is None:
+            timeout = self.timeout
+        self._event.wait(timeout)
+        return self.response
+
+    def finish(self, status, response=None):
+        """
+        Finish the request. Only the first call has an effect.
+
+        :param status: The final status.
+        :type status: str
+        :param response: The server response.
+        :type response: dict | None
+        """
+        if self._event.is_set():
+            return
+
+        self.status = status
+        self.response = response
+        self._event.set()
+
+        if self.callback is not None:
+            try:
+                self.callback(self)
+            except Exception as e:
+                log.error('request callback error %s: %s' % (self, e),
+                          exc_info=True)
+
+
+class PendingRequests(object):
+    """
+    The table of requests waiting for an acknowledgement, by req id.
+
+    The round trip time of every acknowledged request is
+    added to a histogram of it's event.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # req -> Request
+        self._pending = {}
+        # (deadline, req)
+        self._deadlines = []
+        # event -> Histogram
+        self._latency = {}
+        # event -> timeouts
+        self._timeouts = {}
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, req, request):
+        """
+        Add a request once it has been sent.
+
+        :param req: The req id of the payload.
+        :type req: int
+        :param request: The request.
+        :type request: Request
+        """
+        request.req = req
+        request.sent_at = time.time()
+        with self._lock:
+            self._pending[req] = request
+            heapq.heappush(self._deadlines,
+                           (request.sent_at + request.timeout, req))
+
+    def resolve(self, req, response):
+        """
+        Resolve the request of a req id, if pending.
+
+        :param req: The req id of the response.
+        :type req: int
+        :param response: The response.
+        :type response: dict
+        :return: The resolved Request or None.
+        :rtype: Request | None
+        """
+        with self._lock:
+            request = self._pending.pop(req, None)
+            if request is None:
+                return None
+
+            latency = self._latency.get(request.event)
+            if latency is None:
+                latency = self._latency[request.event] = Histogram()
+
+        latency.add(time.time() - request.sent_at)
+        request.finish('ok', response)
+        return request
+
+    def expire(self):
+        """
+        Finish the requests past their deadline as timed out.
+        """
+        now = time.time()
+        expired = []
+        with self._lock:
+            while self._deadlines and self._deadlines[0][0] <= now:
+                _, req = heapq.heappop(self._deadlines)
+                request = self._pending.pop(req, None)
+                if request is not None:
+                    expired.append(request)
+                    self._timeouts[request.event] = \
+                        self._timeouts.get(request.event, 0) + 1
+
+        for request in expired:
+            request.finish('timeout')
+
+    def clear(self):
+        """
+        Finish all pending requests as disconnected.
+        """
+        with self._lock:
+            pending = self._pending.values()
+            self._pending = {}
+            self._deadlines = []
+
+        for request in pending:
+            request.finish('disconnected')
+
+    def stats(self):
+        """
+        The round trip latency and timeouts per event.
+
+        :return: A dictionary where the key is the event and the value
+        is the histogram summary with the amount of timeouts added.
+        :rtype: dict
+        """
+        stats = {}
+        with self._lock:
+            events = set(self._latency) | set(self._timeouts)
+            for event in events:
+                if event in self._latency:
+                    summary = self._latency[event].summary()
+                else:
+                    summary = Histogram().summary()
+                summary['timeouts'] = self._timeouts.get(event, 0)
+                stats[event] = summary
+
+        return stats
@@ -0,0 +1,368 @@
+# -*- coding: utf-8 -*-
+
+"""
+The MIT License (MIT)
+
+Copyright (c) 2019 Nortxort
+
+Permission is hereby granted, free of charge, to any person obtaining a
+copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the
+Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+"""
+
+import os
+import sys
+import time
+import heapq
+import errno
+import select
+import socket
+import ctypes
+import ctypes.util
+import logging
+import threading
+
+from histogram import Histogram
+
+
+log = logging.getLogger(__name__)
+
+
+def _monotonic_clock():
+    # python 2 has no time.monotonic, use the clock of the os.
+    # falls back to time.time if the clock is not available.
+    try:
+        return time.monotonic
+    except AttributeError:
+        pass
+
+    try:
+        if sys.platform.startswith('win'):
+            tick_count = ctypes.windll.kernel32.GetTickCount64
+            tick_count.restype = ctypes.c_ulonglong
+            return lambda: tick_count() / 1000.0
+
+        class Timespec(ctypes.Structure):
+            _fields_ = [('tv_sec', ctypes.c_long), ('tv_nsec', ctypes.c_long)]
+
+        # CLOCK_MONOTONIC
+        clock_id = 6 if sys.platform == 'darwin' else 1
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        try:
+            clock_gettime = libc.clock_gettime
+        except AttributeError:
+            # glibc before 2.17
+            clock_gettime = ctypes.CDLL(ctypes.util.find_library('rt'),
+                                        use_errno=True).clock_gettime
+        clock_gettime.argtypes = [ctypes.c_int, ctypes.POINTER(Timespec)]
+
+        def monotonic():
+            ts = Timespec()
+            if clock_gettime(clock_id, ctypes.byref(ts)) != 0:
+                raise OSError(ctypes.get_errno(), 'clock_gettime failed')
+            return ts.tv_sec + ts.tv_nsec * 1e-9
+
+        monotonic()
+        return monotonic
+    except (AttributeError, OSError, TypeError) as e:
+        log.warning('no monotonic clock, using time.time: %s' % e)
+        return time.time
+
+
+# seconds from an unspecified point, not affected by system clock changes.
+monotonic = _monotonic_clock()
+
+
+def socket_pair():
+    """
+    A connected pair of non-blocking sockets, used to wake up a thread
+    waiting in select/poll. socket.socketpair is not available on
+    windows(python 2)
+
+    :return: The reader and writer socket.
+    :rtype: tuple
+    """
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(1)
+
+    writer = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    writer.connect(listener.getsockname())
+    reader, _ = listener.accept()
+    listener.close()
+
+    reader.setblocking(False)
+    writer.setblocking(False)
+    return reader, writer
+
+
+class Handle(object):
+    """
+    A scheduled call, which can be cancelled until it fires.
+    """
+
+    def __init__(self, scheduler, deadline, func, args, kwargs):
+        self.deadline = deadline
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.cancelled = False
+        self.fired = False
+        self._scheduler = scheduler
+
+    def __repr__(self):
+        return '<%s func=%s, remaining=%.3f, cancelled=%s, fired=%s>' % \
+               (self.__class__.__name__, getattr(self.func, '__name__', self.func),
+                self.remaining, self.cancelled, self.fired)
+
+    @property
+    def active(self):
+        """
+        True if the call is still waiting to fire.
+
+        :rtype: bool
+        """
+        return not self.cancelled and not self.fired
+
+    @property
+    def remaining(self):
+        """
+        Seconds until the call fires.
+
+        :rtype: float
+        """
+        return max(self.deadline - monotonic(), 0.0)
+
+    def cancel(self):
+        """
+        Cancel the call.
+
+        :return: True if cancelled, False if it already fired or was cancelled.
+        :rtype: bool
+        """
+        return self._scheduler.cancel(self)
+
+
+class Scheduler(threading.Thread):
+    """
+    A single thread running time based calls.
+
+    The calls are kept in a heap ordered by their deadline on the
+    monotonic clock. The thread sleeps in select until the next
+    deadline, or until a call with an earlier deadline is added.
+
+    The calls are made from the scheduler thread, so they must be
+    quick. Blocking work should be handed to a thread pool.
+    """
+
+    def __init__(self):
+        threading.Thread.__init__(self, name='Scheduler')
+        self.daemon = True
+
+        # (deadline, seq, Handle)
+        self._heap = []
+        self._seq = 0
+        self._cancelled = 0
+        self._lock = threading.Lock()
+        self._wake_reader, self._wake_writer = socket_pair()
+        self._woken = False
+        self._wake_lock = threading.Lock()
+
+        self._fired = 0
+        self._errors = 0
+        # seconds between the deadline and the call
+        self.lateness = Histogram()
+
+        self.start()
+
+    def __len__(self):
+        return len(self._heap) - self._cancelled
+
+    def call_later(self, delay, func, *args, **kwargs):
+        """
+        Call a function after a delay.
+
+        :param delay: Seconds to wait before calling.
+        :type delay: int | float
+        :param func: The function/method to call.
+        :param args: Function/method arguments.
+        :param kwargs: Function/method keywords.
+        :return: The handle of the call.
+        :rtype: Handle
+        """
+        return self.call_at(monotonic() + max(delay, 0), func, *args, **kwargs)
+
+    def call_at(self, deadline, func, *args, **kwargs):
+        """
+        Call a function at a time on the monotonic clock.
+
+        :param deadline: The time to call at, see `monotonic`
+        :type deadline: float
+        :param func: The function/method to call.
+        :param args: Function/method arguments.
+        :param kwargs: Function/method keywords.
+        :return: The handle of the call.
+        :rtype: Handle
+        """
+        handle = Handle(self, deadline, func, args, kwargs)
+        with self._lock:
+            self._seq += 1
+            heapq.heappush(self._heap, (deadline, self._seq, handle))
+            earliest = self._heap[0][2] is handle
+
+        if earliest:
+            self._wakeup()
+
+        return handle
+
+    def cancel(self, handle):
+        """
+        Cancel a call. The handle is removed from the heap
+        once it's due, or when the heap is compacted.
+
+        :param handle: The handle of the call.
+        :type handle: Handle
+        :return: True if cancelled.
+        :rtype: bool
+        """
+        with self._lock:
+            if not handle.active:
+                return False
+
+            handle.cancelled = True
+            self._cancelled += 1
+            # compact when mostly cancelled, so a room that keeps
+            # rescheduling does not grow the heap
+            if self._cancelled > 64 and self._cancelled * 2 > len(self._heap):
+                self._heap = [item for item in self._heap if item[2].active]
+                heapq.heapify(self._heap)
+                self._cancelled = 0
+
+            return True
+
+    def stats(self):
+        """
+        Returns the scheduler metrics.
+
+        :return: A dictionary with the amount of pending, fired and
+        failed calls, and the firing lateness summary.
+        :rtype: dict
+        """
+        return {
+            'pending': len(self),
+            'fired': self._fired,
+            'errors': self._errors,
+            'lateness': self.lateness.summary()
+        }
+
+    def _wakeup(self):
+        with self._wake_lock:
+            if self._woken:
+                return
+            self._woken = True
+            try:
+                self._wake_writer.send(b'x')
+            except socket.error as e:
+                if e.args[0] not in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    raise
+
+    def _drain(self):
+        # the flag is cleared after the drain, under the lock of
+        # _wakeup, so the byte of a wakeup can not be swallowed
+        # while the flag stays set. the heap is checked again
+        # after a drain, so a skipped wakeup is not lost either
+        with self._wake_lock:
+            try:
+                while self._wake_reader.recv(4096):
+                    pass
+            except socket.error:
+                pass
+            self._woken = False
+
+    def _due(self):
+        # pop the due handles, and return them along
+        # with the seconds until the next deadline
+        due = []
+        with self._lock:
+            now = monotonic()
+            while self._heap and self._heap[0][0] <= now:
+                handle = heapq.heappop(self._heap)[2]
+                if handle.cancelled:
+                    self._cancelled -= 1
+                    continue
+                handle.fired = True
+                due.append(handle)
+
+            timeout = None
+            if self._heap:
+                timeout = max(self._heap[0][0] - now, 0)
+
+        return due, now, timeout
+
+    def run(self):
+        """
+        Overrides Thread.run
+        """
+        while True:
+            due, now, timeout = self._due()
+
+            for handle in due:
+                self.lateness.add(now - handle.deadline)
+                try:
+                    handle.func(*handle.args, **handle.kwargs)
+                except Exception as e:
+                    self._errors += 1
+                    log.error('scheduled call %s failed: %s' % (handle, e),
+                              exc_info=True)
+                self._fired += 1
+
+            if due:
+                # the calls may have taken time, check again
+                continue
+
+            try:
+                readable, _, _ = select.select([self._wake_reader], [], [], timeout)
+            except select.error as e:
+                if e.args[0] != errno.EINTR:
+                    raise
+                continue
+
+            if readable:
+                self._drain()
+
+
+_scheduler = None
+_scheduler_pid = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """
+    The scheduler shared by the process, started on first use.
+
+    :return: The scheduler.
+    :rtype: Scheduler
+    """
+    global _scheduler, _scheduler_pid
+    pid = os.getpid()
+    if _scheduler_pid != pid:
+        # a forked process has the scheduler, but not its thread
+        with _scheduler_lock:
+            if _scheduler_pid != pid:
+                _scheduler = Scheduler()
+                _scheduler_pid = pid
+    return _scheduler
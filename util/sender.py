@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+
+"""
+The MIT License (MIT)
+
+Copyright (c) 2019 Nortxort
+
+Permission is hereby granted, free of charge, to any person obtaining a
+copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the
+Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+"""
+
+import time
+import heapq
+import logging
+import threading
+
+
+log = logging.getLogger(__name__)
+
+# priority classes, lower goes out first.
+# join, pong, nick, password and captcha.
+CONTROL = 0
+# kick, ban, unban, broadcast close/allow and banlist.
+MODERATION = 1
+# youtube and everything else not in here.
+DEFAULT = 2
+# public and private chat messages.
+CHAT = 3
+
+PRIORITIES = {
+    'join': CONTROL,
+    'pong': CONTROL,
+    'nick': CONTROL,
+    'password': CONTROL,
+    'captcha': CONTROL,
+    'kick': MODERATION,
+    'ban': MODERATION,
+    'unban': MODERATION,
+    'banlist': MODERATION,
+    'stream_moder_close': MODERATION,
+    'stream_moder_allow': MODERATION,
+    'msg': CHAT,
+    'pvtmsg': CHAT
+}
+
+
+class Sender(threading.Thread):
+    """
+    A single writer for outbound messages.
+
+    Messages are queued by priority and written by this thread only.
+    All but the CONTROL messages are paced by a token bucket, to
+    avoid getting flood kicked by the server.
+
+    If threaded is False, the thread is never started and the
+    owner is responsible for calling `pump`, this is what the
+    Reactor does so many rooms can share one thread.
+    """
+
+    def __init__(self, writer, rate=5, burst=10, max_size=500,
+                 threaded=True, on_put=None):
+        """
+        Initialize the sender.
+
+        :param writer: The function writing a payload to the connection,
+        it's called with the payload and the request of the payload.
+        :type writer: function
+        :param rate: Messages per second the bucket is refilled with.
+        :type rate: int | float
+        :param burst: The max tokens of the bucket.
+        :type burst: int
+        :param max_size: The max size of the queue.
+        :type max_size: int
+        :param threaded: Start the sender thread.
+        :type threaded: bool
+        :param on_put: Called without arguments after a payload was queued.
+        :type on_put: function | None
+        """
+        threading.Thread.__init__(self)
+        self.daemon = True
+
+        self._writer = writer
+        self._rate = float(max(rate, 1))
+        self._burst = max(burst, 1)
+        self._max_size = max_size
+        self._on_put = on_put
+
+        self._queue = []
+        self._seq = 0
+        self._cond = threading.Condition()
+
+        self._tokens = float(self._burst)
+        self._last_refill = time.time()
+
+        self._sent = 0
+        self._dropped = 0
+        self._errors = 0
+        self._max_depth = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+        if threaded:
+            self.start()
+
+    @property
+    def depth(self):
+        """
+        The current queue depth.
+
+        :return: The amount of queued messages.
+        :rtype: int
+        """
+        return len(self._queue)
+
+    def stats(self):
+        """
+        Returns the sender metrics.
+
+        Latency is the time from a message was
+        queued until it was written, in milliseconds.
+
+        :return: A dictionary of metrics.
+        :rtype: dict
+        """
+        with self._cond:
+            avg = 0.0
+            if self._sent > 0:
+                avg = self._latency_total / self._sent * 1000
+
+            return {
+                'depth': len(self._queue),
+                'max_depth': self._max_depth,
+                'sent': self._sent,
+                'dropped': self._dropped,
+                'errors': self._errors,
+                'avg_latency': avg,
+                'max_latency': self._latency_max * 1000
+            }
+
+    def put(self, payload, priority=None, request=None):
+        """
+        Queue a payload for sending.
+
+        If the queue is full, the least important
+        message will be dropped, which could be
+        the payload itself.
+
+        :param payload: The payload to send.
+        :type payload: dict
+        :param priority: The priority class, if None
+        the priority will be based on the payload event.
+        :type priority: int | None
+        :param request: The request of the payload, this is
+        passed on to the writer along with the payload.
+        :type request: Request | None
+        :return: True if the payload was queued.
+        :rtype: bool
+        """
+        if priority is None:
+            priority = PRIORITIES.get(payload.get('tc'), DEFAULT)
+
+        with self._cond:
+            self._seq += 1
+            item = (priority, self._seq, time.time(), payload, request)
+
+            if len(self._queue) >= self._max_size:
+                # the least important and most recent message
+                worst = max(self._queue)
+                self._dropped += 1
+                if worst[:2] < item[:2]:
+                    worst = item
+                else:
+                    self._queue.remove(worst)
+                    heapq.heapify(self._queue)
+
+                log.warning('send queue full, dropping: %s' % worst[3])
+                if worst[4] is not None:
+                    worst[4].finish('dropped')
+
+                if worst is item:
+                    return False
+
+            heapq.heappush(self._queue, item)
+            if len(self._queue) > self._max_depth:
+                self._max_depth = len(self._queue)
+
+            self._cond.notify()
+
+        if self._on_put is not None:
+            self._on_put()
+
+        return True
+
+    def clear(self):
+        """
+        Clear the queue.
+        """
+        with self._cond:
+            cleared = self._queue[:]
+            self._queue[:] = []
+
+        for item in cleared:
+            if item[4] is not None:
+                item[4].finish('disconnected')
+
+    def _refill(self):
+        now = time.time()
+        elapsed = max(now - self._last_refill, 0)
+        self._last_refill = now
+        self._tokens = min(self._burst, self._tokens + elapsed * self._rate)
+
+    def _ready(self):
+        # the next message allowed to be sent and the time to
+        # wait before calling again if there is none. Call with
+        # the condition acquired.
+        if len(self._queue) == 0:
+            return None, None
+
+        priority = self._queue[0][0]
+        if priority != CONTROL:
+            self._refill()
+            if self._tokens < 1:
+                return None, (1 - self._tokens) / self._rate
+
+            self._tokens -= 1
+
+        return heapq.heappop(self._queue), 0
+
+    def _next(self):
+        # wait for the next message allowed to be sent
+        with self._cond:
+            while True:
+                item, wait = self._ready()
+                if item is not None:
+                    return item
+
+                self._cond.wait(wait)
+
+    def _send(self, item):
+        priority, _, ts, payload, request = item
+        try:
+            self._writer(payload, request)
+        except Exception as e:
+            log.error('failed to send %s: %s' % (payload, e))
+            with self._cond:
+                self._errors += 1
+        else:
+            latency = time.time() - ts
+            with self._cond:
+                self._sent += 1
+                self._latency_total += latency
+                if latency > self._latency_max:
+                    self._latency_max = latency
+
+    def pump(self):
+        """
+        Send the queued messages the token bucket allows, without blocking.
+
+        :return: Seconds until the next message can be sent,
+        or None if the queue is empty.
+        :rtype: float | None
+        """
+        while True:
+            with self._cond:
+                item, wait = self._ready()
+
+            if item is None:
+                return wait
+
+            self._send(item)
+
+    def run(self):
+        """
+        Overrides Thread.run
+        """
+        while True:
+            self._send(self._next())
@@ -28,11 +28,17 @@ DEALINGS IN THE SOFTWARE.
 # https://stackoverflow.com/questions/3033952/threading-pool-similar-to-the-multiprocessing-pool
 # and/or http://code.activestate.com/recipes/577187-python-thread-pool/
 
+import time
+import heapq
 import threading
 import Queue
 
 import logging
 
+from histogram import Histograms
+from profiler import TaskProfiler
+from scheduler import get_scheduler
+
 
 log = logging.getLogger(__name__)
 
@@ -40,10 +46,21 @@ log = logging.getLogger(__name__)
 class Timer:
     """
     Timer class for time based calls.
+
+    The calls are made by the scheduler thread shared by the process,
+    so they should be quick. Starting a timer does not start a thread.
     """
 
-    def __init__(self):
-        self._timer_thread = None
+    def __init__(self, scheduler=None):
+        """
+        Initialize the timer.
+
+        :param scheduler: The scheduler to use, defaults
+        to the scheduler shared by the process.
+        :type scheduler: Scheduler | None
+        """
+        self._scheduler = scheduler
+        self._handle = None
 
     @property
     def is_alive(self):
@@ -53,10 +70,8 @@ class Timer:
         :return: True if running, else False.
         :rtype: bool
         """
-        if self._timer_thread is not None:
-            if self._timer_thread.is_alive():
-                return True
-            return False
+        if self._handle is not None:
+            return self._handle.active
         return False
 
     def start(self, func, event_time):
@@ -70,8 +85,9 @@ class Timer:
         :type event_time: int | float | long
         """
         log.debug('starting timer. func: `%s`' % func)
-        self._timer_thread = threading.Timer(event_time, func)
-        self._timer_thread.start()
+        if self._scheduler is None:
+            self._scheduler = get_scheduler()
+        self._handle = self._scheduler.call_later(event_time, func)
 
     def cancel(self):
         """
@@ -81,39 +97,386 @@ class Timer:
         :rtype: bool
         """
         log.debug('canceling timer.')
-        if self._timer_thread is not None:
+        if self._handle is not None:
             if self.is_alive:
-                self._timer_thread.cancel()
-                self._timer_thread = None
+                self._handle.cancel()
+                self._handle = None
                 return True
             return False
         return False
 
 
+def task_name(func):
+    """
+    A readable name of a task function.
+
+    :param func: The function/method.
+    :return: The name, e.g `CommandHandler.do_ban`
+    :rtype: str
+    """
+    name = getattr(func, '__name__', repr(func))
+    instance = getattr(func, '__self__', None)
+    if instance is not None:
+        cls = instance if isinstance(instance, type) else instance.__class__
+        name = '%s.%s' % (cls.__name__, name)
+    return name
+
+
+# overflow policies, for when the task queue is full.
+# wait for room in the queue.
+BLOCK = 'block'
+# do not queue the task.
+REJECT = 'reject'
+# drop the oldest queued task added with this policy.
+DROP_OLDEST = 'drop_oldest'
+# run the task in the calling thread.
+INLINE = 'inline'
+
+OVERFLOW_POLICIES = (BLOCK, REJECT, DROP_OLDEST, INLINE)
+
+
+class TaskQueue(Queue.Queue):
+    """
+    A task queue where droppable tasks can be replaced.
+    """
+
+    def replace_oldest(self, task, policy=DROP_OLDEST):
+        """
+        Replace the oldest queued task added with a policy.
+
+        :param task: The task to add in place of the dropped task.
+        :type task: tuple
+        :param policy: The policy of the tasks that may be dropped.
+        :type policy: str
+        :return: The dropped task or None if no task could be dropped.
+        :rtype: tuple | None
+        """
+        with self.mutex:
+            for i, queued in enumerate(self.queue):
+                if queued[4] == policy:
+                    del self.queue[i]
+                    self.queue.append(task)
+                    self.not_empty.notify()
+                    return queued
+
+        return None
+
+
+class CancelledError(Exception):
+    """ Raised by Future.result if the task never ran. """
+    pass
+
+
+class TaskTimeoutError(Exception):
+    """ Raised by Future.result if the task passed it's deadline. """
+    pass
+
+
+# the future of the task running in the current thread.
+_local = threading.local()
+
+
+def current_future():
+    """
+    The future of the task running in the calling thread.
+
+    A task can use this to check if it has timed out,
+    before doing something the caller no longer waits for.
+
+    :return: The Future or None if not called from a task.
+    :rtype: Future | None
+    """
+    return getattr(_local, 'future', None)
+
+
+class Future(object):
+    """
+    The pending result of a task added to the thread pool.
+
+    A task can be cancelled as long as it is queued. A task with
+    a timeout has a deadline, counted from when it was added.
+    A task passing it's deadline is finished as timed out,
+    even if it is still running. The result of the task is
+    then discarded once it returns.
+    """
+
+    def __init__(self, func, timeout=None):
+        """
+        Initialize the future.
+
+        :param func: The task function/method.
+        :param timeout: Seconds the task may take, including
+        the time waiting in the queue. None for no deadline.
+        :type timeout: int | float | None
+        """
+        self.name = task_name(func)
+        self.deadline = None
+        if timeout is not None:
+            self.deadline = time.time() + timeout
+
+        # None while queued, then `running`. Finished
+        # as `ok`, `error`, `cancelled`, `timeout`,
+        # `rejected` or `dropped`
+        self.status = None
+        self.worker = None
+        # set by the pool if the worker is replaced on timeout
+        self.retire_worker = False
+
+        self._result = None
+        self._exception = None
+        self._callbacks = []
+        self._lock = threading.Lock()
+        self._event = threading.Event()
+
+    def __repr__(self):
+        return '<%s task=%s, status=%s>' % \
+               (self.__class__.__name__, self.name, self.status)
+
+    @property
+    def done(self):
+        """
+        True if the task is finished.
+
+        :rtype: bool
+        """
+        return self._event.is_set()
+
+    @property
+    def cancelled(self):
+        """
+        True if the task was cancelled, rejected or dropped.
+
+        :rtype: bool
+        """
+        return self.status in ('cancelled', 'rejected', 'dropped')
+
+    @property
+    def timed_out(self):
+        """
+        True if the task passed it's deadline.
+
+        :rtype: bool
+        """
+        return self.status == 'timeout'
+
+    def cancel(self):
+        """
+        Cancel the task, if it has not started yet.
+
+        :return: True if cancelled.
+        :rtype: bool
+        """
+        return self.finish('cancelled')
+
+    def add_done_callback(self, callback):
+        """
+        Add a function to call with the future once it is finished.
+
+        The callback is called from the thread finishing the
+        future, this can be the watchdog of the pool, so it
+        should not block. If the future is already finished,
+        the callback is called right away.
+
+        :param callback: The function to call.
+        :type callback: function
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+
+        self._call(callback)
+
+    def result(self, timeout=None):
+        """
+        Wait for the result of the task.
+
+        :param timeout: Seconds to wait, None to wait until finished.
+        :type timeout: int | float | None
+        :return: The return value of the task.
+        :raises CancelledError: If the task did not run.
+        :raises TaskTimeoutError: If the task or the wait timed out.
+        """
+        self._event.wait(timeout)
+        if not self._event.is_set() or self.timed_out:
+            raise TaskTimeoutError(self.name)
+        if self.cancelled:
+            raise CancelledError('%s was %s' % (self.name, self.status))
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+    def exception(self):
+        """
+        The exception raised by the task, if any.
+
+        :rtype: Exception | None
+        """
+        return self._exception
+
+    def start(self, worker=None):
+        """
+        Mark the task as running.
+
+        :param worker: The worker running the task,
+        None if the task is run inline.
+        :type worker: Worker | None
+        :return: False if the task was finished while queued.
+        :rtype: bool
+        """
+        with self._lock:
+            if self.status is not None:
+                return False
+            self.status = 'running'
+            self.worker = worker
+            return True
+
+    def finish(self, status, result=None, exception=None):
+        """
+        Finish the future. Only the first call has an effect,
+        and only `ok`, `error` and `timeout` apply to a running task.
+
+        :param status: The final status.
+        :type status: str
+        :param result: The return value of the task.
+        :param exception: The exception raised by the task.
+        :type exception: Exception | None
+        :return: True if this call finished the future.
+        :rtype: bool
+        """
+        with self._lock:
+            if self._event.is_set():
+                return False
+            if self.status == 'running' and \
+                    status not in ('ok', 'error', 'timeout'):
+                return False
+
+            self.status = status
+            self._result = result
+            self._exception = exception
+            self._event.set()
+            callbacks = self._callbacks
+            self._callbacks = []
+
+        for callback in callbacks:
+            self._call(callback)
+
+        return True
+
+    def _call(self, callback):
+        try:
+            callback(self)
+        except Exception as e:
+            log.error('future callback error %s: %s' % (self, e),
+                      exc_info=True)
+
+
+def run_task(timings, func, args, kwargs, queued_at, future=None,
+             worker=None, profiler=None):
+    """
+    Run a task, and add it's queue wait and run time
+    to the timings and the profiler.
+
+    :param timings: The histograms to add the times to, or None.
+    :type timings: Histograms | None
+    :param func: The function/method to call.
+    :param args: Function/method arguments.
+    :param kwargs: Function/method keywords.
+    :param queued_at: The time the task was queued.
+    :type queued_at: float
+    :param future: The future of the task.
+    :type future: Future | None
+    :param worker: The worker running the task.
+    :type worker: Worker | None
+    :param profiler: The task profiler, or None.
+    :type profiler: TaskProfiler | None
+    """
+    if future is not None and not future.start(worker):
+        # cancelled or timed out while queued
+        return
+
+    started_at = time.time()
+    error = None
+    _local.future = future
+    try:
+        result = func(*args, **kwargs)
+    except Exception as e:
+        error = e
+        log.error('task %s failed: %s' % (task_name(func), e), exc_info=True)
+        if future is not None:
+            future.finish('error', exception=e)
+    else:
+        if future is not None:
+            future.finish('ok', result=result)
+    finally:
+        _local.future = None
+        if timings is not None or profiler is not None:
+            name = task_name(func)
+            wait = started_at - queued_at
+            run = time.time() - started_at
+            if timings is not None:
+                timings.add('wait.' + name, wait)
+                timings.add('run.' + name, run)
+            if profiler is not None:
+                profiler.add(name, wait, run, error, args)
+
+
 class Worker(threading.Thread):
     """
     A worker class.
+
+    A worker running a task past it's deadline is replaced by the pool,
+    the replaced worker exits once the task returns.
+
+    If the pool autoscales, the worker reports the queue wait of every
+    task to the pool, and asks the pool if it may exit once it has
+    been idle for the cooldown of the pool.
     """
 
-    def __init__(self, tasks):
+    def __init__(self, tasks, timings=None, pool=None):
         threading.Thread.__init__(self)
         self.tasks = tasks
+        self.timings = timings
+        self.pool = pool
         self.daemon = True
         self.start()
 
+    def _get(self):
+        # wait for the next task, None if idle for the cooldown
+        if self.pool is None or not self.pool.can_shrink:
+            return self.tasks.get()
+
+        try:
+            return self.tasks.get(timeout=self.pool.cooldown)
+        except Queue.Empty:
+            return None
+
     def run(self):
         """
         Overrides Thread.run
         """
         while True:
-            func, args, kwargs = self.tasks.get()
+            task = self._get()
+            if task is None:
+                if self.pool.scale_down(self):
+                    break
+                continue
+
+            func, args, kwargs, queued_at, _, future = task
+            profiler = None
+            if self.pool is not None:
+                self.pool.scale_up(time.time() - queued_at)
+                profiler = self.pool.profiler
             try:
-                func(*args, **kwargs)
-            except Exception as e:
-                print(e)
+                run_task(self.timings, func, args, kwargs,
+                         queued_at, future, self, profiler)
             finally:
                 self.tasks.task_done()
 
+            if future.timed_out and future.retire_worker:
+                log.info('replaced worker %s exited' % self.name)
+                break
+
 
 class ThreadPool:
     """
@@ -122,32 +485,373 @@ class ThreadPool:
     This allows us to have a pool of threads
     to use from. Once a thread is done, it will be
     added back in to the pool.
+
+    The task queue is bounded, what happens when it's full
+    depends on the overflow policy of the task being added.
+
+    Tasks added with `submit` return a Future, and may have
+    a deadline. A watchdog thread finishes the tasks passing
+    their deadline, and replaces the workers stuck with them.
+
+    With a max_threads above num_threads, the pool autoscales. A
+    thread is added when a task waited in the queue longer than
+    the target wait, and a thread idle for the cooldown exits,
+    as long as the pool has more than num_threads threads.
     """
 
-    def __init__(self, num_threads):
+    def __init__(self, num_threads, max_queue=None, overflow=REJECT,
+                 max_threads=None, target_wait=0.1, cooldown=60, profiler=None):
         """
         Initialize the thread pool class.
 
-        :param num_threads: The amount of threads in the pool.
+        :param num_threads: The amount of threads in the pool,
+        the min amount if the pool autoscales.
         :type num_threads: int
+        :param max_queue: The max amount of queued tasks,
+        defaults to the amount of threads.
+        :type max_queue: int | None
+        :param overflow: The default overflow policy.
+        :type overflow: str
+        :param max_threads: The max amount of threads to scale up to,
+        if None or not above num_threads, the pool does not autoscale.
+        :type max_threads: int | None
+        :param target_wait: Seconds a task may wait in the queue,
+        before a thread is added.
+        :type target_wait: int | float
+        :param cooldown: Seconds a thread must be idle, before it exits.
+        :type cooldown: int | float
+        :param profiler: The task profiler, pools may share one.
+        If None, the pool creates it's own.
+        :type profiler: TaskProfiler | None
         """
-        log.info('initiating thread pool (%s)' % num_threads)
-        self.tasks = Queue.Queue(num_threads)
+        if max_threads is None or max_threads < num_threads:
+            max_threads = num_threads
+        log.info('initiating thread pool (%s-%s)' % (num_threads, max_threads))
+        if max_queue is None:
+            max_queue = num_threads
+        if overflow not in OVERFLOW_POLICIES:
+            log.warning('unknown overflow policy `%s`, using `%s`' %
+                        (overflow, REJECT))
+            overflow = REJECT
+
+        self.tasks = TaskQueue(max_queue)
+        self.overflow = overflow
+        # queue wait and run time of the tasks, by task name
+        self.timings = Histograms()
+        if profiler is None:
+            profiler = TaskProfiler()
+        self.profiler = profiler
+        self.min_threads = num_threads
+        self.max_threads = max_threads
+        self.target_wait = target_wait
+        self.cooldown = cooldown
+        # the max amount of replaced workers still running a task,
+        # beyond this, stuck workers are no longer replaced
+        self.max_stuck = max_threads
+
+        self._lock = threading.Lock()
+        self._max_depth = 0
+        self._rejected = 0
+        self._dropped = 0
+        self._inline = 0
+        self._timed_out = 0
+        self._replaced = []
+        self._threads = 0
+        self._max_threads_seen = 0
+
+        # (deadline, seq, Future)
+        self._deadlines = []
+        self._seq = 0
+        self._watch_cond = threading.Condition()
+        self._watchdog = None
 
         for _ in range(num_threads):
-            Worker(self.tasks)
+            self._spawn()
+
+    @property
+    def depth(self):
+        """
+        The amount of queued tasks.
+
+        :rtype: int
+        """
+        return self.tasks.qsize()
+
+    @property
+    def stuck(self):
+        """
+        The amount of replaced workers still running a timed out task.
+
+        :rtype: int
+        """
+        with self._lock:
+            self._replaced = [w for w in self._replaced if w.is_alive()]
+            return len(self._replaced)
+
+    def stats(self):
+        """
+        Returns the queue metrics.
+
+        :return: A dictionary with the queue depth, max depth, the
+        amount of rejected, dropped, inline and timed out tasks, the
+        amount of workers stuck with a timed out task, and the current
+        and max amount of threads.
+        :rtype: dict
+        """
+        stuck = self.stuck
+        with self._lock:
+            return {
+                'threads': self._threads,
+                'max_threads': self._max_threads_seen,
+                'depth': self.tasks.qsize(),
+                'max_depth': self._max_depth,
+                'rejected': self._rejected,
+                'dropped': self._dropped,
+                'inline': self._inline,
+                'timed_out': self._timed_out,
+                'stuck': stuck
+            }
+
+    @property
+    def threads(self):
+        """
+        The current amount of threads, not counting stuck threads.
+
+        :rtype: int
+        """
+        return self._threads
+
+    @property
+    def can_shrink(self):
+        """
+        True if the pool has more than the min amount of threads.
+
+        :rtype: bool
+        """
+        return self._threads > self.min_threads
+
+    def scale_up(self, wait):
+        """
+        Add a thread if a task waited longer than the target wait.
+
+        :param wait: Seconds the task waited in the queue.
+        :type wait: float
+        :return: True if a thread was added.
+        :rtype: bool
+        """
+        if wait <= self.target_wait or self._threads >= self.max_threads:
+            return False
+
+        with self._lock:
+            if self._threads >= self.max_threads:
+                return False
+            threads = self._spawn_locked()
+
+        log.info('scaled pool up to %s threads, queue wait %.0fms, depth %s' %
+                 (threads, wait * 1000, self.tasks.qsize()))
+        return True
+
+    def scale_down(self, worker):
+        """
+        Let an idle worker exit, if the pool has more than the min threads.
+
+        :param worker: The idle worker.
+        :type worker: Worker
+        :return: True if the worker should exit.
+        :rtype: bool
+        """
+        with self._lock:
+            if self._threads <= self.min_threads:
+                return False
+            self._threads -= 1
+            threads = self._threads
+
+        log.info('scaled pool down to %s threads, %s idle for %ss' %
+                 (threads, worker.name, self.cooldown))
+        return True
+
+    def _spawn(self):
+        with self._lock:
+            return self._spawn_locked()
+
+    def _spawn_locked(self):
+        # start a worker, call with the lock acquired
+        self._threads += 1
+        if self._threads > self._max_threads_seen:
+            self._max_threads_seen = self._threads
+        Worker(self.tasks, self.timings, self)
+        return self._threads
 
     def add_task(self, func, *args, **kwargs):
         """
         Add a task to the thread pool.
 
+        The default overflow policy of the pool applies.
+
+        :param func: The function/method to call in a thread.
+        :param args: Function/method arguments.
+        :param kwargs: Function/method keywords.
+        :return: True if the task was queued or run.
+        :rtype: bool
+        """
+        return self.put(func, args, kwargs)
+
+    def put(self, func, args=(), kwargs=None, overflow=None):
+        """
+        Add a task to the thread pool with an overflow policy.
+
         :param func: The function/method to call in a thread.
         :param args: Function/method arguments.
+        :type args: tuple
         :param kwargs: Function/method keywords.
+        :type kwargs: dict | None
+        :param overflow: The overflow policy of the task,
+        if None the default policy of the pool applies.
+        :type overflow: str | None
+        :return: True if the task was queued or run.
+        :rtype: bool
+        """
+        future = self.submit(func, args, kwargs, overflow)
+        return future.status != 'rejected'
+
+    def submit(self, func, args=(), kwargs=None, overflow=None, timeout=None):
         """
+        Add a task to the thread pool, and return it's future.
+
+        :param func: The function/method to call in a thread.
+        :param args: Function/method arguments.
+        :type args: tuple
+        :param kwargs: Function/method keywords.
+        :type kwargs: dict | None
+        :param overflow: The overflow policy of the task,
+        if None the default policy of the pool applies.
+        :type overflow: str | None
+        :param timeout: Seconds until the deadline of the task,
+        None for no deadline.
+        :type timeout: int | float | None
+        :return: The future of the task.
+        :rtype: Future
+        """
+        if kwargs is None:
+            kwargs = {}
+        if overflow is None:
+            overflow = self.overflow
+
         log.debug('adding task, func=%s, args=%s, kwargs=%s' %
                   (func, args, kwargs))
-        self.tasks.put((func, args, kwargs))
+        future = Future(func, timeout)
+        task = (func, args, kwargs, time.time(), overflow, future)
+
+        if overflow == BLOCK:
+            self.tasks.put(task)
+        else:
+            try:
+                self.tasks.put_nowait(task)
+            except Queue.Full:
+                self._overflow(task)
+                return future
+
+        depth = self.tasks.qsize()
+        if depth > self._max_depth:
+            self._max_depth = depth
+
+        if future.deadline is not None:
+            self._watch(future)
+
+        if depth > 1 and self._threads < self.max_threads:
+            # all threads may be busy with long tasks,
+            # so check the wait of the oldest queued task
+            try:
+                oldest = self.tasks.queue[0][3]
+            except IndexError:
+                pass
+            else:
+                self.scale_up(time.time() - oldest)
+
+        return future
+
+    def _overflow(self, task):
+        func, args, kwargs, queued_at, overflow, future = task
+
+        if overflow == INLINE:
+            with self._lock:
+                self._inline += 1
+            run_task(self.timings, func, args, kwargs, queued_at, future,
+                     profiler=self.profiler)
+            return
+
+        if overflow == DROP_OLDEST:
+            dropped = self.tasks.replace_oldest(task)
+            if dropped is not None:
+                with self._lock:
+                    self._dropped += 1
+                log.warning('task queue full, dropped: %s' % task_name(dropped[0]))
+                dropped[5].finish('dropped')
+                if future.deadline is not None:
+                    self._watch(future)
+                return
+
+        with self._lock:
+            self._rejected += 1
+        log.warning('task queue full, rejected: %s' % task_name(func))
+        future.finish('rejected')
+
+    def _watch(self, future):
+        # add a future to the deadline heap of the watchdog
+        with self._watch_cond:
+            self._seq += 1
+            heapq.heappush(self._deadlines,
+                           (future.deadline, self._seq, future))
+            if self._watchdog is None:
+                self._watchdog = threading.Thread(target=self._run_watchdog,
+                                                  name='PoolWatchdog')
+                self._watchdog.daemon = True
+                self._watchdog.start()
+            self._watch_cond.notify()
+
+    def _run_watchdog(self):
+        while True:
+            with self._watch_cond:
+                while True:
+                    # finished futures are removed lazily
+                    while self._deadlines and self._deadlines[0][2].done:
+                        heapq.heappop(self._deadlines)
+
+                    wait = None
+                    if self._deadlines:
+                        wait = self._deadlines[0][0] - time.time()
+                        if wait <= 0:
+                            future = heapq.heappop(self._deadlines)[2]
+                            break
+
+                    self._watch_cond.wait(wait)
+
+            self._expire(future)
+
+    def _expire(self, future):
+        # finish a future past it's deadline, and
+        # replace the worker running it, if any
+        worker = future.worker
+        replace = worker is not None and self.stuck < self.max_stuck
+        # must be set before finishing, the worker
+        # checks it once the task returns
+        future.retire_worker = replace
+        if not future.finish('timeout'):
+            return
+
+        with self._lock:
+            self._timed_out += 1
+        self.profiler.add_timeout(future.name)
+        log.warning('task timed out: %s' % future.name)
+
+        if replace:
+            with self._lock:
+                self._replaced.append(worker)
+            Worker(self.tasks, self.timings, self)
+            log.info('replaced worker %s running %s' % (worker.name, future.name))
+        elif worker is not None:
+            log.error('%s workers stuck with timed out tasks, not replacing '
+                      'worker %s' % (self.max_stuck, worker.name))
 
     def map(self, func, args_list):
         """
@@ -167,6 +871,87 @@ class ThreadPool:
         self.tasks.join()
 
 
+# executor names, see Executors.
+# moderation checks of joins, nicks and messages.
+MODERATION = 'moderation'
+# commands calling an external API.
+API = 'api'
+# room settings and other background work.
+HOUSEKEEPING = 'housekeeping'
+
+
+class Executors(object):
+    """
+    Named thread pools, each with their own threads and queue.
+
+    Every kind of work gets it's own pool, so a slow task in one
+    pool can not delay the tasks of another. E.g a hanging API
+    lookup can not hold up a moderation check.
+    """
+
+    def __init__(self, **pools):
+        """
+        Initialize the executors.
+
+        :param pools: The thread pools by name.
+        :type pools: ThreadPool
+        """
+        self._pools = pools
+
+    def __getitem__(self, name):
+        return self._pools[name]
+
+    @property
+    def names(self):
+        """
+        The executor names, sorted.
+
+        :rtype: list
+        """
+        return sorted(self._pools)
+
+    def get(self, name):
+        """
+        Get an executor by name.
+
+        :param name: The executor name.
+        :type name: str
+        :return: The thread pool.
+        :rtype: ThreadPool
+        """
+        return self._pools[name]
+
+    def stats(self):
+        """
+        Returns the queue metrics of every executor.
+
+        :return: A dictionary of ThreadPool.stats by executor name.
+        :rtype: dict
+        """
+        return dict((name, pool.stats()) for name, pool in self._pools.items())
+
+    def timings(self, prefix=''):
+        """
+        Returns the queue wait and run timings of every executor.
+
+        :param prefix: Only include names starting with this.
+        :type prefix: str
+        :return: A dictionary of summaries by timing name.
+        :rtype: dict
+        """
+        summary = {}
+        for pool in self._pools.values():
+            summary.update(pool.timings.summary(prefix))
+        return summary
+
+    def wait_completion(self):
+        """
+        Wait for the tasks of every executor to be done.
+        """
+        for pool in self._pools.values():
+            pool.wait_completion()
+
+
 def thread_task(target, *args):
     """
     Create a simple threaded task.